@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OCR 결과 → Parquet / Arrow IPC (분석용 롱 포맷 테이블)
+
+수천 개 시트를 한 번에 불러올 수 있도록 셀 1개 = 1행인 열 지향 테이블로 저장한다.
+열: building, floor, unit, color, text, source, timestamp
+행 그룹 단위로 흘려 쓰므로 단지 전체를 내보내도 메모리는 행 그룹 크기로 제한된다.
+
+사용법:
+    python arrow_exporter.py out.parquet results/*.json
+    python arrow_exporter.py out.arrow --format arrow results/
+    python arrow_exporter.py out.parquet --db history.db [--building 102동] [--since 2026-10-01]
+
+입력 JSON은 중첩 포맷, 압축 포맷(compact-v1), 바이너리(.bin) 모두 가능
+"""
+
+import argparse
+import glob
+import os
+import sys
+from datetime import datetime
+
+from compact_result import COLOR_CODES, MISSING, is_compact, load_result, matrices, to_compact
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    ARROW_AVAILABLE = True
+except ImportError:
+    ARROW_AVAILABLE = False
+
+ROW_GROUP_ROWS = 100_000    # 행 그룹(= 메모리에 모으는 최대 행 수)
+
+
+def table_schema():
+    """롱 포맷 스키마 (문자열 열의 반복 값은 Parquet이 열 청크마다 dictionary 인코딩)"""
+    return pa.schema([
+        ('building', pa.string()),
+        ('floor', pa.int16()),
+        ('unit', pa.int16()),
+        ('color', pa.string()),
+        ('text', pa.string()),
+        ('source', pa.string()),
+        ('timestamp', pa.timestamp('s')),
+    ])
+
+
+def iter_file_rows(paths):
+    """JSON / 바이너리 결과 파일 → 셀 행 (building, floor, unit, color, text, source, timestamp)"""
+    for path in paths:
+        try:
+            with open(path, 'rb') as f:
+                raw = f.read()
+            data = load_result(raw if raw[:4] == b'OCRC' else raw.decode('utf-8'))
+            if 'error' in data:
+                print(f"건너뜀: {path} (OCR 오류 결과)", file=sys.stderr)
+                continue
+            # 예전 중첩 결과는 여기서 변환 (형식이 어긋난 파일 하나가 전체 내보내기를 멈추지 않도록)
+            compact = data if is_compact(data) else to_compact(data)
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            print(f"건너뜀: {path} ({e!r})", file=sys.stderr)
+            continue
+
+        building = (compact.get('header') or {}).get('building', '')
+        timestamp = datetime.fromtimestamp(int(os.path.getmtime(path)))
+        colors, texts = matrices(compact)
+        table = compact['text_table']
+        for r, floor in enumerate(compact['floors']):
+            for c, unit in enumerate(compact['units']):
+                if colors[r, c] != MISSING:
+                    yield (building, floor, unit, COLOR_CODES[colors[r, c]], table[texts[r, c]],
+                           path, timestamp)
+
+
+def iter_db_rows(db_path, building=None, since=None, until=None):
+    """이력 DB(history_store) → 셀 행 (커서로 순차 읽기)"""
+    import history_store
+    conn = history_store.connect(db_path)
+    clauses, params = [], []
+    if building:
+        clauses.append("c.building = ?")
+        params.append(building)
+    if since:
+        clauses.append("c.created_at >= ?")
+        params.append(since)
+    if until:
+        clauses.append("c.created_at < ?")
+        params.append(until)
+    where = (" WHERE " + " AND ".join(clauses)) if clauses else ""
+    cursor = conn.execute(
+        "SELECT c.building, c.floor, c.unit, c.color, c.text, COALESCE(r.source, ''), c.created_at"
+        f" FROM cells c JOIN runs r ON r.id = c.run_id{where} ORDER BY c.run_id", params)
+    for building_, floor, unit, color, text, source, created_at in cursor:
+        yield building_, floor, unit, color, text, source, datetime.fromisoformat(created_at)
+    conn.close()
+
+
+def export_rows(rows, output_file, fmt='parquet', row_group_rows=ROW_GROUP_ROWS):
+    """셀 행을 행 그룹 단위로 모아 기록, 반환: 기록한 행 수"""
+    if not ARROW_AVAILABLE:
+        raise RuntimeError("pyarrow가 설치되어 있지 않습니다 (pip install pyarrow)")
+
+    schema = table_schema()
+    if fmt == 'parquet':
+        writer = pq.ParquetWriter(output_file, schema, compression='zstd')
+        write = writer.write_table
+    else:
+        writer = pa.ipc.new_file(output_file, schema,
+                                 options=pa.ipc.IpcWriteOptions(compression='zstd'))
+        write = writer.write_table
+
+    columns = [[] for _ in schema.names]
+    total = 0
+
+    def flush():
+        # 모은 행을 행 그룹(Parquet) / 레코드 배치(IPC) 하나로 기록 후 비움
+        arrays = [pa.array(col, type=field.type) for col, field in zip(columns, schema)]
+        write(pa.Table.from_arrays(arrays, schema=schema))
+        for col in columns:
+            col.clear()
+
+    try:
+        for row in rows:
+            for col, value in zip(columns, row):
+                col.append(value)
+            total += 1
+            if len(columns[0]) >= row_group_rows:
+                flush()
+        if columns[0] or total == 0:
+            flush()
+    finally:
+        writer.close()
+    return total
+
+
+def expand_inputs(inputs):
+    """파일 / 디렉터리 / 글롭 → 결과 파일 목록"""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(sorted(glob.glob(os.path.join(item, '*.json')) +
+                                glob.glob(os.path.join(item, '*.bin'))))
+        elif any(ch in item for ch in '*?['):
+            paths.extend(sorted(glob.glob(item)))
+        else:
+            paths.append(item)
+    return paths
+
+
+def main():
+    """메인 함수"""
+    parser = argparse.ArgumentParser(description="OCR 결과 → Parquet / Arrow IPC")
+    parser.add_argument('output', help="출력 파일 (.parquet / .arrow)")
+    parser.add_argument('inputs', nargs='*', help="결과 JSON/바이너리 파일, 디렉터리 또는 글롭")
+    parser.add_argument('--format', choices=['parquet', 'arrow'],
+                        help="출력 형식 (기본: 확장자로 판단, 그 외 parquet)")
+    parser.add_argument('--db', help="입력으로 사용할 이력 DB (history_store.py)")
+    parser.add_argument('--building', help="DB 입력 시 동 필터")
+    parser.add_argument('--since', help="DB 입력 시 시작 일시")
+    parser.add_argument('--until', help="DB 입력 시 종료 일시 (미포함)")
+    parser.add_argument('--row-group-rows', type=int, default=ROW_GROUP_ROWS,
+                        help=f"행 그룹 크기 (기본 {ROW_GROUP_ROWS})")
+    args = parser.parse_args()
+
+    if not ARROW_AVAILABLE:
+        print("❌ pyarrow가 설치되어 있지 않습니다 (pip install pyarrow)", file=sys.stderr)
+        sys.exit(1)
+    if not args.inputs and not args.db:
+        parser.error("입력 파일 또는 --db가 필요합니다")
+
+    fmt = args.format or ('arrow' if args.output.endswith(('.arrow', '.feather', '.ipc')) else 'parquet')
+    if args.db:
+        rows = iter_db_rows(args.db, args.building, args.since, args.until)
+    else:
+        rows = iter_file_rows(expand_inputs(args.inputs))
+
+    total = export_rows(rows, args.output, fmt, args.row_group_rows)
+    print(f"✅ {total}행 → {args.output} ({fmt})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ JSON 데이터를 기본 형태 엑셀로 변환
 
 사용법:
     python basic_excel_generator.py '{"data": [...]}' "output.xlsx"
+    (압축 포맷 {"format": "compact-v1", ...} 도 지원)
 """
 
 import sys
@@ -13,6 +14,8 @@ from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
 
+from compact_result import is_compact, iter_rows, load_result
+
 
 # 색상 정의 (원본 현황표와 동일)
 COLOR_MAP = {
@@ -23,30 +26,52 @@ COLOR_MAP = {
 }
 
 
+def unit_cell(unit_data_raw):
+    """중첩 포맷 호수 데이터 → (text, color)"""
+    # 데이터가 딕셔너리인 경우 처리
+    if isinstance(unit_data_raw, dict):
+        return unit_data_raw.get('text', ''), unit_data_raw.get('color', 'WHITE')
+    return (str(unit_data_raw) if unit_data_raw else ''), 'WHITE'
+
+
 def create_basic_excel(json_data, output_file):
     """
     JSON 데이터를 기본 형태 엑셀로 변환
 
     Args:
-        json_data: {"header": {...}, "data": [...]}
+        json_data: {"header": {...}, "data": [...]} 또는 압축 포맷 (dict / 바이너리)
         output_file: 출력 엑셀 파일 경로
     """
     print(f"📂 출력 파일: {output_file}")
     print()
 
     # JSON 파싱
-    if isinstance(json_data, str):
-        data = json.loads(json_data)
-    else:
-        data = json_data
+    data = load_result(json_data)
 
-    # 데이터 추출
-    if 'data' in data:
-        floor_data = data['data']
+    if is_compact(data):
+        # 압축 포맷: 층/호 번호 벡터와 색상/텍스트 행렬을 그대로 사용
+        unit_keys = [f"{unit}호" for unit in data['units']]
+        rows = [(f"{floor}층", [(text, color) for _, text, color in cells])
+                for floor, cells in iter_rows(data)]
     else:
-        floor_data = data
-
-    if not floor_data:
+        # 데이터 추출
+        if 'data' in data:
+            floor_data = data['data']
+        else:
+            floor_data = data
+
+        if not floor_data:
+            print("❌ 데이터가 비어있습니다.")
+            return False
+
+        # 호수 목록 추출 (첫 번째 층의 units에서)
+        first_floor = floor_data[0]
+        units = first_floor.get('units', {})
+        unit_keys = sorted(units.keys(), key=lambda x: int(''.join(filter(str.isdigit, x)) or '0'))
+        rows = [(floor.get('floor', ''), [unit_cell(floor.get('units', {}).get(key, '')) for key in unit_keys])
+                for floor in floor_data]
+
+    if not rows:
         print("❌ 데이터가 비어있습니다.")
         return False
 
@@ -55,13 +80,8 @@ def create_basic_excel(json_data, output_file):
     ws = wb.active
     ws.title = "현황분석"
 
-    # 호수 목록 추출 (첫 번째 층의 units에서)
-    first_floor = floor_data[0]
-    units = first_floor.get('units', {})
-    unit_keys = sorted(units.keys(), key=lambda x: int(''.join(filter(str.isdigit, x)) or '0'))
-
     print(f"📊 총 {len(unit_keys)}개 호수 감지")
-    print(f"📊 총 {len(floor_data)}개 층 감지")
+    print(f"📊 총 {len(rows)}개 층 감지")
     print()
 
     # 테두리 스타일
@@ -89,26 +109,14 @@ def create_basic_excel(json_data, output_file):
 
     # 데이터 행 작성
     print("🔄 데이터 변환 중...")
-    for row_idx, floor in enumerate(floor_data, start=2):
+    for row_idx, (floor_text, cells) in enumerate(rows, start=2):
         # 층 번호
-        floor_text = floor.get('floor', '')
         ws.cell(row_idx, 1, floor_text)
         ws.cell(row_idx, 1).border = thin_border
         ws.cell(row_idx, 1).alignment = Alignment(horizontal='center', vertical='center')
 
         # 각 호수 데이터
-        units = floor.get('units', {})
-        for col_idx, unit_key in enumerate(unit_keys, start=2):
-            unit_data_raw = units.get(unit_key, '')
-
-            # 데이터가 딕셔너리인 경우 처리
-            if isinstance(unit_data_raw, dict):
-                unit_text = unit_data_raw.get('text', '')
-                unit_color = unit_data_raw.get('color', 'WHITE')
-            else:
-                unit_text = str(unit_data_raw) if unit_data_raw else ''
-                unit_color = 'WHITE'
-
+        for col_idx, (unit_text, unit_color) in enumerate(cells, start=2):
             # 셀에 데이터 쓰기
             cell = ws.cell(row_idx, col_idx, unit_text)
             cell.border = thin_border
@@ -134,7 +142,7 @@ def create_basic_excel(json_data, output_file):
     print()
     print("=" * 50)
     print("✅ 변환 완료!")
-    print(f"📊 총 {len(floor_data)}개 층")
+    print(f"📊 총 {len(rows)}개 층")
     print(f"📊 총 {len(unit_keys)}개 호수")
     print(f"📂 저장 위치: {output_file}")
     print("=" * 50)
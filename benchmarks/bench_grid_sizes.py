@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+표 크기별 처리 시간 (25층 x 10호 ~ 150층 x 60호 합성 현황표, 폭이 좁은 150층 x 10호 타워 포함)
+
+층 번호 열 + 헤더 행 + 색상 셀로 된 표 이미지를 만들어 메모리 버퍼로 처리하고
+단계별 시간, 셀당 시간, 색상 정확도를 출력한다. 셀당 시간이 크기와 무관하게
+비슷하면 처리 비용이 셀 수에 선형이다.
+
+사용법:
+    python benchmarks/bench_grid_sizes.py [--sizes 25x10,60x30,100x40,150x10,150x60] [--repeat 3] [--engine v3|v2]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+COLORS = {  # BGR
+    'WHITE': (255, 255, 255),
+    'GREEN': (206, 239, 198),
+    'YELLOW': (153, 255, 255),
+    'PINK': (255, 204, 255),
+}
+
+
+def make_table(rows, cols, cell_w=70, cell_h=36, header_h=160, seed=0):
+    """합성 현황표 이미지와 정답 {(층, 호): 색상}"""
+    rng = np.random.default_rng(seed)
+    pad = 40
+    tw, th = (cols + 1) * cell_w, (rows + 1) * cell_h
+    img = np.full((header_h + th + pad * 2, tw + pad * 2, 3), 245, np.uint8)
+    cv2.rectangle(img, (0, 0), (img.shape[1], 60), (80, 60, 40), -1)   # 앱 상단 바
+    cv2.putText(img, "102", (pad, 130), cv2.FONT_HERSHEY_SIMPLEX, 1.2, (0, 0, 0), 2)
+
+    x0, y0 = pad, header_h
+    cv2.rectangle(img, (x0, y0), (x0 + tw, y0 + th), (255, 255, 255), -1)
+    names = list(COLORS)
+    truth = {}
+    for r in range(1, rows + 1):
+        floor = rows - r + 1
+        for c in range(1, cols + 1):
+            name = names[rng.integers(len(names))]
+            truth[(floor, c)] = name
+            cv2.rectangle(img, (x0 + c * cell_w, y0 + r * cell_h),
+                          (x0 + (c + 1) * cell_w, y0 + (r + 1) * cell_h), COLORS[name], -1)
+        cv2.putText(img, str(floor), (x0 + 8, y0 + r * cell_h + 26),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 2)
+    for c in range(1, cols + 1):
+        cv2.putText(img, str(c), (x0 + c * cell_w + 20, y0 + 26), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 2)
+    for r in range(rows + 2):
+        cv2.line(img, (x0, y0 + r * cell_h), (x0 + tw, y0 + r * cell_h), (60, 60, 60), 2)
+    for c in range(cols + 2):
+        cv2.line(img, (x0 + c * cell_w, y0), (x0 + c * cell_w, y0 + th), (60, 60, 60), 2)
+    return img, truth
+
+
+def run_v3(buffer):
+    import ocr_engine_v3
+    timings = {}
+    result = ocr_engine_v3.process_image(buffer, timings=timings)
+    return (result or {}).get("data", []), timings
+
+
+def run_v2(buffer):
+    import ocr_engine_v2
+    start = time.perf_counter()
+    data = ocr_engine_v2.process_image(buffer) or []
+    return data, {"total_ms": round((time.perf_counter() - start) * 1000, 1)}
+
+
+def accuracy(data, truth):
+    """(정답과 같은 색상 셀 수, 출력 셀 수)"""
+    correct = total = 0
+    for floor in data:
+        floor_num = int(floor["floor"].rstrip("층"))
+        for unit, cell in floor["units"].items():
+            total += 1
+            correct += truth.get((floor_num, int(unit.rstrip("호")))) == cell["color"]
+    return correct, total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="표 크기별 처리 시간")
+    parser.add_argument('--sizes', default='25x10,60x30,100x40,150x10,150x60', help="층x호 목록 (쉼표 구분)")
+    parser.add_argument('--repeat', type=int, default=3, help="크기별 반복 횟수 (최솟값 보고)")
+    parser.add_argument('--engine', choices=['v3', 'v2'], default='v3')
+    args = parser.parse_args()
+
+    run = run_v3 if args.engine == 'v3' else run_v2
+    print(f"{'크기':>8} {'셀':>6} {'이미지':>11} {'전체 ms':>9} {'그리드 ms':>9} {'셀 ms':>8} "
+          f"{'µs/셀':>7} {'정확도':>12}")
+
+    for size in args.sizes.split(','):
+        rows, cols = (int(v) for v in size.lower().split('x'))
+        img, truth = make_table(rows, cols)
+        buffer = np.frombuffer(cv2.imencode('.png', img)[1].tobytes(), np.uint8)
+
+        best = None
+        for _ in range(args.repeat):
+            stderr, sys.stderr = sys.stderr, open(os.devnull, 'w')   # 엔진 로그 숨김
+            try:
+                data, timings = run(buffer)
+            finally:
+                sys.stderr.close()
+                sys.stderr = stderr
+            if best is None or timings["total_ms"] < best[1]["total_ms"]:
+                best = (data, timings)
+
+        data, timings = best
+        correct, total = accuracy(data, truth)
+        cells = rows * cols
+        print(f"{size:>8} {cells:>6} {img.shape[1]:>5}x{img.shape[0]:<5} {timings['total_ms']:>9.1f} "
+              f"{timings.get('grid_ms', 0):>9.1f} {timings.get('cells_ms', 0):>8.1f} "
+              f"{timings['total_ms'] * 1000 / cells:>7.0f} {correct:>5}/{total:<6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OCR 백엔드 비교 (pytesseract 프로세스 호출 vs libtesseract 직접 호출)
+
+실제 표 이미지에서 셀을 잘라 두 백엔드로 같은 셀을 인식하고
+셀당 시간과 결과 일치율을 출력한다.
+
+사용법:
+    python benchmarks/bench_ocr_backends.py <이미지> [--cells 100] [--lang eng+kor]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ocr_engine_v3 import detect_table_grid, load_image  # noqa: E402
+
+
+def collect_cells(img, limit):
+    """그리드에서 셀 이미지 추출 (extract_text와 같은 여백)"""
+    data_h, data_v = detect_table_grid(img)
+    cells = []
+    for r in range(len(data_h) - 1):
+        for c in range(len(data_v) - 1):
+            y1, y2 = data_h[r], data_h[r + 1]
+            x1, x2 = data_v[c], data_v[c + 1]
+            pad = 3
+            cell = img[y1 + pad:y2 - pad, x1 + pad:x2 - pad]
+            if cell.size:
+                cells.append(cv2.cvtColor(cell, cv2.COLOR_BGR2RGB))
+            if len(cells) >= limit:
+                return cells
+    return cells
+
+
+def run_pytesseract(cells, lang):
+    import pytesseract
+    from PIL import Image
+    return [pytesseract.image_to_string(Image.fromarray(c), lang=lang,
+                                        config='--psm 7 --oem 3').strip() for c in cells]
+
+
+def run_capi(cells, lang):
+    import tesseract_capi
+    return [tesseract_capi.image_to_string(c, lang=lang, psm=7).strip() for c in cells]
+
+
+def timed(func, cells, lang):
+    start = time.perf_counter()
+    texts = func(cells, lang)
+    return texts, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OCR 백엔드 비교")
+    parser.add_argument('image')
+    parser.add_argument('--cells', type=int, default=100, help="인식할 셀 수")
+    parser.add_argument('--lang', default='eng+kor')
+    args = parser.parse_args()
+
+    cells = collect_cells(load_image(args.image), args.cells)
+    if not cells:
+        print("셀을 찾지 못했습니다", file=sys.stderr)
+        sys.exit(1)
+    print(f"셀 {len(cells)}개", file=sys.stderr)
+
+    results = {}
+    for name, func in (('pytesseract', run_pytesseract), ('capi', run_capi)):
+        try:
+            # 첫 호출(traineddata 로드)은 따로 측정
+            _, first = timed(func, cells[:1], args.lang)
+            texts, elapsed = timed(func, cells, args.lang)
+        except Exception as e:
+            print(f"{name:12s} 실행 불가: {e}", file=sys.stderr)
+            continue
+        results[name] = texts
+        print(f"{name:12s} 첫 호출 {first * 1000:7.1f}ms | "
+              f"셀당 {elapsed / len(cells) * 1000:6.1f}ms | 전체 {elapsed:.2f}s", file=sys.stderr)
+
+    if len(results) == 2:
+        same = sum(a == b for a, b in zip(results['pytesseract'], results['capi']))
+        print(f"결과 일치: {same}/{len(cells)}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
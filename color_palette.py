@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+이미지별 색상 팔레트 (셀 배경색을 한 번에 군집화해 분류)
+
+고정 RGB/HSV 기준(classify_color)은 파스텔 톤에 맞춰져 있어 색 프로필이 다른 스크린샷에서 어긋나므로,
+테이블의 모든 셀 평균색을 모아 기준색(GREEN/YELLOW/PINK/WHITE)에서 시작하는 k-means로 이 이미지의
+팔레트를 구한 뒤 가장 가까운 중심으로 한 번에 분류한다.
+    1. 셀 평균색: 글자 화소를 뺀 배경 평균 (적분 영상으로 전체 셀을 한 번에 계산)
+       가장 밝은 셀들의 색 편향(색온도)을 흰색 기준으로 보고 전체에서 뺌
+    2. 초기 소속: 채도(Lab 크로마)가 낮으면 WHITE, 아니면 색상각이 가장 가까운 기준색
+       (밝기/감마가 달라도 색상각은 유지되므로 기준색과의 거리보다 안정적)
+    3. 범례 고정: 테이블 아래 범례 견본이 있으면 그 색을 해당 중심으로 고정
+    4. k-means (Lab 색공간): 고정되지 않은 중심만 소속 셀 평균으로 이동
+       (끝난 뒤 채도를 잃거나 다른 기준색 쪽으로 넘어간 중심은 기준색으로 되돌림)
+    5. 최근접 중심으로 전체 셀 분류
+"""
+
+import sys
+
+import cv2
+import numpy as np
+
+# 기준색 (RGB, excel_converter.COLOR_THRESHOLDS와 같은 값)
+SEED_COLORS = {
+    "GREEN": (0xC6, 0xEF, 0xCE),
+    "PINK": (0xFF, 0xCC, 0xFF),
+    "YELLOW": (0xFF, 0xFF, 0x99),
+    "WHITE": (0xFF, 0xFF, 0xFF),
+}
+COLOR_NAMES = list(SEED_COLORS)
+
+CELL_MARGIN = 3             # 셀 테두리 여백 (sample_row와 같은 값)
+INK_MAX_GRAY = 150          # 이보다 어두운 화소는 글자로 보고 평균에서 제외
+MIN_CHROMA = 6.0            # 이보다 채도가 낮으면 초기 소속 WHITE (Lab 크로마)
+WHITE_POINT_L = 3.0         # 가장 밝은 셀에서 이 밝기(L) 이내인 셀로 흰색 기준 추정
+MAX_WHITE_CAST = 15.0       # 흰색 기준의 채도가 이보다 크면 흰 셀이 없는 것으로 보고 보정 안 함
+KMEANS_ITERATIONS = 10      # 최대 반복 수 (소속이 바뀌지 않으면 중단)
+LEGEND_SEARCH_ROWS = 8      # 테이블 아래 범례를 찾을 높이 (행 높이 배수)
+LEGEND_MIN_AREA = 0.3       # 범례 견본 최소 면적 (셀 면적 대비)
+LEGEND_MIN_FILL = 0.7       # 견본 외곽 사각형 대비 채워진 비율 (글자/기호 제외)
+LEGEND_MIN_CHROMA = 12.0    # 견본으로 볼 최소 채도 (Lab 크로마)
+LEGEND_MIN_PX = 8           # 범례 영역은 행 높이가 이 값의 2배 이상이면 1/2로 줄여서 찾음 (견본은 셀 크기)
+
+
+def to_lab(bgr):
+    """BGR 색 (..., 3) → Lab (..., 3) float32 (L 0~100, a/b -127~127)"""
+    bgr = np.asarray(bgr)
+    if bgr.dtype == np.uint8 and bgr.ndim == 3:
+        # 이미지 영역은 8비트 변환 후 스케일만 복원 (float 변환보다 훨씬 빠름)
+        lab = cv2.cvtColor(bgr, cv2.COLOR_BGR2Lab).astype(np.float32)
+        return (lab - (0, 128, 128)) * (100 / 255, 1, 1)
+    bgr = bgr.astype(np.float32)
+    lab = cv2.cvtColor(bgr.reshape(-1, 1, 3) / 255.0, cv2.COLOR_BGR2Lab)
+    return lab.reshape(bgr.shape)
+
+
+SEED_LAB = to_lab([(b, g, r) for r, g, b in SEED_COLORS.values()])
+WHITE = COLOR_NAMES.index("WHITE")
+
+
+def hue_class(lab, min_chroma=MIN_CHROMA):
+    """Lab (N, 3) → 기준색 번호 (N,): 채도가 낮으면 WHITE, 아니면 색상각이 가장 가까운 유채색 기준색"""
+    chroma = np.hypot(lab[:, 1], lab[:, 2])
+    hue = np.arctan2(lab[:, 2], lab[:, 1])
+    seed_hue = np.arctan2(SEED_LAB[:, 2], SEED_LAB[:, 1])
+    gap = np.abs((hue[:, None] - seed_hue[None, :] + np.pi) % (2 * np.pi) - np.pi)
+    gap[:, WHITE] = np.inf
+    return np.where(chroma < min_chroma, WHITE, np.argmin(gap, axis=1))
+
+
+def white_cast(lab):
+    """
+    셀 Lab (N, 3) → 흰색 기준의 (a, b) 편향 (가장 밝은 셀들의 중앙값)
+    - 파스텔 채움은 흰색보다 어두우므로 가장 밝은 셀은 흰 셀, 편향은 화면/촬영 색온도
+    - 편향 채도가 MAX_WHITE_CAST를 넘으면 흰 셀이 없는 표로 보고 (0, 0)
+    """
+    bright = lab[lab[:, 0] >= lab[:, 0].max() - WHITE_POINT_L]
+    cast = np.median(bright[:, 1:], axis=0)
+    return cast if np.hypot(*cast) < MAX_WHITE_CAST else np.zeros(2, np.float32)
+
+
+def cell_means(img, data_h, data_v):
+    """
+    그리드의 모든 셀 배경 평균색 → (행, 열, 3) BGR float
+    - 글자 화소(INK_MAX_GRAY 미만)를 뺀 평균, 셀이 모두 글자면 전체 평균
+    - 적분 영상 두 장(배경 합, 배경 화소 수)으로 셀마다 네 모서리만 읽음
+    """
+    # 테이블 영역만 잘라서 계산
+    h, w = img.shape[:2]
+    top, left = max(0, data_h[0]), max(0, data_v[0])
+    img = img[top:min(h, data_h[-1] + 1), left:min(w, data_v[-1] + 1)]
+    h, w = img.shape[:2]
+    ys = np.clip(np.asarray(data_h) - top, 0, h)
+    xs = np.clip(np.asarray(data_v) - left, 0, w)
+    y1, y2 = np.minimum(ys[:-1] + CELL_MARGIN, ys[1:]), np.maximum(ys[1:] - CELL_MARGIN, ys[:-1])
+    x1, x2 = np.minimum(xs[:-1] + CELL_MARGIN, xs[1:]), np.maximum(xs[1:] - CELL_MARGIN, xs[:-1])
+    y2, x2 = np.maximum(y2, y1), np.maximum(x2, x1)
+
+    background = (cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) >= INK_MAX_GRAY).astype(np.uint8)
+    # 800만 화소(255 x 화소 수 > 2^31)를 넘으면 int32 누적이 넘쳐 되돌아가지만(mod 2^32)
+    # 셀 하나의 합은 int32 안이므로 네 모서리 차를 int32 그대로 계산하면 정확함
+    sums_all = cv2.integral(img, sdepth=cv2.CV_32S)
+    sums_bg = cv2.integral(cv2.bitwise_and(img, img, mask=background), sdepth=cv2.CV_32S)
+    count_bg = cv2.integral(background, sdepth=cv2.CV_32S)
+
+    def box(table):
+        # 행 (R, 1) x 열 (1, C) 브로드캐스트로 모든 셀의 네 모서리만 읽어 영역 합 (int32 나머지 연산)
+        def corner(ys, xs):
+            return table[ys[:, None], xs[None, :]]
+        return (corner(y2, x2) - corner(y1, x2) - corner(y2, x1) + corner(y1, x1)).astype(np.float64)
+
+    area = ((y2 - y1)[:, None] * (x2 - x1)[None, :]).astype(np.float64)
+    n_bg = box(count_bg)
+    mean_bg = box(sums_bg) / np.maximum(n_bg, 1)[..., None]
+    mean_all = box(sums_all) / np.maximum(area, 1)[..., None]
+    means = np.where((n_bg > 0)[..., None], mean_bg, mean_all)
+    means[area == 0] = 255.0    # 크기가 없는 셀은 흰색
+    return means
+
+
+def legend_anchors(img, data_h, data_v, cast=(0.0, 0.0)):
+    """
+    테이블 아래 범례 견본 → {색 이름: Lab} (색마다 가장 큰 채색 사각형의 중앙값)
+    - 화소를 기준색별로 나눈 뒤 연결 요소를 찾음 (붙어 있는 견본끼리 섞이지 않도록)
+    - cast: 셀과 같은 흰색 편향 보정
+    """
+    h, w = img.shape[:2]
+    row_h = int(np.median(np.diff(data_h)))
+    col_w = int(np.median(np.diff(data_v)))
+    y1, y2 = min(h, data_h[-1] + CELL_MARGIN), min(h, data_h[-1] + LEGEND_SEARCH_ROWS * row_h)
+    x1, x2 = max(0, data_v[0] - col_w), min(w, data_v[-1] + col_w)
+    if y2 - y1 < 4 or x2 - x1 < 4:
+        return {}
+
+    region = img[y1:y2, x1:x2]
+    scale = 2 if row_h >= 2 * LEGEND_MIN_PX else 1
+    if scale > 1:
+        region = cv2.resize(region, None, fx=1 / scale, fy=1 / scale, interpolation=cv2.INTER_AREA)
+    lab = to_lab(region)
+    lab[..., 1:] -= cast
+    # 채도가 있는 화소만 색상각 계산
+    classes = np.full(lab.shape[:2], WHITE)
+    chromatic = np.hypot(lab[..., 1], lab[..., 2]) >= LEGEND_MIN_CHROMA
+    if not chromatic.any():
+        return {}
+    classes[chromatic] = hue_class(lab[chromatic])
+    min_area = LEGEND_MIN_AREA * row_h * col_w / scale ** 2
+    anchors = {}
+    for k, name in enumerate(COLOR_NAMES):
+        if k == WHITE:
+            continue
+        mask = (classes == k).astype(np.uint8)
+        count, components, stats, _ = cv2.connectedComponentsWithStats(mask)
+        best = None
+        for i in range(1, count):
+            bw, bh, area = stats[i, cv2.CC_STAT_WIDTH], stats[i, cv2.CC_STAT_HEIGHT], stats[i, cv2.CC_STAT_AREA]
+            if area >= min_area and area >= LEGEND_MIN_FILL * bw * bh:
+                if best is None or area > stats[best, cv2.CC_STAT_AREA]:
+                    best = i
+        if best is not None:
+            anchors[name] = np.median(lab[components == best], axis=0)
+    return anchors
+
+
+def fit_palette(lab, anchors=None):
+    """
+    셀 Lab 색 (N, 3) → 색 이름별 중심 (K, 3)
+    - anchors: {색 이름: Lab} 고정 중심 (범례 견본)
+    """
+    centers = SEED_LAB.copy()
+    fixed = np.zeros(len(COLOR_NAMES), bool)
+    for name, value in (anchors or {}).items():
+        k = COLOR_NAMES.index(name)
+        centers[k], fixed[k] = value, True
+
+    labels = hue_class(lab)
+    for _ in range(KMEANS_ITERATIONS):
+        counts = np.bincount(labels, minlength=len(centers))
+        sums = np.zeros_like(centers)
+        np.add.at(sums, labels, lab)
+        move = (counts > 0) & ~fixed
+        centers[move] = sums[move] / counts[move, None]
+        new_labels = nearest(lab, centers)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+
+    # 채도를 잃었거나 다른 기준색 쪽으로 넘어간 유채색 중심은 기준색으로 되돌림
+    drifted = hue_class(centers) != np.arange(len(centers))
+    drifted[WHITE] = False
+    centers[drifted & ~fixed] = SEED_LAB[drifted & ~fixed]
+    return centers
+
+
+def nearest(lab, centers):
+    """최근접 중심 번호 (N,)"""
+    return np.argmin(((lab[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2), axis=1)
+
+
+def classify_means(means, legend=None):
+    """
+    셀 평균색 (행, 열, 3) BGR → 행별 색 이름 목록 [[...], ...]
+    - legend: 흰색 편향 → 범례 고정 중심 {색 이름: Lab} 함수 (None이면 범례 고정 안 함)
+    """
+    rows, cols = means.shape[:2]
+    if rows == 0 or cols == 0:
+        return [[] for _ in range(rows)]
+    lab = to_lab(means).reshape(-1, 3)
+    cast = white_cast(lab)
+    lab[:, 1:] -= cast
+    anchors = legend(cast) if legend is not None else {}
+    centers = fit_palette(lab, anchors)
+    labels = nearest(lab, centers).reshape(rows, cols)
+
+    palette = {name: [round(float(v), 1) for v in centers[k]] for k, name in enumerate(COLOR_NAMES)}
+    print(f"색상 팔레트 (Lab): {palette}" + (f" 흰색 편향 보정: {[round(float(c), 1) for c in cast]}" if cast.any() else "")
+          + (f" 범례 고정: {sorted(anchors)}" if anchors else ""), file=sys.stderr)
+    names = np.array(COLOR_NAMES)
+    return names[labels].tolist()
+
+
+def classify_cells(img, data_h, data_v, use_legend=True):
+    """
+    그리드의 모든 셀 색상 분류 → 행별 색 이름 목록 [[...], ...]
+    - data_v: 데이터 열 경계 (층 열 제외)
+    """
+    if len(data_h) < 2 or len(data_v) < 2:
+        return [[] for _ in range(max(0, len(data_h) - 1))]
+    legend = (lambda cast: legend_anchors(img, data_h, data_v, cast)) if use_legend else None
+    return classify_means(cell_means(img, data_h, data_v), legend)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+압축 결과 포맷 (층/호 중첩 JSON 대신 행렬 + 인덱스 벡터)
+
+중첩 포맷:
+    {"header": {...}, "data": [{"floor": "25층", "units": {"1호": {"text": "M", "color": "GREEN"}}}]}
+
+압축 JSON:
+    {"format": "compact-v1", "header": {...},
+     "floors": [25, 24, ...], "units": [1, 2, ...],
+     "colors": [행 우선 색상 코드], "texts": [행 우선 텍스트 ID], "text_table": ["", "M", ...]}
+    (시간 예산 초과 결과는 "degraded"도 그대로 포함)
+
+바이너리 (pack / unpack):
+    b'OCRC' | 버전 u8 | 텍스트 ID 바이트 수 u8 | 행 수 u16 | 열 수 u16 | 메타 JSON 길이 u32
+    | floors u16[행] | units u16[열] | colors u8[행*열] | texts u8 또는 u16[행*열] | 메타 JSON (header, text_table, degraded)
+"""
+
+import json
+import struct
+import sys
+
+import numpy as np
+
+FORMAT_NAME = 'compact-v1'
+BLOB_MAGIC = b'OCRC'
+BLOB_VERSION = 1
+_BLOB_HEAD = struct.Struct('<4sBBHHI')
+
+# 색상 코드 (MISSING: 그리드 밖으로 건너뛴 셀)
+COLOR_CODES = ('WHITE', 'GREEN', 'YELLOW', 'PINK')
+COLOR_INDEX = {name: i for i, name in enumerate(COLOR_CODES)}
+MISSING = 255
+
+
+def is_compact(data):
+    """압축 포맷(dict) 여부"""
+    return isinstance(data, dict) and data.get('format') == FORMAT_NAME
+
+
+def _number(label):
+    """
+    '25층' → 25, '1호' → 1 (json_to_floor_unit.extract_floor_number처럼 숫자만 모음: 'B1층' → 1, '2S층' → 2)
+    숫자가 없거나('PH층') u16 범위를 넘으면 None
+    """
+    digits = ''.join(filter(str.isdigit, str(label)))
+    if not digits or int(digits) > 0xFFFF:
+        return None
+    return int(digits)
+
+
+def to_compact(result):
+    """
+    중첩 결과 → 압축 JSON dict
+    - 층/호 번호를 읽을 수 없는 층과 호는 행렬에 넣지 않고 건너뜀 (표준 에러에 기록)
+    """
+    floor_data = []
+    for floor in result.get('data', []):
+        if _number(floor['floor']) is None:
+            print(f"압축 포맷: 층 번호를 읽을 수 없어 건너뜀 ({floor['floor']!r})", file=sys.stderr)
+        else:
+            floor_data.append(floor)
+    unit_labels = []
+    for floor in floor_data:
+        for label in floor.get('units', {}):
+            if label in unit_labels:
+                continue
+            if _number(label) is None:
+                print(f"압축 포맷: 호 번호를 읽을 수 없어 건너뜀 ({label!r})", file=sys.stderr)
+            unit_labels.append(label)
+    unit_labels = sorted((label for label in unit_labels if _number(label) is not None), key=_number)
+
+    text_table = ['']
+    text_ids = {'': 0}
+    colors = np.full((len(floor_data), len(unit_labels)), MISSING, np.uint8)
+    texts = np.zeros((len(floor_data), len(unit_labels)), np.uint16)
+
+    for r, floor in enumerate(floor_data):
+        units = floor.get('units', {})
+        for c, label in enumerate(unit_labels):
+            unit = units.get(label)
+            if unit is None:
+                continue
+            colors[r, c] = COLOR_INDEX.get(unit.get('color', 'WHITE'), 0)
+            text = unit.get('text', '')
+            if text not in text_ids:
+                text_ids[text] = len(text_table)
+                text_table.append(text)
+            texts[r, c] = text_ids[text]
+
+    compact = {
+        "format": FORMAT_NAME,
+        "header": result.get('header', {}),
+        "floors": [_number(f['floor']) for f in floor_data],
+        "units": [_number(label) for label in unit_labels],
+        "colors": colors.ravel().tolist(),
+        "texts": texts.ravel().tolist(),
+        "text_table": text_table,
+    }
+    if 'degraded' in result:
+        compact['degraded'] = result['degraded']
+    return compact
+
+
+def matrices(compact):
+    """압축 dict → (colors u8[행, 열], texts 정수[행, 열])"""
+    shape = (len(compact['floors']), len(compact['units']))
+    colors = np.asarray(compact['colors'], np.uint8).reshape(shape)
+    texts = np.asarray(compact['texts']).reshape(shape)
+    return colors, texts
+
+
+def iter_rows(compact):
+    """층별 (층 번호, [(호 번호, text, color), ...]) 순회 (MISSING 셀은 ('', None))"""
+    colors, texts = matrices(compact)
+    table = compact['text_table']
+    units = compact['units']
+    names = COLOR_CODES + (None,) * (256 - len(COLOR_CODES))
+    for r, floor in enumerate(compact['floors']):
+        yield floor, [(units[c], table[texts[r, c]], names[colors[r, c]]) for c in range(len(units))]
+
+
+def from_compact(compact):
+    """압축 dict → 중첩 결과 (기존 클라이언트 호환)"""
+    data = []
+    for floor, row in iter_rows(compact):
+        data.append({
+            "floor": f"{floor}층",
+            "units": {f"{unit}호": {"text": text, "color": color}
+                      for unit, text, color in row if color is not None}
+        })
+    result = {"header": compact.get('header', {}), "data": data}
+    if 'degraded' in compact:
+        result['degraded'] = compact['degraded']
+    return result
+
+
+def pack(compact):
+    """압축 dict → 바이너리"""
+    colors, texts = matrices(compact)
+    rows, cols = colors.shape
+    text_dtype = np.uint8 if len(compact['text_table']) <= 256 else np.uint16
+    meta = {"header": compact.get('header', {}), "text_table": compact['text_table']}
+    if 'degraded' in compact:
+        meta['degraded'] = compact['degraded']
+    meta = json.dumps(meta, ensure_ascii=False).encode('utf-8')
+    return b''.join([
+        _BLOB_HEAD.pack(BLOB_MAGIC, BLOB_VERSION, np.dtype(text_dtype).itemsize, rows, cols, len(meta)),
+        np.asarray(compact['floors'], '<u2').tobytes(),
+        np.asarray(compact['units'], '<u2').tobytes(),
+        colors.tobytes(),
+        texts.astype(np.dtype(text_dtype).newbyteorder('<')).tobytes(),
+        meta,
+    ])
+
+
+def unpack(blob):
+    """바이너리 → 압축 dict"""
+    magic, version, text_size, rows, cols, meta_len = _BLOB_HEAD.unpack_from(blob, 0)
+    if magic != BLOB_MAGIC or version != BLOB_VERSION:
+        raise ValueError("압축 결과 바이너리 형식이 아닙니다")
+
+    offset = _BLOB_HEAD.size
+    def take(dtype, count):
+        nonlocal offset
+        arr = np.frombuffer(blob, dtype, count, offset)
+        offset += arr.nbytes
+        return arr
+
+    floors = take('<u2', rows)
+    units = take('<u2', cols)
+    colors = take(np.uint8, rows * cols)
+    texts = take('<u1' if text_size == 1 else '<u2', rows * cols)
+    meta = json.loads(bytes(blob[offset:offset + meta_len]).decode('utf-8'))
+    compact = {
+        "format": FORMAT_NAME,
+        "header": meta['header'],
+        "floors": floors.tolist(),
+        "units": units.tolist(),
+        "colors": colors,
+        "texts": texts,
+        "text_table": meta['text_table'],
+    }
+    if 'degraded' in meta:
+        compact['degraded'] = meta['degraded']
+    return compact
+
+
+def load_result(json_data):
+    """JSON 문자열 / dict / 바이너리 → dict (압축 포맷은 그대로, 바이너리는 unpack)"""
+    if isinstance(json_data, (bytes, bytearray, memoryview)):
+        return unpack(json_data)
+    if isinstance(json_data, str):
+        return json.loads(json_data)
+    return json_data
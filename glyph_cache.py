@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+셀 인식 결과 캐시 (정규화된 셀 픽셀 해시 → extract_cell 결과 [text, confidence, tier])
+
+같은 앱에서 캡처한 표는 "M", "V", "◎", 빈 셀이 픽셀 단위로 똑같이 반복된다.
+셀을 이진화 + 크기 정규화한 뒤 해시를 키로 결과를 재사용한다.
+    - LRU 방식으로 최대 개수 제한
+    - 선택적으로 JSON 파일에 저장 (실행 간 재사용)
+    - 적중률은 stderr로 보고
+GlyphMatcher는 같은 정규화 비트맵으로 크기가 다른 셀까지 템플릿 매칭한다 (인식 단계 2).
+"""
+
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+CACHE_FORMAT = 2        # 키 계산 방식이나 값 형식이 바뀌면 올려서 기존 파일 무효화
+NORM_SIZE = 32          # 정규화 크기 (NORM_SIZE x NORM_SIZE)
+SIZE_BUCKET = 4         # 셀 크기 양자화 단위 (기호 판정이 면적에 의존하므로 키에 포함)
+MIN_CONTRAST = 40       # 최대-최소 밝기 차이가 이보다 작으면 빈 셀로 간주
+
+
+def normalize_glyph(gray):
+    """회색조 셀 → NORM_SIZE x NORM_SIZE 0/1 배열 (Otsu 이진화, 대비가 낮으면 전부 0)"""
+    lo, hi = cv2.minMaxLoc(gray)[:2]
+    if hi - lo < MIN_CONTRAST:
+        # 배경 노이즈만 있는 셀은 이진화 결과가 흔들리므로 빈 셀로 통일
+        return np.zeros((NORM_SIZE, NORM_SIZE), np.uint8)
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    norm = cv2.resize(binary, (NORM_SIZE, NORM_SIZE), interpolation=cv2.INTER_AREA)
+    return (norm >= 128).astype(np.uint8)
+
+
+def glyph_key(cell, gray=None):
+    """셀 이미지(BGR)의 정규화 해시 키 (gray: 미리 변환된 회색조 셀)"""
+    if gray is None:
+        gray = cv2.cvtColor(cell, cv2.COLOR_BGR2GRAY) if cell.ndim == 3 else cell
+    h, w = gray.shape[:2]
+
+    digest = hashlib.blake2b(np.packbits(normalize_glyph(gray)).tobytes(), digest_size=12)
+    digest.update(bytes([min(h // SIZE_BUCKET, 255), min(w // SIZE_BUCKET, 255)]))
+    return digest.hexdigest()
+
+
+class GlyphMatcher:
+    """
+    정규화 셀 비트맵 템플릿 매칭 (해밍 거리)
+    - 템플릿은 OCR 결과가 확실한 셀에서 스스로 학습 (learn)
+    - 캐시와 달리 크기가 달라도(다른 해상도) 같은 모양이면 매칭
+    """
+
+    MAX_DISTANCE = 48       # 허용 최대 해밍 거리 (NORM_SIZE² = 1024비트 중)
+    MIN_MARGIN = 24         # 다른 텍스트의 최근접 템플릿과의 최소 거리 차이
+    PER_LABEL = 8           # 텍스트별 최대 템플릿 수
+
+    def __init__(self):
+        self.templates = np.zeros((0, NORM_SIZE * NORM_SIZE // 8), np.uint8)
+        self.labels = []
+        self.lock = threading.Lock()
+
+    def match(self, norm):
+        """(text, distance) 또는 None (거리/차이 기준을 못 넘으면)"""
+        packed = np.packbits(norm)
+        with self.lock:
+            if not self.labels:
+                return None
+            distances = np.unpackbits(self.templates ^ packed, axis=1).sum(axis=1)
+            labels = list(self.labels)
+
+        order = np.argsort(distances)
+        best = int(order[0])
+        d1 = int(distances[best])
+        if d1 > self.MAX_DISTANCE:
+            return None
+        others = [int(distances[i]) for i in order[1:] if labels[i] != labels[best]]
+        if others and others[0] - d1 < self.MIN_MARGIN:
+            return None
+        return labels[best], d1
+
+    def learn(self, norm, text):
+        """템플릿 추가 (같은 텍스트의 거의 같은 템플릿이 있거나 가득 차면 무시)"""
+        packed = np.packbits(norm)
+        with self.lock:
+            same = [i for i, label in enumerate(self.labels) if label == text]
+            if len(same) >= self.PER_LABEL:
+                return
+            if same:
+                distances = np.unpackbits(self.templates[same] ^ packed, axis=1).sum(axis=1)
+                if distances.min() <= 4:
+                    return
+            self.templates = np.vstack([self.templates, packed[None, :]])
+            self.labels.append(text)
+
+
+class GlyphCache:
+    """스레드 안전 LRU 캐시 (version이 다른 저장 파일은 무시)"""
+
+    def __init__(self, max_entries=4096, path=None, version=""):
+        self.max_entries = max_entries
+        self.path = path
+        self.version = f"{CACHE_FORMAT}:{version}"
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        if path:
+            self.load()
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def load(self):
+        """저장 파일 읽기 (없거나 버전이 다르면 빈 캐시)"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        if saved.get('version') != self.version:
+            print(f"셀 캐시 버전 불일치, 무시: {self.path}", file=sys.stderr)
+            return
+        for key, value in saved.get('entries', [])[-self.max_entries:]:
+            self.entries[key] = value
+        print(f"셀 캐시 로드: {len(self.entries)}개", file=sys.stderr)
+
+    def save(self):
+        """저장 파일 쓰기 (임시 파일 → 교체, 동시 실행 시 마지막 쓰기 우선)"""
+        if not self.path:
+            return
+        with self.lock:
+            data = {"version": self.version, "entries": list(self.entries.items())}
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"셀 캐시 저장 실패: {e}", file=sys.stderr)
+
+    def report(self):
+        """적중률 출력"""
+        total = self.hits + self.misses
+        rate = self.hits / total * 100 if total else 0.0
+        print(f"셀 캐시: 적중 {self.hits}/{total} ({rate:.1f}%), 항목 {len(self.entries)}개",
+              file=sys.stderr)
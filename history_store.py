@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OCR 결과 이력 저장소 (SQLite)
+
+실행마다 헤더(동, 이름), 셀별 색상/텍스트, 단계별 소요 시간을 저장해
+OCR을 다시 돌리지 않고 동/층/호/기간 단위로 조회한다.
+
+사용법:
+    python history_store.py <DB> runs [--building 102동] [--since 2026-10-01]
+    python history_store.py <DB> cells [--building 102동] [--floor 25] [--unit 3] [--color PINK] [--since ...]
+    python history_store.py <DB> changes --color PINK [--building 102동] [--since 2026-10-01]
+    python history_store.py <DB> latest [--color PINK] [--building ...]   (동별 최근 실행 기준)
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import time
+from datetime import datetime
+
+from compact_result import COLOR_CODES, MISSING, matrices, to_compact
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id          INTEGER PRIMARY KEY,
+    created_at  TEXT NOT NULL,
+    building    TEXT NOT NULL,
+    name        TEXT NOT NULL,
+    source      TEXT,
+    floors      INTEGER NOT NULL,
+    units       INTEGER NOT NULL,
+    total_ms    REAL,
+    timings     TEXT
+);
+CREATE TABLE IF NOT EXISTS cells (
+    run_id      INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    created_at  TEXT NOT NULL,
+    building    TEXT NOT NULL,
+    floor       INTEGER NOT NULL,
+    unit        INTEGER NOT NULL,
+    color       TEXT NOT NULL,
+    text        TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_building_date ON runs(building, created_at);
+CREATE INDEX IF NOT EXISTS idx_cells_location ON cells(building, floor, unit, created_at);
+CREATE INDEX IF NOT EXISTS idx_cells_date ON cells(created_at);
+CREATE INDEX IF NOT EXISTS idx_cells_run ON cells(run_id);
+"""
+
+
+def connect(path):
+    """DB 연결 (없으면 스키마 생성)"""
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")      # 서버의 동시 OCR 프로세스가 함께 기록
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def save_run(conn, result, source=None, timings=None):
+    """
+    결과 1건 저장 (runs 1행 + cells 행들을 한 트랜잭션에서 executemany)
+    반환: run_id
+    """
+    compact = to_compact(result)
+    header = compact['header'] or {}
+    building = header.get('building', '')
+    created_at = datetime.now().isoformat(sep=' ', timespec='seconds')
+    colors, texts = matrices(compact)
+    table = compact['text_table']
+
+    rows = [
+        (created_at, building, floor, unit, COLOR_CODES[colors[r, c]], table[texts[r, c]])
+        for r, floor in enumerate(compact['floors'])
+        for c, unit in enumerate(compact['units'])
+        if colors[r, c] != MISSING
+    ]
+
+    timings = timings or {}
+    with conn:
+        cur = conn.execute(
+            "INSERT INTO runs (created_at, building, name, source, floors, units, total_ms, timings) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (created_at, building, header.get('name', ''), source,
+             len(compact['floors']), len(compact['units']),
+             timings.get('total_ms'), json.dumps(timings)))
+        run_id = cur.lastrowid
+        conn.executemany(
+            "INSERT INTO cells (run_id, created_at, building, floor, unit, color, text) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(run_id,) + row for row in rows])
+    return run_id
+
+
+def _filters(args, prefix=''):
+    """공통 조건절 (building / floor / unit / color / 기간)"""
+    clauses, params = [], []
+    for column in ('building', 'floor', 'unit', 'color'):
+        value = getattr(args, column, None)
+        if value is not None:
+            clauses.append(f"{prefix}{column} = ?")
+            params.append(value)
+    if getattr(args, 'since', None):
+        clauses.append(f"{prefix}created_at >= ?")
+        params.append(args.since)
+    if getattr(args, 'until', None):
+        clauses.append(f"{prefix}created_at < ?")
+        params.append(args.until)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+
+def query_runs(conn, args):
+    where, params = _filters(args)
+    return conn.execute(
+        "SELECT id, created_at, building, name, floors, units, total_ms FROM runs"
+        f"{where} ORDER BY created_at DESC, id DESC", params)
+
+
+def query_cells(conn, args):
+    where, params = _filters(args)
+    return conn.execute(
+        "SELECT created_at, building, floor, unit, color, text FROM cells"
+        f"{where} ORDER BY building, floor DESC, unit, created_at", params)
+
+
+def query_changes(conn, args):
+    """이전 실행 대비 색상이 args.color로 바뀐 셀 (같은 동/층/호 기준)"""
+    target = args.color
+    args.color = None   # 색상 조건은 변경 후 값에만 적용
+    where, params = _filters(args, 'c.')
+    return conn.execute(
+        "SELECT created_at, building, floor, unit, prev_color, color, text FROM ("
+        "  SELECT c.created_at, c.building, c.floor, c.unit, c.color, c.text,"
+        "         LAG(c.color) OVER (PARTITION BY c.building, c.floor, c.unit"
+        "                            ORDER BY c.created_at, c.run_id) AS prev_color"
+        f"  FROM cells c{where}"
+        ") WHERE color = ? AND prev_color IS NOT NULL AND prev_color != color"
+        " ORDER BY created_at, building, floor DESC, unit", params + [target])
+
+
+def query_latest(conn, args):
+    """동별 가장 최근 실행의 셀 상태 (한 실행이 동 전체를 담으므로 최근 run_id만 조회)"""
+    run_where, run_params = _filters(argparse.Namespace(building=args.building, since=args.since,
+                                                        until=args.until))
+    cell_args = argparse.Namespace(floor=args.floor, unit=args.unit, color=args.color)
+    cell_where, cell_params = _filters(cell_args, 'c.')
+    cell_where = cell_where.replace(" WHERE ", " AND ", 1)
+    return conn.execute(
+        "SELECT c.created_at, c.building, c.floor, c.unit, c.color, c.text FROM cells c"
+        f" JOIN (SELECT MAX(id) AS id FROM runs{run_where} GROUP BY building) latest"
+        f" ON c.run_id = latest.id{cell_where}"
+        " ORDER BY c.building, c.floor DESC, c.unit", run_params + cell_params)
+
+
+QUERIES = {
+    'runs': query_runs,
+    'cells': query_cells,
+    'changes': query_changes,
+    'latest': query_latest,
+}
+
+
+def main():
+    """조회 CLI"""
+    parser = argparse.ArgumentParser(description="OCR 결과 이력 조회")
+    parser.add_argument('db', help="SQLite DB 경로")
+    parser.add_argument('query', choices=sorted(QUERIES))
+    parser.add_argument('--building', help="동 (예: 102동)")
+    parser.add_argument('--floor', type=int)
+    parser.add_argument('--unit', type=int)
+    parser.add_argument('--color', choices=COLOR_CODES)
+    parser.add_argument('--since', help="시작 일시 (예: 2026-10-01)")
+    parser.add_argument('--until', help="종료 일시 (미포함)")
+    parser.add_argument('--json', action='store_true', help="JSON 줄 단위 출력")
+    args = parser.parse_args()
+
+    if args.query == 'changes' and not args.color:
+        parser.error("changes는 --color가 필요합니다")
+
+    start = time.perf_counter()
+    conn = connect(args.db)
+    cursor = QUERIES[args.query](conn, args)
+    columns = [d[0] for d in cursor.description]
+    count = 0
+
+    if not args.json:
+        print("\t".join(columns))
+    for row in cursor:
+        count += 1
+        if args.json:
+            print(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+        else:
+            print("\t".join("" if v is None else str(v) for v in row))
+
+    print(f"{count}행 ({(time.perf_counter() - start) * 1000:.1f}ms)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
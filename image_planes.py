@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+이미지 전처리 평면 캐시 (테이블 영역에 대해 한 번만 변환)
+
+셀마다 gray / RGB 변환과 adaptiveThreshold를 반복하지 않도록
+테이블 영역 전체의 평면을 처음 요청될 때 한 번 만들고, 셀은 numpy 슬라이스(복사 없음)로 가져간다.
+"""
+
+import threading
+
+import cv2
+
+BINARY_THRESHOLD = 200      # find_grid_lines와 같은 고정 이진화 기준
+ADAPTIVE_BLOCK = 11         # detect_symbols와 같은 적응형 이진화 파라미터
+ADAPTIVE_C = 2
+
+
+class ImagePlanes:
+    """영역(x1, y1, x2, y2)의 bgr / gray / rgb / binary / adaptive / hsv 평면 (지연 계산)"""
+
+    def __init__(self, img, region=None):
+        h, w = img.shape[:2]
+        x1, y1, x2, y2 = region if region is not None else (0, 0, w, h)
+        self.x1, self.y1 = max(0, x1), max(0, y1)
+        self.x2, self.y2 = min(w, x2), min(h, y2)
+        self.bgr = img[self.y1:self.y2, self.x1:self.x2]
+        self._planes = {}
+        self._lock = threading.RLock()  # 행 작업 스레드가 같은 평면을 동시에 요청해도 한 번만 계산
+
+    def plane(self, name):
+        """평면 이름으로 전체 영역 배열 반환 (최초 요청 시 계산)"""
+        arr = self._planes.get(name)
+        if arr is None:
+            with self._lock:
+                arr = self._planes.get(name)
+                if arr is None:
+                    arr = self._planes[name] = self._compute(name)
+        return arr
+
+    def _compute(self, name):
+        if name == 'bgr':
+            return self.bgr
+        if name == 'gray':
+            return cv2.cvtColor(self.bgr, cv2.COLOR_BGR2GRAY)
+        if name == 'rgb':
+            return cv2.cvtColor(self.bgr, cv2.COLOR_BGR2RGB)
+        if name == 'binary':
+            return cv2.threshold(self.plane('gray'), BINARY_THRESHOLD, 255, cv2.THRESH_BINARY_INV)[1]
+        if name == 'adaptive':
+            return cv2.adaptiveThreshold(self.plane('gray'), 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                         cv2.THRESH_BINARY_INV, ADAPTIVE_BLOCK, ADAPTIVE_C)
+        if name == 'hsv':
+            return cv2.cvtColor(self.bgr, cv2.COLOR_BGR2HSV)
+        raise KeyError(name)
+
+    def contains(self, x1, y1, x2, y2):
+        return self.x1 <= x1 and self.y1 <= y1 and x2 <= self.x2 and y2 <= self.y2
+
+    def cell(self, x1, y1, x2, y2):
+        """이미지 좌표의 셀 영역 → CellPlanes (영역 밖이면 None)"""
+        if not self.contains(x1, y1, x2, y2):
+            return None
+        return CellPlanes(self, x1 - self.x1, y1 - self.y1, x2 - self.x1, y2 - self.y1)
+
+
+class CellPlanes:
+    """ImagePlanes의 한 셀 뷰 (각 평면의 슬라이스)"""
+
+    def __init__(self, planes, x1, y1, x2, y2):
+        self.planes = planes
+        self.box = (x1, y1, x2, y2)
+
+    def __getattr__(self, name):
+        if name.startswith('_') or name in ('planes', 'box'):
+            raise AttributeError(name)
+        x1, y1, x2, y2 = self.box
+        return self.planes.plane(name)[y1:y2, x1:x2]
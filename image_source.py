@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+이미지 입력 소스 처리 (디스크 경유 없이 메모리에서 바로 디코딩)
+
+지원하는 소스:
+    - 파일 경로 (한글 경로 지원)
+    - '-'                  : 표준 입력 (server.js가 업로드 버퍼를 그대로 전달)
+    - 'shm:<이름>[:<크기>]' : 공유 메모리 세그먼트
+    - bytes / bytearray / memoryview / numpy uint8 배열
+"""
+
+import os
+import sys
+
+import numpy as np
+
+STDIN_SOURCE = '-'
+SHM_PREFIX = 'shm:'
+
+# 연결된 공유 메모리 (numpy 뷰가 참조하므로 프로세스 종료 시까지 유지, 삭제는 생성한 쪽 책임)
+_ATTACHED_SEGMENTS = {}
+
+
+def describe_source(source):
+    """로그 출력용 소스 설명"""
+    if isinstance(source, (bytes, bytearray, memoryview, np.ndarray)):
+        return f"<메모리 버퍼 {memoryview(source).nbytes} bytes>"
+    if source == STDIN_SOURCE:
+        return "<표준 입력>"
+    return str(source)
+
+
+def source_directory(source):
+    """파일 경로 소스의 디렉터리 (메모리/스트림 소스는 None)"""
+    if not isinstance(source, str) or source == STDIN_SOURCE or source.startswith(SHM_PREFIX):
+        return None
+    return os.path.dirname(source)
+
+
+def _attach_shared_memory(name):
+    """기존 공유 메모리 연결 (연결만 하므로 종료 시 삭제되지 않도록 추적 해제)"""
+    from multiprocessing import shared_memory
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python 3.12 이하: resource_tracker가 세그먼트를 삭제하지 않도록 등록 해제
+        from multiprocessing import resource_tracker
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except Exception:
+            pass
+        return shm
+
+
+def read_image_buffer(source):
+    """
+    이미지 바이트를 uint8 1차원 배열로 반환 (가능한 경우 복사 없음)
+    - 메모리 버퍼 / 공유 메모리는 np.frombuffer로 그대로 참조
+    - 표준 입력은 한 번만 읽을 수 있으므로 재디코딩이 필요하면 반환값을 보관할 것
+    """
+    if isinstance(source, np.ndarray):
+        return source.reshape(-1).view(np.uint8)
+
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return np.frombuffer(source, np.uint8)
+
+    if source == STDIN_SOURCE:
+        return np.frombuffer(sys.stdin.buffer.read(), np.uint8)
+
+    if source.startswith(SHM_PREFIX):
+        parts = source[len(SHM_PREFIX):].split(':')
+        shm = _ATTACHED_SEGMENTS.get(parts[0])
+        if shm is None:
+            shm = _ATTACHED_SEGMENTS[parts[0]] = _attach_shared_memory(parts[0])
+        buf = np.frombuffer(shm.buf, np.uint8)
+        if len(parts) > 1 and parts[1]:
+            # 세그먼트는 페이지 단위로 잡히므로 실제 크기만 사용
+            buf = buf[:int(parts[1])]
+        return buf
+
+    return np.fromfile(source, np.uint8)
+
+
+def read_image_size(buf):
+    """
+    디코딩 없이 헤더에서 이미지 크기 (width, height) 읽기
+    - PNG (IHDR), JPEG (SOFn 마커), PPM/PGM (P6/P5, 주석 없는 헤더) 지원, 그 외 형식은 None
+    """
+    head = bytes(buf[:32])
+
+    # PPM/PGM: 'P6 <너비> <높이> <최댓값>' (공백 구분)
+    if head[:2] in (b'P5', b'P6'):
+        fields = head[2:].split(None, 3)
+        if len(fields) >= 3 and fields[0].isdigit() and fields[1].isdigit():
+            return int(fields[0]), int(fields[1])
+        return None
+
+    # PNG: 시그니처 8바이트 + IHDR 청크 (너비/높이 각 4바이트)
+    if head[:8] == b'\x89PNG\r\n\x1a\n' and len(head) >= 24:
+        return int.from_bytes(head[16:20], 'big'), int.from_bytes(head[20:24], 'big')
+
+    # JPEG: SOF 마커까지 세그먼트 단위로 건너뛰기
+    if head[:2] == b'\xff\xd8':
+        n = len(buf)
+        i = 2
+        while i + 9 < n:
+            if buf[i] != 0xFF:
+                i += 1
+                continue
+            marker = int(buf[i + 1])
+            if marker == 0xFF:  # 채움 바이트
+                i += 1
+                continue
+            if marker in (0x01, 0xD8) or 0xD0 <= marker <= 0xD7:  # 길이 없는 마커
+                i += 2
+                continue
+            if marker == 0xD9 or marker == 0xDA:  # EOI / 스캔 시작 전에 SOF가 있어야 함
+                break
+            seg = bytes(buf[i + 2:i + 9])
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                return int.from_bytes(seg[5:7], 'big'), int.from_bytes(seg[3:5], 'big')
+            i += 2 + int.from_bytes(seg[0:2], 'big')
+
+    return None
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+증분 처리 (같은 동의 새 스크린샷을 이전 결과와 비교해 바뀐 셀만 다시 인식)
+
+상태 파일에 셀별 서명(dHash + 평균 색상)과 이전 결과를 저장한다.
+새 이미지의 셀을 이전 상태와 층/호 라벨로 맞춰 비교해 (다시 촬영해 행/열이 늘거나 줄어도 같은 셀끼리)
+서명이 같은 셀은 이전 결과를 그대로 쓰고, 바뀐 셀과 새로 생긴 셀만 extract_text를 다시 한다.
+"""
+
+import json
+import os
+import sys
+
+import cv2
+import numpy as np
+
+STATE_VERSION = 1
+MIN_CONTRAST = 40       # 이보다 밝기 차이가 작은 셀은 무늬 없는 셀로 보고 해시 0
+HASH_TOLERANCE = 4      # dHash 해밍 거리 허용치 (64비트 중)
+COLOR_TOLERANCE = 8     # 평균 색상 채널별 허용 차이
+MIN_ALIGNED = 0.5       # 현재 셀 중 이전 상태에 같은 층/호가 있는 비율 최소값 (미만이면 정렬 실패로 보고 전체 처리)
+
+
+def cell_signature(region, gray=None):
+    """셀 영역(BGR)의 서명: [dHash 16진수, [B, G, R] 평균] (gray: 미리 변환된 회색조 셀)"""
+    if region.size == 0:
+        return ["0" * 16, [255, 255, 255]]
+    if gray is None:
+        gray = cv2.cvtColor(region, cv2.COLOR_BGR2GRAY)
+    mean = [int(round(c)) for c in cv2.mean(region)[:3]]
+
+    lo, hi = cv2.minMaxLoc(gray)[:2]
+    if hi - lo < MIN_CONTRAST:
+        return ["0" * 16, mean]
+
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return [np.packbits(bits).tobytes().hex(), mean]
+
+
+def signature_changed(prev, cur):
+    """두 셀 서명이 다른지 (모양 또는 색상)"""
+    if prev is None:
+        return True
+    distance = bin(int(prev[0], 16) ^ int(cur[0], 16)).count('1')
+    if distance > HASH_TOLERANCE:
+        return True
+    return any(abs(a - b) > COLOR_TOLERANCE for a, b in zip(prev[1], cur[1]))
+
+
+def load_state(path):
+    """이전 상태 파일 읽기 (없거나 버전이 다르면 None)"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"이전 상태 읽기 실패, 전체 처리: {e}", file=sys.stderr)
+        return None
+    if state.get('version') != STATE_VERSION:
+        print("이전 상태 버전 불일치, 전체 처리", file=sys.stderr)
+        return None
+    return state
+
+
+def save_state(path, state):
+    """상태 파일 쓰기 (임시 파일 → 교체)"""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({"version": STATE_VERSION, **state}, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def previous_cells(state, floors, cols):
+    """
+    이전 상태를 현재 그리드에 층/호 라벨로 정렬 → {(층 라벨, 호 라벨): (서명, 이전 셀 결과)}
+    - floors: 현재 그리드의 층 라벨 ["25층", ...] (위→아래), cols: 현재 호 수
+    - 대응되는 셀이 MIN_ALIGNED 미만이면 (다른 동 / 층 판별 실패) None → 전체 처리
+    """
+    if state is None:
+        return None
+    cells = {}
+    for floor, signatures in zip(state['result']['data'], state['cells']):
+        for (unit_label, unit), signature in zip(floor['units'].items(), signatures):
+            cells[(floor['floor'], unit_label)] = (signature, unit)
+
+    total = len(floors) * cols
+    aligned = sum((floor, f"{col + 1}호") in cells for floor in floors for col in range(cols))
+    grid = f"이전 그리드 {state.get('rows')}x{state.get('cols')} → 현재 {len(floors)}x{cols}"
+    if total == 0 or aligned < MIN_ALIGNED * total:
+        print(f"{grid}, 층/호 라벨 대응 {aligned}/{total}셀 → 정렬 실패, 전체 처리", file=sys.stderr)
+        return None
+    if state.get('rows') != len(floors) or state.get('cols') != cols:
+        print(f"{grid}, 층/호 라벨로 정렬 ({aligned}/{total}셀 대응)", file=sys.stderr)
+    return cells
+
+
+DIFF_FIELDS = ("text", "color")   # 신뢰도/인식 단계만 바뀐 셀은 변경으로 보지 않음
+
+
+def diff_results(prev_data, new_data):
+    """층/호 기준으로 바뀐 셀 목록: [{floor, unit, before, after}, ...]"""
+    prev_units = {(f["floor"], u): v for f in prev_data for u, v in f["units"].items()}
+    new_units = {(f["floor"], u): v for f in new_data for u, v in f["units"].items()}
+
+    def fields(unit):
+        return None if unit is None else tuple(unit.get(k) for k in DIFF_FIELDS)
+
+    diff = []
+    for key in list(new_units) + [k for k in prev_units if k not in new_units]:
+        before, after = prev_units.get(key), new_units.get(key)
+        if fields(before) != fields(after):
+            diff.append({"floor": key[0], "unit": key[1], "before": before, "after": after})
+    return diff
@@ -5,6 +5,7 @@ JSON 데이터를 층호수 형태 엑셀로 변환
 
 사용법:
     python json_to_floor_unit.py '{"header": {...}, "data": [...]}' "output.xlsx"
+    (압축 포맷 {"format": "compact-v1", ...} 도 지원)
 """
 
 import sys
@@ -13,6 +14,8 @@ from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
 
+from compact_result import is_compact, iter_rows, load_result
+
 
 # 텍스트 색상 정의
 TEXT_COLORS = {
@@ -62,32 +65,69 @@ def extract_unit_number(unit_text):
     return ''
 
 
+def unit_sort_key(unit_num):
+    """호수 번호(정수 또는 '01' 같은 문자열) → 정렬 키 (숫자 순, 번호가 없는 호수는 맨 뒤)"""
+    text = str(unit_num)
+    return (0, int(text)) if text.isdigit() else (1, 0)
+
+
+def unit_text(unit_data_raw):
+    """중첩 포맷 호수 데이터 → text"""
+    # 데이터가 딕셔너리인 경우 text 필드 추출
+    if isinstance(unit_data_raw, dict):
+        return unit_data_raw.get('text', '')
+    return str(unit_data_raw) if unit_data_raw else ''
+
+
 def convert_json_to_floor_unit(json_data, output_file):
     """
     JSON 데이터를 층호수 형태 엑셀로 변환
 
     Args:
         json_data: {"header": {"building": "...", "name": "..."}, "data": [...]}
+                   또는 압축 포맷 (dict / 바이너리)
         output_file: 출력 엑셀 파일 경로
     """
     print(f"📂 출력 파일: {output_file}")
     print()
 
     # JSON 파싱
-    if isinstance(json_data, str):
-        data = json.loads(json_data)
-    else:
-        data = json_data
+    data = load_result(json_data)
 
-    # 데이터 추출
-    if 'data' in data:
-        # v3 포맷: {header: {...}, data: [...]}
-        floor_data = data['data']
+    if is_compact(data):
+        # 압축 포맷: 층/호 번호를 문자열 파싱 없이 그대로 사용 (호수 순서는 중첩 포맷과 같은 숫자 순)
+        order = sorted(range(len(data['units'])), key=lambda c: unit_sort_key(data['units'][c]))
+        unit_numbers = [(data['units'][c], f"{data['units'][c]:02d}") for c in order]
+        rows = [(str(floor), [cells[c][1] for c in order]) for floor, cells in iter_rows(data)]
     else:
-        # 기존 배열 포맷
-        floor_data = data
+        # 데이터 추출
+        if 'data' in data:
+            # v3 포맷: {header: {...}, data: [...]}
+            floor_data = data['data']
+        else:
+            # 기존 배열 포맷
+            floor_data = data
+
+        if not floor_data:
+            print("❌ 데이터가 비어있습니다.")
+            return False
+
+        # 호수 목록 추출 (첫 번째 층의 units에서)
+        first_floor = floor_data[0]
+        units = first_floor.get('units', {})
+        unit_numbers = []
 
-    if not floor_data:
+        for unit_key in units:
+            unit_num = extract_unit_number(unit_key)
+            unit_numbers.append((unit_key, unit_num))
+        # 문자열 정렬이면 "10호"가 "2호"보다 앞에 오므로 숫자 순 (압축 포맷과 같은 순서)
+        unit_numbers.sort(key=lambda item: unit_sort_key(item[1]))
+
+        rows = [(extract_floor_number(floor.get('floor', '')),
+                 [unit_text(floor.get('units', {}).get(unit_key, '')) for unit_key, _ in unit_numbers])
+                for floor in floor_data]
+
+    if not rows:
         print("❌ 데이터가 비어있습니다.")
         return False
 
@@ -96,17 +136,8 @@ def convert_json_to_floor_unit(json_data, output_file):
     ws = wb.active
     ws.title = "변환결과"
 
-    # 호수 목록 추출 (첫 번째 층의 units에서)
-    first_floor = floor_data[0]
-    units = first_floor.get('units', {})
-    unit_numbers = []
-
-    for unit_key in sorted(units.keys()):
-        unit_num = extract_unit_number(unit_key)
-        unit_numbers.append((unit_key, unit_num))
-
     print(f"📊 총 {len(unit_numbers)}개 호수 감지")
-    print(f"📊 총 {len(floor_data)}개 층 감지")
+    print(f"📊 총 {len(rows)}개 층 감지")
     print()
 
     # 헤더 행 작성 (각 호수마다 2개 열: 층호수 + 데이터)
@@ -148,10 +179,7 @@ def convert_json_to_floor_unit(json_data, output_file):
     m_count = 0
 
     print("🔄 데이터 변환 중...")
-    for idx, floor in enumerate(floor_data, start=2):
-        # 층 번호 추출
-        floor_num = extract_floor_number(floor.get('floor', ''))
-
+    for idx, (floor_num, texts) in enumerate(rows, start=2):
         if not floor_num:
             continue
 
@@ -162,18 +190,8 @@ def convert_json_to_floor_unit(json_data, output_file):
 
         # 각 호수 처리 (호수마다 2개 열 사용)
         col_idx = 2
-        units = floor.get('units', {})
-
-        for unit_key, unit_num in unit_numbers:
-            # 해당 호수의 데이터 가져오기
-            unit_data_raw = units.get(unit_key, '')
-
-            # 데이터가 딕셔너리인 경우 text 필드 추출
-            if isinstance(unit_data_raw, dict):
-                unit_data = unit_data_raw.get('text', '')
-            else:
-                unit_data = str(unit_data_raw) if unit_data_raw else ''
 
+        for (unit_key, unit_num), unit_data in zip(unit_numbers, texts):
             if unit_num:
                 # 층호수 조합
                 floor_unit = floor_num + unit_num
@@ -223,7 +241,7 @@ def convert_json_to_floor_unit(json_data, output_file):
     print()
     print("=" * 50)
     print("✅ 변환 완료!")
-    print(f"📊 변환된 층: {len(floor_data)}개")
+    print(f"📊 변환된 층: {len(rows)}개")
     print(f"🔴 KT: {kt_count}개")
     print(f"🟢 M: {m_count}개")
     print(f"📂 저장 위치: {output_file}")
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+그리드 레이아웃 캐시 (이미지 지문 → data_h / data_v)
+
+업로드는 대부분 같은 앱, 같은 화면 해상도에서 나오므로 그리드 위치가 반복된다.
+이미지 크기 + 축소 투영 프로파일로 지문을 만들고, 비슷한 지문의 저장된
+라인 좌표를 빠르게 검증한 뒤 재사용해 라인 감지 전체를 건너뛴다.
+"""
+
+import json
+import os
+import sys
+import threading
+
+import cv2
+import numpy as np
+
+CACHE_FORMAT = 1
+PROFILE_BINS = 64           # 투영 프로파일 길이 (가로/세로 각각)
+DARK_THRESHOLD = 200        # find_grid_lines와 같은 이진화 기준
+PROFILE_TOLERANCE = 0.03    # 프로파일 평균 절대 차이 허용치 (0~1)
+LINE_BAND = 2               # 검증 시 라인 좌표 주변 탐색 폭 (px)
+LINE_MIN_DARK = 0.6         # 라인으로 인정할 어두운 픽셀 비율
+
+
+def layout_fingerprint(gray):
+    """회색조 이미지의 행/열 어두운 픽셀 비율 프로파일 (float32, 길이 2 * PROFILE_BINS)"""
+    dark = (gray < DARK_THRESHOLD).astype(np.float32)
+    small = cv2.resize(dark, (PROFILE_BINS, PROFILE_BINS), interpolation=cv2.INTER_AREA)
+    return np.concatenate([small.mean(axis=1), small.mean(axis=0)])
+
+
+def _line_is_dark(dark, pos, lo, hi, axis):
+    """pos ± LINE_BAND 안에 lo~hi 구간 대부분이 어두운 행(axis=0) 또는 열(axis=1)이 있는지"""
+    n = dark.shape[axis]
+    a, b = max(0, pos - LINE_BAND), min(n, pos + LINE_BAND + 1)
+    if a >= b or hi <= lo:
+        return False
+    band = dark[a:b, lo:hi] if axis == 0 else dark[lo:hi, a:b].T
+    return band.mean(axis=1).max() >= LINE_MIN_DARK
+
+
+def verify_grid(gray, data_h, data_v):
+    """
+    저장된 그리드가 현재 이미지와 맞는지 확인
+    - 안쪽 라인은 모두 실제 어두운 선이어야 함
+    - 바깥 테두리는 색 경계일 수 있으므로 검사하지 않음 (안쪽 라인이 위치를 고정)
+    """
+    h, w = gray.shape[:2]
+    if data_h[-1] >= h or data_v[-1] >= w:
+        return False
+    dark = gray < DARK_THRESHOLD
+    x1, x2 = data_v[0], data_v[-1]
+    y1, y2 = data_h[0], data_h[-1]
+    return (all(_line_is_dark(dark, y, x1, x2, 0) for y in data_h[1:-1]) and
+            all(_line_is_dark(dark, x, y1, y2, 1) for x in data_v[1:-1]))
+
+
+class LayoutCache:
+    """JSON 파일 기반 레이아웃 캐시 (최근 사용 순, 최대 max_entries개)"""
+
+    def __init__(self, path, max_entries=64):
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = []   # {"size": [w, h], "profile": [...], "data_h": [...], "data_v": [...]}
+        self.lock = threading.Lock()
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return
+        if saved.get('version') != CACHE_FORMAT:
+            return
+        self.entries = saved.get('entries', [])[-self.max_entries:]
+
+    def save(self):
+        with self.lock:
+            data = {"version": CACHE_FORMAT, "entries": list(self.entries)}
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"레이아웃 캐시 저장 실패: {e}", file=sys.stderr)
+
+    def _nearest(self, size, profile):
+        """같은 크기 중 프로파일 차이가 가장 작은 항목 인덱스 (허용치 초과 시 None)"""
+        best, best_diff = None, PROFILE_TOLERANCE
+        for i, entry in enumerate(self.entries):
+            if entry['size'] != size:
+                continue
+            diff = float(np.abs(np.asarray(entry['profile'], np.float32) - profile).mean())
+            if diff <= best_diff:
+                best, best_diff = i, diff
+        return best
+
+    def lookup(self, gray):
+        """검증을 통과한 저장 그리드 (data_h, data_v) 또는 None"""
+        size = [gray.shape[1], gray.shape[0]]
+        profile = layout_fingerprint(gray)
+        with self.lock:
+            idx = self._nearest(size, profile)
+            if idx is None:
+                return None
+            entry = self.entries.pop(idx)
+            self.entries.append(entry)
+        if not verify_grid(gray, entry['data_h'], entry['data_v']):
+            print("레이아웃 캐시 후보 검증 실패", file=sys.stderr)
+            return None
+        return list(entry['data_h']), list(entry['data_v'])
+
+    def store(self, gray, data_h, data_v):
+        """감지 결과 저장 (비슷한 지문의 기존 항목은 교체)"""
+        size = [gray.shape[1], gray.shape[0]]
+        profile = layout_fingerprint(gray)
+        entry = {
+            "size": size,
+            "profile": [round(float(v), 4) for v in profile],
+            "data_h": [int(y) for y in data_h],
+            "data_v": [int(x) for x in data_v],
+        }
+        with self.lock:
+            idx = self._nearest(size, profile)
+            if idx is not None:
+                self.entries.pop(idx)
+            self.entries.append(entry)
+            del self.entries[:-self.max_entries]
+        self.save()
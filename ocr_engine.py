@@ -4,6 +4,8 @@ import os
 import cv2
 import numpy as np
 
+from image_source import read_image_buffer, describe_source
+
 sys.stdout.reconfigure(encoding='utf-8')
 sys.stderr.reconfigure(encoding='utf-8')
 
@@ -11,13 +13,13 @@ sys.stderr.reconfigure(encoding='utf-8')
 def process_image(image_path):
     """순수 OpenCV 방식으로 테이블 색상 분석"""
 
-    print(f"이미지 분석 시작: {image_path}", file=sys.stderr)
+    print(f"이미지 분석 시작: {describe_source(image_path)}", file=sys.stderr)
     print("방식: 순수 OpenCV (그리드 라인 감지)", file=sys.stderr)
 
-    # 이미지 로드
-    img = cv2.imread(image_path)
+    # 이미지 로드 (한글 경로, '-' 표준 입력, 'shm:<이름>' 공유 메모리, 메모리 버퍼)
+    img = cv2.imdecode(read_image_buffer(image_path), cv2.IMREAD_COLOR)
     if img is None:
-        raise Exception("이미지를 로드할 수 없습니다.")
+        raise Exception(f"이미지를 로드할 수 없습니다: {describe_source(image_path)}")
 
     height, width = img.shape[:2]
     print(f"이미지 크기: {width} x {height}", file=sys.stderr)
@@ -76,8 +78,8 @@ def detect_lines(edges, direction, width, height):
         return []
 
     result = []
-    for line in lines:
-        x1, y1, x2, y2 = line[0]
+    # OpenCV 버전에 따라 (N, 1, 4) 또는 (N, 4)
+    for x1, y1, x2, y2 in lines.reshape(-1, 4):
 
         if direction == 'horizontal':
             # 수평 라인: y값 차이가 작음
@@ -3,6 +3,9 @@ import json
 import cv2
 import numpy as np
 import os
+import tempfile
+
+from image_source import read_image_buffer, describe_source, source_directory
 
 sys.stdout.reconfigure(encoding='utf-8')
 sys.stderr.reconfigure(encoding='utf-8')
@@ -19,18 +22,15 @@ except ImportError:
     print("EasyOCR 없음 - 텍스트 인식 비활성화", file=sys.stderr)
 
 # ============================================================
-# 설정 (고정 그리드 - LG신주례 현황표 기준)
+# 그리드 크기: 고정 층/호 수 대신 색상 영역이 걸친 칸 수로 추정 (--floors / --units로 지정 가능)
 # ============================================================
-NUM_FLOORS = 25  # 층수 (25층~1층)
-NUM_UNITS = 10   # 호수 (1호~10호)
 
 
-def load_image(image_path):
-    """이미지 로드 (한글 경로 지원)"""
-    img_array = np.fromfile(image_path, np.uint8)
-    img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
+def load_image(source):
+    """이미지 로드 (한글 경로, '-' 표준 입력, 'shm:<이름>' 공유 메모리, 메모리 버퍼 지원)"""
+    img = cv2.imdecode(read_image_buffer(source), cv2.IMREAD_COLOR)
     if img is None:
-        raise Exception(f"이미지 로드 실패: {image_path}")
+        raise Exception(f"이미지 로드 실패: {describe_source(source)}")
     return img
 
 
@@ -76,8 +76,7 @@ def detect_table_grid(img, colored_regions=None):
 
     h_coords_raw = []
     if h_lines is not None:
-        for line in h_lines:
-            x1, y1, x2, y2 = line[0]
+        for x1, y1, x2, y2 in h_lines.reshape(-1, 4):  # OpenCV 버전별 (N,1,4) / (N,4) 차이 흡수
             # 수평에 가깝고 길이가 어느 정도 있는 선만 수집
             line_len = abs(x1 - x2)
             if abs(y1 - y2) < 5 and line_len > (img_w // 4):
@@ -85,8 +84,7 @@ def detect_table_grid(img, colored_regions=None):
     
     v_coords_raw = []
     if v_lines is not None:
-        for line in v_lines:
-            x1, y1, x2, y2 = line[0]
+        for x1, y1, x2, y2 in v_lines.reshape(-1, 4):
             # 수직에 가깝고 길이가 어느 정도 있는 선만 수집
             line_len = abs(y1 - y2)
             if abs(x1 - x2) < 5 and line_len > (img_h // 10):
@@ -271,8 +269,67 @@ def find_all_colored_regions(img):
     return all_regions
 
 
-def find_table_bounds_from_grid(h_coords, v_coords, img_shape, colored_regions=None):
-    """그리드 라인에서 테이블 범위 찾기 (고정 25층 x 10호)"""
+def cell_index(coords, positions):
+    """좌표들이 속한 칸 번호 배열 (coords[i] <= p < coords[i+1] → i, 범위 밖은 -1)"""
+    idx = np.searchsorted(np.asarray(coords), np.asarray(positions), side='right') - 1
+    idx[(idx < 0) | (idx >= len(coords) - 1)] = -1
+    return idx
+
+
+MAX_EMPTY_RUN = 2    # 층 수 추정 시 색상 영역 없이 연속으로 허용할 행 수 (흰 셀만 있는 층)
+GAP_TOLERANCE = 0.1  # 호 수 추정 시 같은 열 너비로 볼 간격 차이 비율
+
+
+def regular_run_size(coords):
+    """간격이 중앙값 ±GAP_TOLERANCE 안에서 연속되는 가장 긴 구간의 칸 수 (층 열처럼 폭이 다른 열 제외)"""
+    gaps = np.diff(coords)
+    if gaps.size == 0:
+        return 0
+    regular = np.abs(gaps - np.median(gaps)) <= np.median(gaps) * GAP_TOLERANCE
+    best = run = 0
+    for ok in regular:
+        run = run + 1 if ok else 0
+        best = max(best, run)
+    return best
+
+
+def infer_grid_size(coords, spans):
+    """
+    색상 영역이 차지한 칸으로 그리드 크기 추정
+    - spans: 영역별 (시작, 끝) 좌표 (바운딩 박스, 같은 색 인접 셀은 한 영역으로 합쳐지므로 중심 대신 사용)
+    - 빈 칸이 MAX_EMPTY_RUN 이하로 끊긴 가장 긴 연속 구간의 칸 수 (헤더/범례의 떨어진 영역 제외)
+    """
+    n = len(coords) - 1
+    if n < 1 or len(spans) == 0:
+        return max(n, 0)
+    spans = np.asarray(spans, float)
+    first = cell_index(coords, spans[:, 0])
+    last = cell_index(coords, spans[:, 1])
+    valid = (first >= 0) & (last >= first)
+    if not valid.any():
+        return n
+
+    # 차분 배열로 칸별 점유 표시 (영역 수 + 칸 수에 비례)
+    marks = np.zeros(n + 1, int)
+    np.add.at(marks, first[valid], 1)
+    np.add.at(marks, last[valid] + 1, -1)
+    occupied = np.flatnonzero(np.cumsum(marks)[:n] > 0)
+
+    best, start = 1, 0
+    for i in range(1, len(occupied)):
+        if occupied[i] - occupied[i - 1] > MAX_EMPTY_RUN + 1:
+            start = i
+        best = max(best, int(occupied[i] - occupied[start] + 1))
+    return best
+
+
+def find_table_bounds_from_grid(h_coords, v_coords, img_shape, colored_regions=None,
+                                num_floors=None, num_units=None):
+    """
+    그리드 라인에서 테이블 범위 찾기
+    - num_floors / num_units: None이면 색상 영역이 걸친 행/열 수로 추정
+    - 정해진 크기의 창을 밀면서 색상 데이터/간격 일관성 점수가 가장 높은 구간 선택
+    """
     if not h_coords or not v_coords:
         return None
 
@@ -280,38 +337,50 @@ def find_table_bounds_from_grid(h_coords, v_coords, img_shape, colored_regions=N
 
     print(f"감지된 라인: 수평 {len(h_coords)}개, 수직 {len(v_coords)}개", file=sys.stderr)
 
+    centers = np.array([r['center'] for r in colored_regions or []], float).reshape(-1, 2)
+    boxes = np.array([r['bbox'] for r in colored_regions or []], float).reshape(-1, 4)
+    inset = 2   # 셀 경계선에 걸친 바운딩 박스 가장자리는 제외
+    if num_units is None:
+        # 호 수: 열 너비가 일정한 수직선 구간 (가장자리 열이 전부 흰색이어도 셀 수 있음)
+        num_units = regular_run_size(v_coords)
+    if num_floors is None:
+        # 층 수: 색상 영역이 차지한 행의 연속 구간 (수평선은 헤더 영역까지 보간되므로 라인 수로는 불가)
+        num_floors = infer_grid_size(h_coords, np.c_[boxes[:, 1] + inset, boxes[:, 1] + boxes[:, 3] - inset])
+    print(f"그리드 크기: {num_floors}층 x {num_units}호", file=sys.stderr)
+
     # 라인 수가 부족하면 실패
-    if len(h_coords) < NUM_FLOORS + 1 or len(v_coords) < NUM_UNITS + 1:
-        print(f"라인 부족: 필요 수평 {NUM_FLOORS+1}, 수직 {NUM_UNITS+1}", file=sys.stderr)
+    if num_floors < 1 or num_units < 1 or len(h_coords) < num_floors + 1 or len(v_coords) < num_units + 1:
+        print(f"라인 부족: 필요 수평 {num_floors+1}, 수직 {num_units+1}", file=sys.stderr)
         return None
 
     if not colored_regions:
-        selected_h = h_coords[:NUM_FLOORS + 1]
-        selected_v = v_coords[:NUM_UNITS + 1]
+        selected_h = h_coords[:num_floors + 1]
+        selected_v = v_coords[:num_units + 1]
         return (selected_v[0], selected_h[0], selected_v[-1], selected_h[-1]), selected_h, selected_v
 
-    # 1단계: 수직선 (열) 선택 - 색상 데이터가 가장 많은 10열 구간 찾기
+    cx, cy = centers[:, 0], centers[:, 1]
+
+    # 1단계: 수직선 (열) 선택 - 색상 데이터가 가장 많은 num_units열 구간 찾기
     best_v_start = 0
     max_v_score = -1
 
-    for i in range(len(v_coords) - NUM_UNITS):
-        v_window = v_coords[i : i + NUM_UNITS + 1]
+    for i in range(len(v_coords) - num_units):
+        v_window = v_coords[i : i + num_units + 1]
         x_min, x_max = v_window[0], v_window[-1]
 
         # 해당 구간의 색상 데이터 수
-        points_in_window = [r for r in colored_regions if x_min < r['center'][0] < x_max]
-        data_count = len(points_in_window)
+        in_window = (x_min < cx) & (cx < x_max)
+        data_count = int(np.count_nonzero(in_window))
 
         # 간격 일관성
-        gaps = [v_window[j+1] - v_window[j] for j in range(NUM_UNITS)]
-        gap_std = np.std(gaps)
+        gap_std = np.std(np.diff(v_window))
         gap_consistency = 1.0 / (1.0 + gap_std)
 
         # Y축 분포 (실제 테이블은 세로로 길게 뻗어있음)
         y_span_score = 0
-        if points_in_window:
-            ys = [p['center'][1] for p in points_in_window]
-            y_span = max(ys) - min(ys)
+        if data_count:
+            ys = cy[in_window]
+            y_span = ys.max() - ys.min()
             y_span_score = min(y_span / (img_h * 0.4), 1.5) * 50
 
         score = (data_count * 2) + (gap_consistency * 20) + y_span_score
@@ -320,32 +389,31 @@ def find_table_bounds_from_grid(h_coords, v_coords, img_shape, colored_regions=N
             max_v_score = score
             best_v_start = i
 
-    selected_v = v_coords[best_v_start : best_v_start + NUM_UNITS + 1]
+    selected_v = v_coords[best_v_start : best_v_start + num_units + 1]
     x_min_final, x_max_final = selected_v[0], selected_v[-1]
 
-    # 2단계: 수평선 (행) 선택 - 색상 데이터가 가장 많은 25행 구간 찾기
-    table_data_points = [r for r in colored_regions if x_min_final < r['center'][0] < x_max_final]
+    # 2단계: 수평선 (행) 선택 - 색상 데이터가 가장 많은 num_floors행 구간 찾기
+    table_ys = cy[(x_min_final < cx) & (cx < x_max_final)]
+    # 각 데이터 점의 행 번호 (창마다 다시 찾지 않도록 한 번만 계산)
+    point_rows = cell_index(h_coords, table_ys)
 
     best_h_start = 0
     max_h_score = -1
 
-    for i in range(len(h_coords) - NUM_FLOORS):
-        h_window = h_coords[i : i + NUM_FLOORS + 1]
+    for i in range(len(h_coords) - num_floors):
+        h_window = h_coords[i : i + num_floors + 1]
         y_min, y_max = h_window[0], h_window[-1]
 
         # 해당 구간의 색상 데이터 수
-        data_count = sum(1 for r in table_data_points if y_min < r['center'][1] < y_max)
+        data_count = int(np.count_nonzero((y_min < table_ys) & (table_ys < y_max)))
 
         # 간격 일관성
-        gaps = [h_window[j+1] - h_window[j] for j in range(NUM_FLOORS)]
-        gap_std = np.std(gaps)
+        gap_std = np.std(np.diff(h_window))
         gap_consistency = 100.0 / (1.0 + gap_std)
 
         # 활성 행 수 (데이터가 있는 행)
-        active_rows = 0
-        for j in range(NUM_FLOORS):
-            if any(h_window[j] < r['center'][1] < h_window[j+1] for r in table_data_points):
-                active_rows += 1
+        rows_in_window = point_rows[(point_rows >= i) & (point_rows < i + num_floors)]
+        active_rows = len(np.unique(rows_in_window))
 
         score = data_count + gap_consistency + (active_rows * 30)
 
@@ -353,11 +421,11 @@ def find_table_bounds_from_grid(h_coords, v_coords, img_shape, colored_regions=N
             max_h_score = score
             best_h_start = i
 
-    selected_h = h_coords[best_h_start : best_h_start + NUM_FLOORS + 1]
+    selected_h = h_coords[best_h_start : best_h_start + num_floors + 1]
 
     table_bounds = (selected_v[0], selected_h[0], selected_v[-1], selected_h[-1])
 
-    print(f"선택된 그리드: {NUM_FLOORS}층 x {NUM_UNITS}호 (시작: h={best_h_start}, v={best_v_start})", file=sys.stderr)
+    print(f"선택된 그리드: {num_floors}층 x {num_units}호 (시작: h={best_h_start}, v={best_v_start})", file=sys.stderr)
     return table_bounds, selected_h, selected_v
 
 
@@ -409,25 +477,15 @@ def map_regions_to_grid_v2(regions, h_lines, v_lines, num_floors, num_units, img
     
     mapped_count = 0
 
-    for region in regions:
+    # 어느 셀에 속하는지 찾기 (행/열 번호를 한 번에 이진 탐색)
+    centers = np.array([r['center'] for r in regions], int).reshape(-1, 2)
+    row_indices = cell_index(h_lines, centers[:, 1])
+    col_indices = cell_index(v_lines, centers[:, 0])
+
+    for region, row_idx, col_idx in zip(regions, row_indices, col_indices):
         cx, cy = region['center']
         color = region['color']
 
-        # 어느 셀에 속하는지 찾기
-        # 행 찾기
-        row_idx = -1
-        for i in range(len(h_lines) - 1):
-            if h_lines[i] <= cy < h_lines[i + 1]:
-                row_idx = i
-                break
-
-        # 열 찾기
-        col_idx = -1
-        for i in range(len(v_lines) - 1):
-            if v_lines[i] <= cx < v_lines[i + 1]:
-                col_idx = i
-                break
-
         # 유효성 검사
         if 0 <= row_idx < num_floors and 0 <= col_idx < num_units:
             floor = num_floors - row_idx  # 25층~1층 (위에서 아래로)
@@ -467,9 +525,44 @@ def map_regions_to_grid_v2(regions, h_lines, v_lines, num_floors, num_units, img
     return grid, text_grid
 
 
-def process_image(image_path):
-    """이미지 처리 메인 함수 (그리드 라인 기반)"""
-    img = load_image(image_path)
+def save_debug_image(img, source, table_bounds, selected_h, selected_v, all_regions):
+    """그리드 라인 / 테이블 범위 / 색상 영역을 그린 디버그 이미지 저장 (--debug)"""
+    x1, y1, x2, y2 = table_bounds
+    debug_img = img.copy()
+    cv2.rectangle(debug_img, (x1, y1), (x2, y2), (0, 255, 0), 3)
+
+    for y in selected_h:
+        cv2.line(debug_img, (x1, y), (x2, y), (0, 0, 255), 2)
+
+    for x in selected_v:
+        cv2.line(debug_img, (x, y1), (x, y2), (255, 0, 0), 2)
+
+    for region in all_regions:
+        cx, cy = region['center']
+        color_bgr = {
+            'GREEN': (0, 200, 0),
+            'YELLOW': (0, 255, 255),
+            'PINK': (255, 0, 255)
+        }.get(region['color'], (255, 255, 255))
+        cv2.circle(debug_img, (cx, cy), 8, color_bgr, -1)
+        cv2.circle(debug_img, (cx, cy), 10, (0, 0, 0), 2)
+
+    # 파일 입력은 이미지 옆, 메모리/표준 입력은 임시 디렉터리에 저장
+    debug_dir = source_directory(source)
+    if debug_dir is None:
+        debug_dir = tempfile.gettempdir()
+    debug_path = os.path.join(debug_dir, 'debug_grid.jpg')
+    cv2.imencode('.jpg', debug_img)[1].tofile(debug_path)
+    print(f"디버그 이미지: {debug_path}", file=sys.stderr)
+
+
+def process_image(source, num_floors=None, num_units=None, debug=False):
+    """
+    이미지 처리 메인 함수 (그리드 라인 기반)
+    - num_floors / num_units: 층/호 수 (None이면 색상 영역 분포로 추정)
+    - debug: 그리드를 그린 debug_grid.jpg 저장
+    """
+    img = load_image(source)
     img_h, img_w = img.shape[:2]
 
     print(f"이미지 크기: {img_w} x {img_h}", file=sys.stderr)
@@ -481,20 +574,21 @@ def process_image(image_path):
     # 2단계: 그리드 라인 검출 (색상 영역 정보 활용)
     h_coords, v_coords = detect_table_grid(img, all_regions)
     
-    # 3단계: 테이블 범위 찾기 (고정 25층 x 10호)
-    result = find_table_bounds_from_grid(h_coords, v_coords, img.shape, all_regions)
+    # 3단계: 테이블 범위 찾기 (층/호 수 추정 또는 지정값)
+    result = find_table_bounds_from_grid(h_coords, v_coords, img.shape, all_regions, num_floors, num_units)
 
     if result is None:
         print("그리드 검출 실패", file=sys.stderr)
         return None
 
     table_bounds, selected_h, selected_v = result
+    num_floors, num_units = len(selected_h) - 1, len(selected_v) - 1
     x1, y1, x2, y2 = table_bounds
 
     print(f"테이블 범위: ({x1}, {y1}) ~ ({x2}, {y2})", file=sys.stderr)
 
     # 4단계: 격자 매핑 (텍스트 인식 포함)
-    grid, text_grid = map_regions_to_grid_v2(all_regions, selected_h, selected_v, NUM_FLOORS, NUM_UNITS, img)
+    grid, text_grid = map_regions_to_grid_v2(all_regions, selected_h, selected_v, num_floors, num_units, img)
 
     # 최종 색상 분포
     final_count = {'GREEN': 0, 'YELLOW': 0, 'PINK': 0, 'WHITE': 0}
@@ -503,39 +597,18 @@ def process_image(image_path):
             final_count[grid[floor][unit]] += 1
     print(f"최종 분포: {final_count}", file=sys.stderr)
 
-    # 디버그 이미지 생성
-    debug_img = img.copy()
-    cv2.rectangle(debug_img, (x1, y1), (x2, y2), (0, 255, 0), 3)
-
-    for y in selected_h:
-        cv2.line(debug_img, (x1, y), (x2, y), (0, 0, 255), 2)
-
-    for x in selected_v:
-        cv2.line(debug_img, (x, y1), (x, y2), (255, 0, 0), 2)
-
-    for region in all_regions:
-        cx, cy = region['center']
-        color_bgr = {
-            'GREEN': (0, 200, 0),
-            'YELLOW': (0, 255, 255),
-            'PINK': (255, 0, 255)
-        }.get(region['color'], (255, 255, 255))
-        cv2.circle(debug_img, (cx, cy), 8, color_bgr, -1)
-        cv2.circle(debug_img, (cx, cy), 10, (0, 0, 0), 2)
-
-    debug_path = os.path.join(os.path.dirname(image_path), 'debug_grid.jpg')
-    cv2.imencode('.jpg', debug_img)[1].tofile(debug_path)
-    print(f"디버그 이미지: {debug_path}", file=sys.stderr)
+    if debug:
+        save_debug_image(img, source, table_bounds, selected_h, selected_v, all_regions)
 
-    # 결과 포맷 변환 (25층 x 10호)
+    # 결과 포맷 변환 (num_floors층 x num_units호)
     results = []
-    for floor_num in range(NUM_FLOORS, 0, -1):  # 25층 → 1층
+    for floor_num in range(num_floors, 0, -1):  # 최상층 → 1층
         floor_data = {
             'floor': f'{floor_num}층',
             'units': {}
         }
 
-        for unit_num in range(1, NUM_UNITS + 1):  # 1호 → 10호
+        for unit_num in range(1, num_units + 1):  # 1호 → 마지막 호
             color = grid.get(floor_num, {}).get(unit_num, 'WHITE')
             text = text_grid.get(floor_num, {}).get(unit_num, '')
             floor_data['units'][f'{unit_num}호'] = {
@@ -555,10 +628,17 @@ if __name__ == "__main__":
         print(json.dumps({"error": "이미지 경로가 필요합니다."}))
         sys.exit(1)
 
-    image_path = sys.argv[1]
+    import argparse
+    parser = argparse.ArgumentParser(description="현황표 이미지 → JSON (v2)")
+    parser.add_argument("source", help="이미지 경로 또는 '-' (표준 입력)")
+    parser.add_argument("--floors", type=int, help="층 수 (기본: 색상 영역 분포로 추정)")
+    parser.add_argument("--units", type=int, help="호 수 (기본: 색상 영역 분포로 추정)")
+    parser.add_argument("--debug", action="store_true",
+                        help="그리드를 그린 debug_grid.jpg 저장 (파일 입력은 이미지 옆, 그 외는 임시 디렉터리)")
+    args = parser.parse_args()
 
     try:
-        data = process_image(image_path)
+        data = process_image(args.source, args.floors, args.units, args.debug)
         if data is None:
             print(json.dumps({"error": "그리드 검출 실패"}))
             sys.exit(1)
@@ -3,30 +3,86 @@ import json
 import cv2
 import numpy as np
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from image_source import read_image_buffer, read_image_size, describe_source
+from glyph_cache import GlyphCache, GlyphMatcher, glyph_key, normalize_glyph
+from layout_cache import LayoutCache
+import incremental
+import compact_result
+from image_planes import ImagePlanes
+from strip_image import STRIP_HEIGHT, open_strip_image, find_grid_lines_strips, row_bands
+import preflight
+from preflight import PreflightError
+import orientation
+import color_palette
 
 sys.stdout.reconfigure(encoding='utf-8')
 sys.stderr.reconfigure(encoding='utf-8')
 
 # Tesseract OCR 초기화 (EasyOCR + PyTorch 대체 → 경량화)
-try:
-    import pytesseract
-    from PIL import Image
-    OCR_AVAILABLE = True
-    print("Tesseract OCR 로드 완료", file=sys.stderr)
-except:
-    OCR_AVAILABLE = False
-    print("Tesseract OCR 로드 실패", file=sys.stderr)
-
-
-def ocr_read_text(cell_img, lang='eng+kor'):
-    """Tesseract로 텍스트 읽기 (EasyOCR 대체)"""
+# OCR_BACKEND=capi: libtesseract를 프로세스 안에서 직접 호출 (tesseract_capi.py)
+# OCR_BACKEND=pytesseract (기본): 호출마다 tesseract 프로세스 실행
+OCR_BACKEND = os.environ.get('OCR_BACKEND', 'pytesseract')
+OCR_AVAILABLE = False
+
+if OCR_BACKEND == 'capi':
+    try:
+        import tesseract_capi
+        print(f"Tesseract C API 로드 완료 ({tesseract_capi.version()})", file=sys.stderr)
+        OCR_AVAILABLE = True
+    except Exception as e:
+        print(f"Tesseract C API 로드 실패, pytesseract 사용: {e}", file=sys.stderr)
+        OCR_BACKEND = 'pytesseract'
+
+if OCR_BACKEND == 'pytesseract':
+    try:
+        import pytesseract
+        from PIL import Image
+        OCR_AVAILABLE = True
+        print("Tesseract OCR 로드 완료", file=sys.stderr)
+    except:
+        OCR_AVAILABLE = False
+        print("Tesseract OCR 로드 실패", file=sys.stderr)
+
+
+# 셀 인식 결과 캐시 (OCR_GLYPH_CACHE: 저장 파일 경로, OCR_GLYPH_CACHE_SIZE=0이면 사용 안 함)
+GLYPH_CACHE_SIZE = int(os.environ.get('OCR_GLYPH_CACHE_SIZE', '4096'))
+GLYPH_CACHE = GlyphCache(GLYPH_CACHE_SIZE, os.environ.get('OCR_GLYPH_CACHE') or None,
+                         version=f"{OCR_BACKEND}:{OCR_AVAILABLE}") if GLYPH_CACHE_SIZE > 0 else None
+
+
+# 그리드 레이아웃 캐시 (OCR_LAYOUT_CACHE: 저장 파일 경로, 지정하지 않으면 사용 안 함)
+LAYOUT_CACHE = LayoutCache(os.environ['OCR_LAYOUT_CACHE']) if os.environ.get('OCR_LAYOUT_CACHE') else None
+
+
+# 진행 이벤트 (server.js 작업 큐가 stderr에서 수집)
+PROGRESS_ENABLED = os.environ.get('OCR_PROGRESS') == '1'
+PROGRESS_PREFIX = '@@progress '
+
+
+def emit_progress(stage, **fields):
+    """진행 이벤트를 stderr에 한 줄 JSON으로 출력"""
+    if not PROGRESS_ENABLED:
+        return
+    event = {"stage": stage, **fields}
+    print(PROGRESS_PREFIX + json.dumps(event, ensure_ascii=False), file=sys.stderr, flush=True)
+
+
+def ocr_read_text(cell_img, lang='eng+kor', planes=None):
+    """Tesseract로 텍스트 읽기 (EasyOCR 대체, planes: 미리 변환된 셀 평면)"""
     if not OCR_AVAILABLE or cell_img.size == 0:
         return ""
     try:
-        # OpenCV BGR → RGB 변환 후 PIL Image로
-        rgb = cv2.cvtColor(cell_img, cv2.COLOR_BGR2RGB)
-        pil_img = Image.fromarray(rgb)
+        # OpenCV BGR → RGB 변환
+        rgb = planes.rgb if planes is not None else cv2.cvtColor(cell_img, cv2.COLOR_BGR2RGB)
         # PSM 7: 단일 텍스트 라인, PSM 13: 단일 문자
+        if OCR_BACKEND == 'capi':
+            return tesseract_capi.image_to_string(rgb, lang=lang, psm=7).strip()
+        pil_img = Image.fromarray(rgb)
         text = pytesseract.image_to_string(pil_img, lang=lang,
                                             config='--psm 7 --oem 3').strip()
         return text
@@ -34,37 +90,257 @@ def ocr_read_text(cell_img, lang='eng+kor'):
         return ""
 
 
-def ocr_read_text_with_positions(cell_img, lang='eng+kor'):
-    """Tesseract로 텍스트 + 위치 정보 읽기"""
-    if not OCR_AVAILABLE or cell_img.size == 0:
+def ocr_read_words(img, lang='eng+kor', psm=7, planes=None, whitelist=None):
+    """
+    Tesseract 단어 단위 인식: [(text, cx, conf), ...] (신뢰도 30 초과만)
+    - img: BGR 또는 회색조(2차원) 이미지
+    - whitelist: 인식할 문자 제한 (예: 'MVPIO')
+    """
+    return [(text, left + width / 2, conf)
+            for text, left, _, width, _, conf in ocr_read_word_boxes(img, lang, psm, planes, whitelist)]
+
+
+def ocr_read_word_boxes(img, lang='eng+kor', psm=7, planes=None, whitelist=None):
+    """Tesseract 단어 단위 인식 (위치 포함): [(text, left, top, width, height, conf), ...] (신뢰도 30 초과만)"""
+    if not OCR_AVAILABLE or img.size == 0:
         return []
     try:
-        rgb = cv2.cvtColor(cell_img, cv2.COLOR_BGR2RGB)
-        pil_img = Image.fromarray(rgb)
-        data = pytesseract.image_to_data(pil_img, lang=lang,
-                                          config='--psm 7 --oem 3',
-                                          output_type=pytesseract.Output.DICT)
+        if planes is not None:
+            pixels = planes.rgb
+        else:
+            pixels = img if img.ndim == 2 else cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        if OCR_BACKEND == 'capi':
+            words = tesseract_capi.image_to_words(pixels, lang=lang, psm=psm, whitelist=whitelist)
+        else:
+            pil_img = Image.fromarray(pixels)
+            config = f'--psm {psm} --oem 3'
+            if whitelist:
+                config += f' -c tessedit_char_whitelist={whitelist}'
+            data = pytesseract.image_to_data(pil_img, lang=lang, config=config,
+                                              output_type=pytesseract.Output.DICT)
+            words = [(data['text'][i], data['left'][i], data['top'][i],
+                      data['width'][i], data['height'][i], data['conf'][i])
+                     for i in range(len(data['text']))]
+
         results = []
-        for i in range(len(data['text'])):
-            conf = int(data['conf'][i])
-            text = data['text'][i].strip()
+        for text, left, top, width, height, conf in words:
+            conf = int(float(conf))
+            text = text.strip()
             if conf > 30 and text:
-                cx = data['left'][i] + data['width'][i] / 2
-                results.append((text, cx, conf))
+                results.append((text, left, top, width, height, conf))
         return results
     except:
         return []
 
 
-def load_image(image_path):
-    """이미지 로드"""
-    img_array = np.fromfile(image_path, np.uint8)
-    img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
+def ocr_read_text_with_positions(cell_img, lang='eng+kor', planes=None):
+    """Tesseract로 텍스트 + 위치 정보 읽기"""
+    return ocr_read_words(cell_img, lang, psm=7, planes=planes)
+
+
+# 축소 디코딩 (고해상도 카메라 사진용)
+REDUCE_MIN_PIXELS = 4_000_000   # 이보다 작은 이미지는 원본 그대로 디코딩
+EXPECTED_MAX_ROWS = 40          # 긴 변 방향 최대 행 수 (헤더 포함)
+EXPECTED_MAX_COLS = 20          # 짧은 변 방향 최대 열 수 (층 열 포함)
+MIN_CELL_PX = 32                # 셀 높이가 이보다 작으면 OCR 품질 저하
+REDUCE_FLAGS = {
+    1: cv2.IMREAD_COLOR,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+def choose_reduce_factor(img_array):
+    """
+    헤더의 이미지 크기로 축소 디코딩 배율 결정 (1, 2, 4, 8)
+    - 예상 최소 셀 크기가 MIN_CELL_PX 이상 유지되는 가장 큰 배율
+    """
+    size = read_image_size(img_array)
+    if size is None or size[0] * size[1] < REDUCE_MIN_PIXELS:
+        return 1
+
+    long_side, short_side = max(size), min(size)
+    est_cell = min(long_side / EXPECTED_MAX_ROWS, short_side / EXPECTED_MAX_COLS)
+    for factor in (8, 4, 2):
+        if est_cell / factor >= MIN_CELL_PX:
+            return factor
+    return 1
+
+
+def decode_image(img_array, reduce_factor=1):
+    """이미지 버퍼 디코딩 (reduce_factor: 1/2/4/8 축소 디코딩)"""
+    return cv2.imdecode(img_array, REDUCE_FLAGS[reduce_factor])
+
+
+def load_image(source, reduce_factor=1):
+    """이미지 로드 (파일 경로, '-' 표준 입력, 'shm:<이름>' 공유 메모리, 메모리 버퍼)"""
+    img = decode_image(read_image_buffer(source), reduce_factor)
     if img is None:
-        raise Exception(f"이미지 로드 실패: {image_path}")
+        raise Exception(f"이미지 로드 실패: {describe_source(source)}")
     return img
 
 
+# 테이블 위치 추정 (1단계 저해상도 탐색)
+ROI_MAX_SIDE = 800     # 축소 이미지의 긴 변 크기
+ROI_PADDING = 8        # 잘라낼 때 추가 여백 (px)
+ROI_MIN_AREA = 0.05    # 이미지 대비 최소 면적 비율
+# 띠 처리 개요 이미지 긴 변 (사전 검사가 높은 표의 촘촘한 행을 다시 셀 수 있도록 ROI_MAX_SIDE의 2배,
+# 테이블 영역 추정은 내부에서 ROI_MAX_SIDE로 줄여서 함)
+STRIP_OVERVIEW_SIDE = 2 * ROI_MAX_SIDE
+
+
+def grid_masks(img):
+    """
+    축소 이미지의 격자 마스크: (grid_mask, 교차점 중심 배열 (N, 2), scale)
+    - 엣지에서 긴 수평/수직선만 남겨 격자 마스크 생성, 교차점은 수평선과 수직선이 겹친 덩어리
+    """
+    h, w = img.shape[:2]
+    scale = min(1.0, ROI_MAX_SIDE / max(h, w))
+    if scale < 1.0:
+        small = cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    else:
+        small = img
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    sh, sw = gray.shape
+
+    edges = cv2.Canny(gray, 50, 150)
+    # 선 양쪽 색이 칸마다 달라 엣지가 한 픽셀씩 어긋나도 긴 선으로 이어지도록
+    edges = cv2.dilate(edges, np.ones((3, 3), np.uint8))
+    h_mask = cv2.morphologyEx(edges, cv2.MORPH_OPEN,
+                              cv2.getStructuringElement(cv2.MORPH_RECT, (max(sw // 10, 3), 1)))
+    v_mask = cv2.morphologyEx(edges, cv2.MORPH_OPEN,
+                              cv2.getStructuringElement(cv2.MORPH_RECT, (1, max(sh // 15, 3))))
+    kernel = np.ones((3, 3), np.uint8)
+    h_mask = cv2.dilate(h_mask, kernel)
+    v_mask = cv2.dilate(v_mask, kernel)
+
+    # 교차점 중심 좌표
+    crossings = cv2.bitwise_and(h_mask, v_mask)
+    _, _, _, centroids = cv2.connectedComponentsWithStats(crossings)
+    return cv2.bitwise_or(h_mask, v_mask), centroids[1:], scale
+
+
+def table_candidates(img):
+    """
+    축소 이미지의 격자 윤곽선 후보: ([(교차점 수, 면적, 박스), ...], scale) (박스는 축소 이미지 좌표)
+    - 윤곽선마다 안에 든 수평선/수직선 교차점 수를 셈
+    """
+    grid_mask, centroids, scale = grid_masks(img)
+    return contour_candidates(grid_mask, centroids), scale
+
+
+def contour_candidates(grid_mask, centroids):
+    """격자 마스크의 윤곽선 후보 [(교차점 수, 면적, 박스), ...]"""
+    if len(centroids) < 4:  # 최소 4개 모서리
+        return []
+    cx, cy = centroids[:, 0], centroids[:, 1]
+    sh, sw = grid_mask.shape
+
+    contours, _ = cv2.findContours(grid_mask, cv2.RETR_LIST, cv2.CHAIN_APPROX_SIMPLE)
+
+    candidates = []  # (교차점 수, 면적, 박스)
+    for contour in contours:
+        x, y, cw, ch = cv2.boundingRect(contour)
+        if cw * ch < sh * sw * ROI_MIN_AREA:
+            continue
+        inside = (cx >= x) & (cx < x + cw) & (cy >= y) & (cy < y + ch)
+        candidates.append((int(np.count_nonzero(inside)), cw * ch, (x, y, x + cw, y + ch)))
+    return candidates
+
+
+def pick_table_box(candidates):
+    """교차점이 최대치의 90% 이상인 후보 중 가장 작은 박스"""
+    max_cross = max(c[0] for c in candidates)
+    return min((c for c in candidates if c[0] >= max_cross * 0.9), key=lambda c: c[1])[2]
+
+
+def scale_box(box, scale, img_shape):
+    """축소 이미지 박스 → 원본 좌표 (팽창 1px 보정)"""
+    h, w = img_shape[:2]
+    x1 = max(0, int(round((box[0] + 1) / scale)))
+    y1 = max(0, int(round((box[1] + 1) / scale)))
+    x2 = min(w, int(round((box[2] - 1) / scale)))
+    y2 = min(h, int(round((box[3] - 1) / scale)))
+    return x1, y1, x2, y2
+
+
+def locate_table_roi(img):
+    """
+    축소 이미지에서 테이블 외곽 추정 (x1, y1, x2, y2), 실패 시 None
+    - 수평선과 수직선의 교차점을 가장 많이 포함하는 사각 윤곽선 선택
+    - 바깥 테두리처럼 교차점이 거의 같은 큰 윤곽선보다는 가장 작은 것을 선택
+      (앱 상단 바, 헤더, 범례는 교차점이 없으므로 제외됨)
+    """
+    candidates, scale = table_candidates(img)
+    if not candidates:
+        return None
+
+    return scale_box(pick_table_box(candidates), scale, img.shape)
+
+
+# 여러 테이블 감지
+MULTI_MIN_CROSSINGS = 9         # 테이블로 인정할 최소 교차점 수 (3x3 격자)
+MULTI_MIN_CROSS_RATIO = 0.2     # 가장 큰 테이블 대비 최소 교차점 비율
+MULTI_JOIN_GAP = 5              # 끊긴 선을 이어 붙일 팽창 크기 (축소 이미지 픽셀)
+
+
+def locate_table_rois(img):
+    """
+    이미지의 모든 테이블 외곽 [(x1, y1, x2, y2), ...] (위→아래, 같은 줄은 왼쪽→오른쪽)
+    - 격자 마스크의 연결 요소 = 선이 이어진 테이블 하나 (떨어져 있는 표는 서로 다른 요소)
+    - 요소 박스 안의 교차점 수로 테이블 여부 판단 (앱 바, 범례, 구분선은 교차점이 거의 없음)
+    - 큰 요소부터 고르고 이미 고른 박스 안에 든 요소(끊긴 선 조각)는 버림
+    - 고른 요소 안에서는 locate_table_roi와 같은 기준으로 윤곽선을 다시 고름
+    """
+    grid_mask, centroids, scale = grid_masks(img)
+    if len(centroids) < 4:
+        return []
+    sh, sw = grid_mask.shape
+
+    # 축소로 끊긴 선 이어 붙이기 (테이블 사이 여백보다 작게)
+    joined = cv2.dilate(grid_mask, np.ones((MULTI_JOIN_GAP, MULTI_JOIN_GAP), np.uint8))
+    n_labels, _, stats, _ = cv2.connectedComponentsWithStats(joined)
+    if n_labels < 2:
+        return []
+    cx, cy = centroids[:, 0], centroids[:, 1]
+
+    # 요소 박스 안의 교차점 수 (안쪽 선이 끊겨 따로 떨어진 조각의 교차점도 포함)
+    boxes = [(x, y, x + cw, y + ch) for x, y, cw, ch, _ in stats[1:]]
+    cross_counts = [int(np.count_nonzero((cx >= b[0]) & (cx < b[2]) & (cy >= b[1]) & (cy < b[3])))
+                    for b in boxes]
+
+    min_cross = max(MULTI_MIN_CROSSINGS, max(cross_counts) * MULTI_MIN_CROSS_RATIO)
+    chosen = []
+    for i in np.argsort([-(b[2] - b[0]) * (b[3] - b[1]) for b in boxes]):    # 큰 박스부터
+        box = boxes[i]
+        if cross_counts[i] < min_cross or (box[2] - box[0]) * (box[3] - box[1]) < sh * sw * ROI_MIN_AREA / 4:
+            continue
+        # 큰 테이블 안에서 선이 끊겨 떨어져 나온 조각은 버림
+        if any(box[0] >= c[0] and box[1] >= c[1] and box[2] <= c[2] and box[3] <= c[3] for c in chosen):
+            continue
+        chosen.append(box)
+
+    # 요소 박스 안에서 단일 테이블과 같은 기준으로 윤곽선 선택 (붙어 있는 화면 테두리 제외)
+    candidates = contour_candidates(grid_mask, centroids)
+    for i, box in enumerate(chosen):
+        inside = [c for c in candidates
+                  if c[2][0] >= box[0] and c[2][1] >= box[1] and c[2][2] <= box[2] and c[2][3] <= box[3]]
+        if inside:
+            chosen[i] = pick_table_box(inside)
+
+    # 읽는 순서: 세로 범위가 겹치는 박스끼리 한 줄로 묶고 줄 안에서는 x 순
+    chosen.sort(key=lambda b: b[1])
+    rows = []
+    for box in chosen:
+        if rows and box[1] < max(b[3] for b in rows[-1]):
+            rows[-1].append(box)
+        else:
+            rows.append([box])
+    ordered = [b for row in rows for b in sorted(row, key=lambda b: b[0])]
+    return [scale_box(b, scale, img.shape) for b in ordered]
+
+
 def find_grid_lines(img):
     """모든 그리드 라인 찾기"""
     gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
@@ -81,17 +357,9 @@ def find_grid_lines(img):
     v_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, h // 15))
     v_lines = cv2.morphologyEx(binary, cv2.MORPH_OPEN, v_kernel)
 
-    # 수평선 y좌표 추출
-    h_coords = []
-    for y in range(h):
-        if np.sum(h_lines[y, :]) > w * 50:
-            h_coords.append(y)
-
-    # 수직선 x좌표 추출
-    v_coords = []
-    for x in range(w):
-        if np.sum(v_lines[:, x]) > h * 30:
-            v_coords.append(x)
+    # 수평선 y좌표 / 수직선 x좌표 추출 (행/열 합을 한 번에 계산)
+    h_coords = np.flatnonzero(h_lines.sum(axis=1, dtype=np.int64) > w * 50).tolist()
+    v_coords = np.flatnonzero(v_lines.sum(axis=0, dtype=np.int64) > h * 30).tolist()
 
     # 근접 라인 병합
     def merge(coords, gap=5):
@@ -224,6 +492,111 @@ def find_main_table(h_lines, v_lines, img_shape):
     return selected_h, selected_v
 
 
+def add_border_lines(lines, lo, hi, tolerance=0.0):
+    """
+    테이블 외곽 위치에 라인이 없으면 추가
+    - 층 열처럼 선 없이 배경색 경계만 있는 테두리 보완
+    - tolerance: lo / hi 자체의 오차 (px, 축소 이미지에서 추정한 외곽이면 축소 화소 크기)
+      실제 라인과 이만큼 더 떨어져 있어야 새 라인으로 추가 (반올림한 외곽이 가짜 행을 만들지 않도록)
+    """
+    if len(lines) < 2:
+        return lines
+    min_gap = np.median(np.diff(lines)) * 0.5 + tolerance
+    if lines[0] - lo > min_gap:
+        lines = [lo] + lines
+    if hi - lines[-1] > min_gap:
+        lines = lines + [hi]
+    return lines
+
+
+def detect_table_grid(img):
+    """레이아웃 캐시 확인 → 없으면 그리드 탐색 후 캐시에 저장"""
+    if LAYOUT_CACHE is None:
+        return search_table_grid(img)
+
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    cached = LAYOUT_CACHE.lookup(gray)
+    if cached is not None:
+        print(f"레이아웃 캐시 적중: {len(cached[0]) - 1}행 x {len(cached[1]) - 1}열", file=sys.stderr)
+        return cached
+
+    data_h, data_v = search_table_grid(img)
+    if data_h is not None and len(data_h) >= 2 and len(data_v) >= 2:
+        LAYOUT_CACHE.store(gray, data_h, data_v)
+    return data_h, data_v
+
+
+def grid_in_roi(img, roi):
+    """테이블 영역(roi)만 잘라서 그리드 감지 → 원본 좌표 (data_h, data_v)"""
+    h, w = img.shape[:2]
+    tx1, ty1, tx2, ty2 = roi
+    rx1, ry1 = max(0, tx1 - ROI_PADDING), max(0, ty1 - ROI_PADDING)
+    rx2, ry2 = min(w, tx2 + ROI_PADDING), min(h, ty2 + ROI_PADDING)
+    crop = img[ry1:ry2, rx1:rx2]
+    print(f"테이블 영역 추정: ({tx1}, {ty1}) ~ ({tx2}, {ty2}) "
+          f"[{crop.shape[1]}x{crop.shape[0]}, 전체의 {crop.size * 100 / img.size:.0f}%]", file=sys.stderr)
+
+    h_lines, v_lines = find_grid_lines(crop)
+    h_lines = add_border_lines([y + ry1 for y in h_lines], ty1, ty2)
+    v_lines = add_border_lines([x + rx1 for x in v_lines], tx1, tx2)
+    print(f"전체 라인: 수평 {len(h_lines)}, 수직 {len(v_lines)}", file=sys.stderr)
+    return find_main_table(h_lines, v_lines, crop.shape)
+
+
+def detect_all_tables(img):
+    """이미지의 모든 테이블 그리드 [(data_h, data_v), ...] (영역 추정 실패 시 전체 이미지에서 하나)"""
+    grids = []
+    for roi in locate_table_rois(img):
+        data_h, data_v = grid_in_roi(img, roi)
+        if data_h is not None and len(data_h) >= 2 and len(data_v) >= 2:
+            grids.append((data_h, data_v))
+    if not grids:
+        data_h, data_v = search_table_grid(img)
+        if data_h is not None and len(data_h) >= 2 and len(data_v) >= 2:
+            grids.append((data_h, data_v))
+    return grids
+
+
+def search_table_grid(img):
+    """
+    테이블 영역만 잘라서 그리드 감지 후 원본 좌표로 복원
+    - 영역 추정 실패 또는 잘라낸 영역에서 감지 실패 시 전체 이미지로 재시도
+    """
+    roi = locate_table_roi(img)
+    if roi is not None:
+        data_h, data_v = grid_in_roi(img, roi)
+        if data_h is not None and len(data_h) >= 2 and len(data_v) >= 2:
+            return data_h, data_v
+        print("테이블 영역에서 감지 실패 → 전체 이미지로 재시도", file=sys.stderr)
+
+    h_lines, v_lines = find_grid_lines(img)
+    print(f"전체 라인: 수평 {len(h_lines)}, 수직 {len(v_lines)}", file=sys.stderr)
+    return find_main_table(h_lines, v_lines, img.shape)
+
+
+def retry_reduce_factor(reduce_factor, data_h, data_v):
+    """
+    셀이 작을 때 다시 디코딩할 배율
+    - 그리드를 찾았으면 측정한 셀 높이로 MIN_CELL_PX를 넘는 가장 큰 배율로 바로 이동
+      (예상보다 행이 많은 큰 표에서 1/4 → 1/2 → 1/1 단계별 재시도를 생략)
+    - 감지 실패 시 한 단계씩 낮춤
+    """
+    if data_h is None or len(data_h) < 2 or len(data_v) < 2:
+        return reduce_factor // 2
+    full_cell = np.median(np.diff(data_h)) * reduce_factor
+    for factor in (4, 2):
+        if factor < reduce_factor and full_cell / factor >= MIN_CELL_PX:
+            return factor
+    return 1
+
+
+def cells_too_small(data_h, data_v):
+    """감지된 셀 높이가 OCR에 부족한지 확인 (감지 실패도 포함)"""
+    if data_h is None or len(data_h) < 2 or len(data_v) < 2:
+        return True
+    return np.median(np.diff(data_h)) < MIN_CELL_PX
+
+
 def classify_color(r, g, b):
     """RGB + HSV 색상 분류 - 파스텔 톤 최적화"""
     # 채널 차이 계산
@@ -319,21 +692,41 @@ def classify_color(r, g, b):
     return "WHITE"
 
 
-def detect_symbols(cell_img):
-    """셀 이미지에서 기호 감지: ◎ □ ● ○"""
+def interior_ink_area(contours, w, h, min_area=20):
+    """셀 테두리에 닿지 않는 윤곽선 면적 합 (테두리에 닿는 것은 그리드 선 잔여물)"""
+    total = 0.0
+    for contour in contours:
+        area = cv2.contourArea(contour)
+        if area < min_area:
+            continue
+        x, y, w_rect, h_rect = cv2.boundingRect(contour)
+        if x <= 0 or y <= 0 or x + w_rect >= w or y + h_rect >= h:
+            continue
+        total += area
+    return total
+
+
+def detect_symbols(cell_img, planes=None, details=None):
+    """
+    셀 이미지에서 기호 감지: ◎ □ ● ○ (planes: 미리 변환된 셀 평면)
+    - details: dict를 넘기면 잉크 면적(ink_area)과 기호로 설명된 면적(symbol_area)을 채움
+    """
     if cell_img.size == 0:
         return []
 
     symbols = []
-    gray = cv2.cvtColor(cell_img, cv2.COLOR_BGR2GRAY)
+    gray = planes.gray if planes is not None else cv2.cvtColor(cell_img, cv2.COLOR_BGR2GRAY)
     h, w = gray.shape
 
     if h < 10 or w < 10:  # 너무 작은 셀
         return []
 
     # 적응형 이진화로 더 정확한 윤곽선 추출
-    binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-                                    cv2.THRESH_BINARY_INV, 11, 2)
+    if planes is not None:
+        binary = planes.adaptive
+    else:
+        binary = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                        cv2.THRESH_BINARY_INV, 11, 2)
 
     # 윤곽선 찾기
     contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -411,6 +804,10 @@ def detect_symbols(cell_img):
                 if 0.6 < aspect_ratio < 1.4 and area > 50:
                     detected_symbols.append(('□', cx, area))
 
+    if details is not None:
+        details["ink_area"] = interior_ink_area(contours, w, h)
+        details["symbol_area"] = float(sum(area for _, _, area in detected_symbols))
+
     # 중복 제거 (같은 위치의 기호는 면적이 큰 것만 선택)
     if detected_symbols:
         # x 좌표로 정렬
@@ -441,55 +838,119 @@ def detect_symbols(cell_img):
     return symbols
 
 
-def extract_text(img, x1, y1, x2, y2):
-    """셀에서 텍스트 및 기호 추출"""
-    margin = 2
-    cell = img[y1+margin:y2-margin, x1+margin:x2-margin]
-
-    if cell.size == 0:
-        return ""
-
-    result_parts = []
+# 단계별 인식 (1: 잉크/기호 형태, 2: 템플릿 매칭, 3: 전처리 강화 Tesseract)
+OCR_LETTERS = 'MVPIO'       # 셀에 쓰이는 문자
+TIER1_ACCEPT = 0.85         # 기호가 잉크 면적의 이 비율 이상을 설명하면 1단계에서 확정
+TIER2_ACCEPT = 0.8          # 템플릿 매칭 신뢰도 기준
+LEARN_MIN_CONF = 0.8        # 3단계 결과를 템플릿으로 학습할 최소 신뢰도
+OCR_UPSCALE = 3             # 3단계 확대 배율
+GLYPH_MATCHER = GlyphMatcher()
+DEADLINE_RESERVE_MS = 50    # 시간 예산에서 결과 직렬화/출력용으로 남겨 둘 여유
+# 층 열 / 팔레트 / 헤더 / 행별 셀 처리를 동시에 돌릴 작업자 수 (1이면 순차)
+# 기본: CPU 수 / 동시 OCR 프로세스 수 (서버 스케줄러가 PY_LIMIT_OCR를 넘겨 줌, 단독 실행은 1개로 봄)
+PIPELINE_WORKERS = max(1, int(os.environ.get('OCR_PIPELINE_WORKERS')
+                              or (os.cpu_count() or 1) // max(1, int(os.environ.get('PY_LIMIT_OCR') or 1))))
 
-    # 1. 기호 감지 (◎ □ ● ○)
-    symbols = detect_symbols(cell)
-    result_parts.extend(symbols)
 
-    # 2. Tesseract OCR로 문자 인식 (M, V, P 등)
-    if OCR_AVAILABLE:
-        try:
-            ocr_results = ocr_read_text_with_positions(cell, lang='eng')
-            if ocr_results:
-                ocr_chars = []
-                for (text, cx, conf) in ocr_results:
-                    for char in text.upper():
-                        if char.isalpha() and char in ['M', 'V', 'P', 'I', 'O']:
-                            ocr_chars.append((char, cx))
-
-                ocr_chars.sort(key=lambda x: x[1])
-                result_parts.extend([char for char, _ in ocr_chars])
-        except:
-            try:
-                ocr_text = ocr_read_text(cell, lang='eng')
-                if ocr_text:
-                    for char in ocr_text.upper():
-                        if char.isalpha() and char in ['M', 'V', 'P', 'I', 'O']:
-                            result_parts.append(char)
-            except:
-                pass
-
-    # 결과 합치기 (중복 문자 제거)
+def merge_parts(parts):
+    """기호/문자 목록 합치기 (중복 문자 제거)"""
     seen = set()
     deduped = []
-    for char in result_parts:
+    for char in parts:
         if char and char not in seen:
             seen.add(char)
             deduped.append(char)
     return ''.join(deduped)
 
 
-def extract_header_info(img, table_top_y):
-    """이미지 상단 헤더 영역에서 동 번호, 아파트 이름 등 추출"""
+def extract_text(img, x1, y1, x2, y2, planes=None):
+    """셀에서 텍스트 및 기호 추출"""
+    return extract_cell(img, x1, y1, x2, y2, planes)[0]
+
+
+def extract_cell(img, x1, y1, x2, y2, planes=None, max_tier=3):
+    """
+    셀 인식 → (text, confidence, tier) (같은 모양의 셀은 캐시 결과 재사용)
+    - planes: 테이블 영역 ImagePlanes (있으면 셀 평면을 슬라이스로 재사용)
+    - max_tier: 이 단계까지만 인식 (시간 예산 부족 시 OCR 생략, 3 미만 결과는 캐시하지 않음)
+    """
+    margin = 2
+    cell = img[y1+margin:y2-margin, x1+margin:x2-margin]
+
+    if cell.size == 0:
+        return "", 1.0, 1
+
+    cell_planes = planes.cell(x1+margin, y1+margin, x2-margin, y2-margin) if planes is not None else None
+
+    if GLYPH_CACHE is None:
+        return recognize_cell(cell, cell_planes, max_tier)
+
+    key = glyph_key(cell, cell_planes.gray if cell_planes is not None else None)
+    cached = GLYPH_CACHE.get(key)
+    if cached is None:
+        cached = recognize_cell(cell, cell_planes, max_tier)
+        if max_tier >= 3:
+            GLYPH_CACHE.put(key, list(cached))
+    return tuple(cached)
+
+
+def ocr_cell_letters(gray):
+    """3단계: 확대 + Otsu 이진화 + 여백 후 단일 문자(psm 10) → 한 줄(psm 7) 순서로 OCR"""
+    big = cv2.resize(gray, None, fx=OCR_UPSCALE, fy=OCR_UPSCALE, interpolation=cv2.INTER_CUBIC)
+    _, binary = cv2.threshold(big, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    binary = cv2.copyMakeBorder(binary, 10, 10, 10, 10, cv2.BORDER_CONSTANT, value=255)
+
+    for psm in (10, 7):
+        words = ocr_read_words(binary, lang='eng', psm=psm, whitelist=OCR_LETTERS)
+        chars = [(char, cx, conf) for text, cx, conf in words
+                 for char in text.upper() if char in OCR_LETTERS]
+        if chars:
+            chars.sort(key=lambda c: c[1])
+            return [c for c, _, _ in chars], sum(c[2] for c in chars) / len(chars) / 100
+    return [], 0.0
+
+
+def recognize_cell(cell, planes=None, max_tier=3):
+    """셀 이미지에서 기호 + 문자 인식 → (text, confidence, tier) (max_tier: 최대 인식 단계)"""
+    # 1단계: 기호 형태 + 잉크 면적 (기호가 잉크를 대부분 설명하면 OCR 생략)
+    details = {}
+    symbols = detect_symbols(cell, planes, details)
+    ink_area = details.get("ink_area", 0.0)
+    if ink_area == 0:
+        tier1 = (merge_parts(symbols), 0.99 if not symbols else 0.9)
+    else:
+        tier1 = (merge_parts(symbols), 0.95 * min(1.0, details["symbol_area"] / ink_area))
+    if tier1[1] >= TIER1_ACCEPT or max_tier < 2:
+        return tier1[0], round(tier1[1], 2), 1
+
+    # 2단계: 학습된 템플릿과 해밍 거리 비교 (1단계 기호를 모두 포함해야 채택)
+    gray = planes.gray if planes is not None else cv2.cvtColor(cell, cv2.COLOR_BGR2GRAY)
+    norm = normalize_glyph(gray)
+    matched = GLYPH_MATCHER.match(norm)
+    if matched is not None:
+        text, distance = matched
+        confidence = 1.0 - 0.3 * distance / GlyphMatcher.MAX_DISTANCE
+        if confidence >= TIER2_ACCEPT and all(sym in text for sym in symbols):
+            return text, round(confidence, 2), 2
+
+    # 3단계: 전처리 강화 Tesseract (문자 후보 잉크가 남은 셀만)
+    if not OCR_AVAILABLE or max_tier < 3:
+        return tier1[0], round(tier1[1], 2), 1
+
+    letters, ocr_conf = ocr_cell_letters(gray)
+    text = merge_parts(symbols + letters)
+    if letters:
+        confidence = ocr_conf
+    else:
+        # 기호로 설명되지 않는 잉크가 있지만 문자도 못 읽음
+        confidence = 0.5 * tier1[1] + 0.25
+    if confidence >= LEARN_MIN_CONF:
+        GLYPH_MATCHER.learn(norm, text)
+    return text, round(confidence, 2), 3
+
+
+def extract_header_info(img, table_top_y, x_span=None):
+    """이미지 상단 헤더 영역에서 동 번호, 아파트 이름 등 추출 (x_span: 헤더로 볼 가로 범위)"""
     header_info = {
         "building": "",   # 동 번호 (예: 102동, 106동)
         "name": "",       # 아파트 이름 (예: LG신주례1차)
@@ -500,26 +961,17 @@ def extract_header_info(img, table_top_y):
 
     h, w = img.shape[:2]
     # 테이블 상단 위의 영역을 헤더로 간주
-    header_region = img[0:table_top_y, 0:w]
+    hx1, hx2 = x_span if x_span is not None else (0, w)
+    header_region = img[0:table_top_y, hx1:hx2]
 
     if header_region.size == 0:
         return header_info
 
     try:
-        rgb = cv2.cvtColor(header_region, cv2.COLOR_BGR2RGB)
-        pil_img = Image.fromarray(rgb)
-        data = pytesseract.image_to_data(pil_img, lang='eng+kor',
-                                          config='--psm 6 --oem 3',
-                                          output_type=pytesseract.Output.DICT)
-
         texts = []
-        for i in range(len(data['text'])):
-            conf = int(data['conf'][i])
-            text = data['text'][i].strip()
-            if conf > 30 and text:
-                cx = data['left'][i] + data['width'][i] / 2
-                texts.append((cx, text))
-                print(f"  헤더 텍스트: '{text}' (신뢰도: {conf}, x={cx:.0f})", file=sys.stderr)
+        for text, cx, conf in ocr_read_words(header_region, 'eng+kor', psm=6):
+            texts.append((cx, text))
+            print(f"  헤더 텍스트: '{text}' (신뢰도: {conf}, x={cx:.0f})", file=sys.stderr)
 
         print(f"헤더 OCR 결과: {len(texts)}개", file=sys.stderr)
 
@@ -547,87 +999,567 @@ def extract_header_info(img, table_top_y):
     return header_info
 
 
-def process_image(image_path):
-    """이미지 처리"""
-    img = load_image(image_path)
+def read_floor_labels(planes, data_h, data_v, deadline):
+    """
+    층 번호 열 전체를 한 번의 Tesseract 호출(psm 4, 숫자만)로 인식
+    반환: {그리드 행 번호: 층 번호} (OCR 불가/실패 시 빈 dict)
+    """
+    if not OCR_AVAILABLE or len(data_h) < 2 or len(data_v) < 2 or not deadline.allows("floor"):
+        return {}
+
+    margin = 3
+    x1, x2 = data_v[0] + margin, data_v[1] - margin
+    y1, y2 = data_h[0], data_h[-1]
+    strip_planes = planes.cell(x1, y1, x2, y2)
+    if strip_planes is None or x2 <= x1:
+        return {}
+
+    # 가로 그리드 선이 숫자와 붙어 인식되지 않도록 흰색으로 지움
+    strip = strip_planes.gray.copy()
+    for y in data_h:
+        strip[max(0, y - y1 - margin):max(0, y - y1 + margin + 1), :] = 255
+
+    labels = {}
+    try:
+        words = ocr_read_word_boxes(strip, lang='eng', psm=4, whitelist='0123456789')
+    except Exception as e:
+        print(f"층 번호 열 OCR 실패: {e}", file=sys.stderr)
+        return {}
+
+    for text, _, top, _, height, conf in words:
+        if not text.isdigit():
+            continue
+        cy = y1 + top + height / 2
+        row = int(np.searchsorted(data_h, cy)) - 1
+        if 0 <= row < len(data_h) - 1 and row not in labels:
+            labels[row] = int(text)
+
+    print(f"층 번호 열 OCR: {len(labels)}/{len(data_h) - 1}행 인식", file=sys.stderr)
+    return labels
+
+
+def map_floor_rows(labels, num_rows):
+    """
+    그리드 행 → 층 매핑 (위에서 아래로 층 번호가 1씩 감소한다고 보고 검증)
+    - 첫 번호 행 이전의 번호 없는 행: 헤더로 건너뜀
+    - 이미 나온 층 번호: 중복 행으로 건너뜀
+    - 번호를 못 읽은 행: 바로 위 층 - 1
+    - 앞뒤와 맞지 않는 번호: 다음 번호 행이 같은 값을 지지하면 채택, 아니면 오인식으로 보고 추정값 사용
+    - 1층 아래 행: 여분 행으로 무시
+    반환: [(그리드 행, 층 번호), ...]
+    """
+    if not labels:
+        # 층 번호를 못 읽으면 모든 행을 위에서부터 N층~1층으로 사용
+        return [(row, num_rows - row) for row in range(num_rows)]
+
+    labeled_rows = sorted(labels)
+    mapping = []
+    seen = set()
+    expected = None
+
+    for row in range(num_rows):
+        label = labels.get(row)
+        if label is not None and label in seen:
+            print(f"  {row}행: {label}층 중복 → 건너뜀", file=sys.stderr)
+            continue
+        if label is not None and expected is not None and label != expected:
+            later = [r for r in labeled_rows if r > row]
+            if not later or labels[later[0]] != label - (later[0] - row):
+                print(f"  {row}행: '{label}' 오인식으로 판단 → {expected}층", file=sys.stderr)
+                label = expected
+        if label is None:
+            if expected is None:
+                print(f"  {row}행: 층 번호 없음 → 헤더로 건너뜀", file=sys.stderr)
+                continue
+            label = expected
+        if label < 1:
+            break
+        mapping.append((row, label))
+        seen.add(label)
+        expected = label - 1
+
+    return mapping
+
+
+def read_header(img, table_top_y, previous_state, deadline, x_span=None):
+    """헤더 정보 추출 (헤더 영역이 그대로면 이전 결과 재사용) → (header_info, header_signature)"""
+    hx1, hx2 = x_span if x_span is not None else (0, img.shape[1])
+    header_signature = incremental.cell_signature(img[0:table_top_y, hx1:hx2])
+    if previous_state is not None and not incremental.signature_changed(
+            previous_state.get('header_signature'), header_signature):
+        header_info = previous_state['result']['header']
+        print(f"헤더 정보 (이전 결과): {header_info}", file=sys.stderr)
+    elif not OCR_AVAILABLE or deadline.allows("header", deadline.cell_ms):
+        header_info = extract_header_info(img, table_top_y, x_span)
+    else:
+        header_info = {"building": "", "name": ""}
+        header_signature = None
+    return header_info, header_signature
+
+
+def sample_row(img, planes, y1, y2, data_v_lines, actual_cols, colors=None, classify=True):
+    """
+    한 행의 셀별 색상 + 서명 (층 판별과 무관하므로 먼저 계산)
+    - colors: 이미지별 팔레트로 분류한 이 행의 색 (color_palette), None이면 셀마다 classify_color
+    - classify=False: 색은 None (팔레트 결과를 나중에 채울 때)
+    반환: [(col, x1, x2, signature, color), ...]
+    """
     h, w = img.shape[:2]
-    print(f"이미지: {w} x {h}", file=sys.stderr)
+    samples = []
+    for col in range(actual_cols):
+        # 열 경계
+        if col < len(data_v_lines) - 1:
+            x1, x2 = data_v_lines[col], data_v_lines[col + 1]
+        else:
+            continue
 
-    # 1. 그리드 라인 찾기
-    h_lines, v_lines = find_grid_lines(img)
-    print(f"전체 라인: 수평 {len(h_lines)}, 수직 {len(v_lines)}", file=sys.stderr)
+        # 색상 샘플링 (셀 전체 영역 사용, 테두리 제외)
+        margin = 3  # 테두리 여백
+        sy1 = max(0, y1 + margin)
+        sy2 = min(h, y2 - margin)
+        sx1 = max(0, x1 + margin)
+        sx2 = min(w, x2 - margin)
+
+        roi = img[sy1:sy2, sx1:sx2]
+        roi_planes = planes.cell(sx1, sy1, sx2, sy2)
+        signature = incremental.cell_signature(roi, roi_planes.gray if roi_planes is not None else None)
+
+        if not classify:
+            color = None
+        elif colors is not None and col < len(colors):
+            color = colors[col]
+        elif roi.size > 0:
+            # 셀 전체 영역의 평균 색상 계산
+            avg = cv2.mean(roi)[:3]
+            color = classify_color(avg[2], avg[1], avg[0])
+        else:
+            color = "WHITE"
 
-    # 2. 메인 데이터 테이블 찾기
-    data_h, data_v = find_main_table(h_lines, v_lines, img.shape)
+        samples.append((col, x1, x2, signature, color))
+    return samples
 
-    if data_h is None or len(data_h) < 2 or len(data_v) < 2:
+
+def read_unit(img, planes, x1, y1, x2, y2, color, deadline):
+    """
+    셀 하나 인식 → (unit, complete)
+    - 시간 예산이 부족하면 1단계만 인식하고 complete=False (증분 상태에 서명을 남기지 않음)
+    """
+    max_tier = deadline.cell_tier()
+    t_cell = time.perf_counter()
+    text, confidence, tier = extract_cell(img, x1, y1, x2, y2, planes, max_tier)
+    if max_tier >= 3:
+        deadline.record_cell((time.perf_counter() - t_cell) * 1000)
+    unit = {
+        "text": text,
+        "color": color,
+        "confidence": confidence,
+        "tier": tier
+    }
+    return unit, max_tier >= 3
+
+
+class Deadline:
+    """
+    처리 시간 예산 (deadline_ms가 None이면 무제한)
+    - 셀 인식 시간을 지수 평균으로 추정해, 남은 시간이 (추정치 + 여유분)보다 적으면 OCR을 생략
+    - 생략한 단계/셀 수를 기록해 결과의 "degraded"로 보고
+    """
+
+    def __init__(self, deadline_ms, start=None):
+        self.deadline_ms = deadline_ms
+        self.start = start if start is not None else time.perf_counter()
+        self.cell_ms = 0.0
+        self.skipped = []
+        self.cells_degraded = 0
+        self.lock = threading.Lock()    # 행 작업이 여러 스레드에서 호출
+
+    def remaining_ms(self):
+        if self.deadline_ms is None:
+            return float('inf')
+        return self.deadline_ms - (time.perf_counter() - self.start) * 1000
+
+    def allows(self, stage, cost_ms=0.0):
+        """stage를 실행할 시간이 남았는지 (없으면 생략 목록에 기록)"""
+        if self.remaining_ms() >= cost_ms + DEADLINE_RESERVE_MS:
+            return True
+        with self.lock:
+            if stage in self.skipped:
+                return False
+            self.skipped.append(stage)
+        print(f"시간 예산 부족 → {stage} OCR 생략 (남은 {self.remaining_ms():.0f}ms)", file=sys.stderr)
+        return False
+
+    def cell_tier(self):
+        """다음 셀에 허용할 최대 인식 단계 (예산 부족 시 1단계만)"""
+        if not OCR_AVAILABLE or self.allows("cells", self.cell_ms):
+            return 3
+        with self.lock:
+            self.cells_degraded += 1
+        return 1
+
+    def record_cell(self, elapsed_ms):
+        with self.lock:
+            self.cell_ms = elapsed_ms if self.cell_ms == 0 else 0.8 * self.cell_ms + 0.2 * elapsed_ms
+
+    def report(self):
+        """결과에 붙일 degraded 정보 (생략한 단계가 없으면 None)"""
+        if not self.skipped:
+            return None
+        return {"deadline_ms": self.deadline_ms, "skipped": self.skipped,
+                "cells_without_ocr": self.cells_degraded}
+
+
+def load_and_detect(source, detect, timings):
+    """
+    이미지 디코딩 → 사전 검사 → 기울기/방향 보정 → detect(img)로 그리드 감지
+    (셀이 작거나 감지 실패 시 배율을 낮춰 재디코딩, 같은 보정을 다시 적용)
+    - detect: img → [(data_h, data_v), ...]
+    반환: (img, 감지된 그리드 목록)
+    """
+    t_start = time.perf_counter()
+    img_array = read_image_buffer(source)
+    preflight.check_size(img_array)
+    reduce_factor = choose_reduce_factor(img_array)
+    img = decode_image(img_array, reduce_factor)
+    if img is None:
+        raise Exception(f"이미지 로드 실패: {describe_source(source)}")
+    h, w = img.shape[:2]
+    print(f"이미지: {w} x {h}" + (f" (1/{reduce_factor} 축소 디코딩)" if reduce_factor > 1 else ""),
+          file=sys.stderr)
+    emit_progress("image_loaded", width=w, height=h, reduce=reduce_factor)
+    t_decoded = time.perf_counter()
+    timings["decode_ms"] = round((t_decoded - t_start) * 1000, 1)
+
+    # 사전 품질 검사 (흐림/격자선, 실패 시 PreflightError) → 기울어져 있으면 보정
+    metrics = preflight.check_image(img, max_skew=orientation.MAX_DESKEW_DEG)
+    timings["preflight_ms"] = metrics["preflight_ms"]
+    t_decoded = time.perf_counter()
+    skew = metrics["skew_deg"] if abs(metrics["skew_deg"]) > preflight.MAX_SKEW_DEG else 0.0
+    rotation = None
+
+    def normalize(img):
+        if skew:
+            img = orientation.deskew(img, skew)
+        if rotation is not None:
+            img = cv2.rotate(img, rotation)
+        return img
+
+    if skew:
+        img = normalize(img)
+        print(f"기울기 보정: {skew}°", file=sys.stderr)
+
+    # 1~2. 테이블 영역 추정 → 그리드 라인 → 메인 데이터 테이블
+    grids = detect(img)
+
+    # 라벨 띠(층 번호 열 / 호 번호 행)가 위·왼쪽이 아니면 회전 후 재감지
+    if grids and grids[0][0] is not None:
+        rotation = orientation.table_rotation(img, *grids[0])
+        if rotation is not None:
+            img = cv2.rotate(img, rotation)
+            grids = detect(img)
+
+    # 축소 디코딩 결과 셀이 너무 작거나 감지 실패 시 배율을 낮춰 재시도
+    while reduce_factor > 1 and (not grids or any(cells_too_small(*grid) for grid in grids)):
+        small = next((grid for grid in grids if cells_too_small(*grid)), (None, None))
+        reduce_factor = retry_reduce_factor(reduce_factor, *small)
+        img = normalize(decode_image(img_array, reduce_factor))
+        h, w = img.shape[:2]
+        print(f"셀 크기 부족 → 1/{reduce_factor} 배율로 재디코딩: {w} x {h}", file=sys.stderr)
+        grids = detect(img)
+
+    grids = [(data_h, data_v) for data_h, data_v in grids
+             if data_h is not None and len(data_h) >= 2 and len(data_v) >= 2]
+    timings["grid_ms"] = round((time.perf_counter() - t_decoded) * 1000, 1)
+    return img, grids
+
+
+def run_stream(stream, on_record=None):
+    """스트리밍 생성기를 끝까지 실행해 반환값(전체 결과) 반환 (on_record: 레코드마다 호출)"""
+    while True:
+        try:
+            record = next(stream)
+        except StopIteration as stop:
+            return stop.value
+        if on_record is not None:
+            on_record(record)
+
+
+def summary_record(result, timings):
+    """스트림 마지막 레코드: 층/호 수, 단계별 시간 (+ "degraded", "diff")"""
+    record = {
+        "type": "summary",
+        "floors": len(result["data"]),
+        "units": max((len(floor["units"]) for floor in result["data"]), default=0),
+        "timings": timings,
+    }
+    for key in ("degraded", "diff"):
+        if key in result:
+            record[key] = result[key]
+    return record
+
+
+def process_image(source, previous_state=None, state=None, timings=None, deadline_ms=None):
+    """
+    이미지 처리 (source: 파일 경로, '-' 표준 입력, 'shm:<이름>', 메모리 버퍼)
+    - previous_state: 이전 실행 상태 (incremental.load_state). 바뀐 셀만 다시 인식하고 결과에 "diff" 추가
+    - state: dict를 넘기면 다음 증분 실행용 상태를 채움
+    - timings: dict를 넘기면 단계별 소요 시간(ms)을 채움
+    - deadline_ms: 처리 시간 예산. 부족해지면 남은 OCR을 생략하고 색상 + 부분 텍스트를 반환하며
+      결과에 "degraded" 추가 (생략된 셀은 상태에 서명을 남기지 않아 다음 증분 실행에서 다시 인식)
+    """
+    return run_stream(iter_process_image(source, previous_state, state, timings, deadline_ms))
+
+
+def iter_process_image(source, previous_state=None, state=None, timings=None, deadline_ms=None):
+    """
+    process_image의 스트리밍 버전: 레코드를 완성되는 순서대로 yield하고 전체 결과를 반환값으로 돌려줌
+    - {"type": "header", "header": {...}}
+    - {"type": "floor", "floor": "25층", "units": {...}} (위층부터, 행이 끝나는 대로)
+    - {"type": "summary", ...} (summary_record)
+    테이블 감지 실패 시 아무것도 yield하지 않고 None 반환
+    """
+    if timings is None:
+        timings = {}
+    t_start = time.perf_counter()
+    deadline = Deadline(deadline_ms, t_start)
+
+    img, grids = load_and_detect(source, lambda img: [detect_table_grid(img)], timings)
+    if not grids:
         print("테이블 감지 실패", file=sys.stderr)
         return None
 
+    data_h, data_v = grids[0]
+    result = yield from iter_table(img, data_h, data_v, previous_state, state, timings, deadline)
+    timings["total_ms"] = round((time.perf_counter() - t_start) * 1000, 1)
+    yield summary_record(result, timings)
+    return result
+
+
+def process_image_tables(source, timings=None, deadline_ms=None):
+    """
+    이미지의 모든 테이블 처리 → {"tables": [{header, data}, ...]} (나란히 있는 여러 동 표)
+    - 테이블마다 process_table을 동시에 실행 (시간 예산은 공유)
+      셀 작업은 모든 테이블이 PIPELINE_WORKERS 공용 풀 하나에 넣으므로 테이블 수만큼 작업자가 늘지 않음
+      (테이블별 스레드는 결과를 모으기만 함)
+    - 헤더는 각 테이블 위쪽의 같은 가로 범위에서만 읽음
+    - timings["tables"]: 테이블별 단계 시간
+    """
+    if timings is None:
+        timings = {}
+    t_start = time.perf_counter()
+    deadline = Deadline(deadline_ms, t_start)
+
+    img, grids = load_and_detect(source, detect_all_tables, timings)
+    if not grids:
+        print("테이블 감지 실패", file=sys.stderr)
+        return None
+    print(f"감지된 테이블: {len(grids)}개", file=sys.stderr)
+
+    table_timings = [{} for _ in grids]
+    with ThreadPoolExecutor(max_workers=PIPELINE_WORKERS) as workers, \
+            ThreadPoolExecutor(max_workers=len(grids)) as collectors:
+        futures = [collectors.submit(process_table, img, data_h, data_v, None, None, table_timings[i],
+                                     deadline, (data_v[0], data_v[-1] + 1), workers)
+                   for i, (data_h, data_v) in enumerate(grids)]
+        tables = [future.result() for future in futures]
+
+    timings["tables"] = table_timings
+    timings["total_ms"] = round((time.perf_counter() - t_start) * 1000, 1)
+    return {"tables": tables}
+
+
+def process_image_strips(source, timings=None, deadline_ms=None, strip_height=STRIP_HEIGHT):
+    """
+    대형 스캔 띠 단위 처리 (strip_image 참고) → {"header", "data"} (+ "degraded")
+    - 그리드: 띠별 축소로 만든 개요 이미지에서 테이블 영역 추정 → 영역 안 라인을 띠 단위로 감지
+    - 층 번호 열: 띠마다 층 열만 잘라 OCR 후 전체 행 매핑
+    - 셀: 그리드 행을 높이 strip_height 이하의 띠로 묶어 띠마다 평면을 만들고 처리
+    - 작업 메모리는 띠 높이 x 테이블 폭에 비례 (이미지 높이와 무관)
+    - 증분 처리, 레이아웃 캐시, 축소 재디코딩 재시도는 지원하지 않음
+    """
+    return run_stream(iter_process_image_strips(source, timings, deadline_ms, strip_height))
+
+
+def iter_process_image_strips(source, timings=None, deadline_ms=None, strip_height=STRIP_HEIGHT):
+    """process_image_strips의 스트리밍 버전 (레코드 형식은 iter_process_image와 같음, 띠가 끝나는 대로 층 전달)"""
+    if timings is None:
+        timings = {}
+    t_start = time.perf_counter()
+    deadline = Deadline(deadline_ms, t_start)
+
+    # 축소 디코딩은 셀 크기 확인 후 재디코딩이 필요할 수 있으므로 원본 배율로 한 번만 디코딩
+    image = open_strip_image(source, decode_image)
+    try:
+        t_decoded = time.perf_counter()
+        timings["decode_ms"] = round((t_decoded - t_start) * 1000, 1)
+        h, w = image.shape[:2]
+        print(f"이미지 크기: {w} x {h} (띠 높이 {strip_height}px)", file=sys.stderr)
+
+        # 사전 품질 검사 (개요 이미지 + 원본 배율 가운데 영역)
+        overview, scale = image.overview(STRIP_OVERVIEW_SIDE, strip_height)
+        cy, cx = max(0, (h - preflight.PREFLIGHT_SIDE) // 2), max(0, (w - preflight.PREFLIGHT_SIDE) // 2)
+        crop = image.band(cy, cy + preflight.PREFLIGHT_SIDE, cx, cx + preflight.PREFLIGHT_SIDE)
+        timings["preflight_ms"] = preflight.check_image(overview, (w, h), crop)["preflight_ms"]
+
+        # 1~2. 테이블 영역 추정 (개요 이미지) → 영역 안 그리드 라인 (띠 단위) → 메인 데이터 테이블
+        roi = locate_table_roi(overview)
+        if roi is not None:
+            tx1, ty1, tx2, ty2 = (int(round(v / scale)) for v in roi)
+            region = (max(0, tx1 - ROI_PADDING), max(0, ty1 - ROI_PADDING),
+                      min(w, tx2 + ROI_PADDING), min(h, ty2 + ROI_PADDING))
+            print(f"테이블 영역 추정: ({tx1}, {ty1}) ~ ({tx2}, {ty2})", file=sys.stderr)
+        else:
+            region = (0, 0, w, h)
+        h_lines, v_lines = find_grid_lines_strips(image, region, strip_height)
+        if roi is not None:
+            # 외곽은 개요 이미지 좌표를 되돌린 값이라 축소 화소 하나(1 / scale px)만큼 오차
+            h_lines = add_border_lines(h_lines, ty1, ty2, 1 / scale)
+            v_lines = add_border_lines(v_lines, tx1, tx2, 1 / scale)
+        print(f"전체 라인: 수평 {len(h_lines)}, 수직 {len(v_lines)}", file=sys.stderr)
+        data_h, data_v = find_main_table(h_lines, v_lines, (region[3] - region[1], region[2] - region[0]))
+        if data_h is None or len(data_h) < 2 or len(data_v) < 2:
+            print("테이블 감지 실패", file=sys.stderr)
+            return None
+        t_grid = time.perf_counter()
+        timings["grid_ms"] = round((t_grid - t_decoded) * 1000, 1)
+
+        num_rows = len(data_h) - 1
+        bands = row_bands(data_h, strip_height)
+        print(f"감지된 행: {num_rows} ({len(bands)}개 띠)", file=sys.stderr)
+        emit_progress("grid_found", rows=num_rows, cols=len(data_v) - 1)
+
+        # 층 번호 열 (띠마다 층 열만 잘라 OCR)
+        labels = {}
+        if OCR_AVAILABLE:
+            floor_w = data_v[1] - data_v[0] + 1
+            for r0, r1 in bands:
+                by1 = data_h[r0]
+                strip = image.band(by1, data_h[r1] + 1, data_v[0], data_v[1] + 1)
+                band_h = [y - by1 for y in data_h[r0:r1 + 1]]
+                band_labels = read_floor_labels(ImagePlanes(strip), band_h, [0, floor_w - 1], deadline)
+                labels.update({r0 + row: floor for row, floor in band_labels.items()})
+        row_floors = map_floor_rows(labels, num_rows)
+        floor_of = dict(row_floors)
+        timings["floor_ocr_ms"] = round((time.perf_counter() - t_grid) * 1000, 1)
+
+        # 헤더 (테이블 위쪽 영역만 읽음)
+        t0 = time.perf_counter()
+        table_top_y = data_h[row_floors[0][0]] if row_floors else data_h[0]
+        header_info, _ = read_header(image.band(0, table_top_y), table_top_y, None, deadline)
+        timings["header_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        yield {"type": "header", "header": header_info}
+
+        # 3. 띠마다 셀 처리 (테이블 가로 범위만 읽고, 띠가 끝나면 평면과 함께 해제)
+        vx1, vx2 = data_v[0], data_v[-1] + 1
+        data_v_lines = [x - vx1 for x in data_v[1:]]
+        actual_cols = max(len(data_v_lines) - 1, 0)
+
+        # 색상 팔레트: 층이 나가기 전에 전체 셀 평균색이 필요하므로 띠를 한 번 먼저 훑음 (평균색만 남김)
+        t0 = time.perf_counter()
+        means = [color_palette.cell_means(image.band(data_h[r0], data_h[r1] + 1, vx1, vx2),
+                                          [y - data_h[r0] for y in data_h[r0:r1 + 1]], data_v_lines)
+                 for r0, r1 in bands]
+        legend_top = data_h[-1]
+        legend_band = image.band(legend_top, min(h, legend_top + color_palette.LEGEND_SEARCH_ROWS
+                                                 * int(np.median(np.diff(data_h))) + 1))
+        cell_colors = color_palette.classify_means(
+            np.concatenate(means) if means else np.zeros((0, actual_cols, 3)),
+            lambda cast: color_palette.legend_anchors(legend_band, [y - legend_top for y in data_h], data_v, cast))
+        del legend_band
+        timings["palette_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+
+        t_cells = time.perf_counter()
+        results = []
+
+        with ThreadPoolExecutor(max_workers=PIPELINE_WORKERS) as executor:
+            for r0, r1 in bands:
+                rows = [row for row in range(r0, r1) if row in floor_of]
+                if not rows:
+                    continue
+                by1 = data_h[r0]
+                band_img = image.band(by1, data_h[r1] + 1, vx1, vx2)
+                planes = ImagePlanes(band_img)
+
+                def run_row(row):
+                    y1, y2 = data_h[row] - by1, data_h[row + 1] - by1
+                    floor_data = {"floor": f"{floor_of[row]}층", "units": {}}
+                    for col, x1, x2, _, color in sample_row(band_img, planes, y1, y2, data_v_lines, actual_cols,
+                                                            cell_colors[row]):
+                        floor_data["units"][f"{col + 1}호"] = read_unit(band_img, planes, x1, y1, x2, y2,
+                                                                        color, deadline)[0]
+                    return floor_data
+
+                for floor_data in executor.map(run_row, rows):
+                    results.append(floor_data)
+                    emit_progress("row_done", row=len(results), total=len(row_floors), floor=floor_data["floor"])
+                    yield {"type": "floor", **floor_data}
+                del band_img, planes
+    finally:
+        image.close()
+
+    counts = {"GREEN": 0, "YELLOW": 0, "PINK": 0, "WHITE": 0}
+    for floor in results:
+        for unit in floor["units"].values():
+            counts[unit["color"]] += 1
+    print(f"색상 분포: {counts}", file=sys.stderr)
+    print(f"완료: {len(results)}층 x {actual_cols}호", file=sys.stderr)
+    if GLYPH_CACHE is not None:
+        GLYPH_CACHE.report()
+        GLYPH_CACHE.save()
+
+    emit_progress("ocr_done", floors=len(results), units=actual_cols)
+    timings["cells_ms"] = round((time.perf_counter() - t_cells) * 1000, 1)
+    timings["total_ms"] = round((time.perf_counter() - t_start) * 1000, 1)
+
+    result = {
+        "header": header_info,
+        "data": results
+    }
+    degraded = deadline.report()
+    if degraded is not None:
+        result["degraded"] = degraded
+        print(f"시간 예산 초과로 일부 생략: {degraded}", file=sys.stderr)
+    yield summary_record(result, timings)
+    return result
+
+
+def process_table(img, data_h, data_v, previous_state=None, state=None, timings=None, deadline=None,
+                  header_span=None, executor=None):
+    """
+    그리드가 정해진 테이블 하나 처리 → {"header", "data"} (+ "degraded", "diff")
+    - previous_state / state: 증분 처리 상태 (process_image 참고)
+    - deadline: 공유 시간 예산 (Deadline)
+    - header_span: 헤더 OCR 가로 범위 (x1, x2), None이면 이미지 전체 폭
+    - executor: 셀 작업을 넣을 공용 스레드 풀 (None이면 PIPELINE_WORKERS 크기로 새로 만듦)
+    """
+    return run_stream(iter_table(img, data_h, data_v, previous_state, state, timings, deadline, header_span,
+                                 executor))
+
+
+def iter_table(img, data_h, data_v, previous_state=None, state=None, timings=None, deadline=None,
+               header_span=None, executor=None):
+    """
+    process_table의 스트리밍 버전: header 레코드 → 층마다 floor 레코드를 yield하고 전체 결과 반환
+    - 헤더는 층 판별 직후 읽으므로 첫 층보다 먼저 나감 (그동안 행 작업은 계속 진행)
+    """
+    if timings is None:
+        timings = {}
+    if deadline is None:
+        deadline = Deadline(None)
+
     num_rows = len(data_h) - 1
     print(f"감지된 행: {num_rows}", file=sys.stderr)
 
-    # ======================================================
-    # 헤더/데이터 판별: 첫 행의 첫 열(층 번호 열)을 OCR
-    # ======================================================
-    rows_to_skip = 0
-    detected_max_floor = None
-
-    if len(data_h) > 2 and len(data_v) > 1:
-        margin = 3
-        y1, y2 = data_h[0], data_h[1]
-        x1, x2 = data_v[0], data_v[1]
-        floor_cell = img[y1+margin:y2-margin, x1+margin:x2-margin]
-
-        if floor_cell.size > 0:
-            avg = cv2.mean(floor_cell)[:3]
-            print(f"첫 행 첫 열: RGB=({avg[2]:.0f},{avg[1]:.0f},{avg[0]:.0f})", file=sys.stderr)
-
-            if OCR_AVAILABLE:
-                try:
-                    text = ocr_read_text(floor_cell, lang='eng').replace(' ', '')
-                    print(f"첫 행 첫 열 OCR: '{text}'", file=sys.stderr)
-
-                    if text.isdigit():
-                        detected_max_floor = int(text)
-                        print(f"첫 행 = {detected_max_floor}층 데이터 (건너뛰지 않음)", file=sys.stderr)
-                    else:
-                        rows_to_skip = 1
-                        print(f"첫 행 = 헤더 ('{text}'), 건너뜀", file=sys.stderr)
-
-                        # 두 번째 행에서 최대 층 번호 확인
-                        if len(data_h) > 3:
-                            y1b, y2b = data_h[1], data_h[2]
-                            cell2 = img[y1b+margin:y2b-margin, x1+margin:x2-margin]
-                            if cell2.size > 0:
-                                text2 = ocr_read_text(cell2, lang='eng').replace(' ', '')
-                                if text2.isdigit():
-                                    detected_max_floor = int(text2)
-                                    print(f"두 번째 행 = {detected_max_floor}층", file=sys.stderr)
-                except Exception as e:
-                    print(f"OCR 실패: {e}", file=sys.stderr)
-
-    if rows_to_skip > 0:
-        data_h = data_h[rows_to_skip:]
-        num_rows = len(data_h) - 1
-        print(f"헤더 {rows_to_skip}행 건너뜀 → {num_rows}행 남음", file=sys.stderr)
+    # 테이블 영역 전처리 평면 (셀 단계는 모두 여기서 슬라이스)
+    planes = ImagePlanes(img, (data_v[0], data_h[0], data_v[-1] + 1, data_h[-1] + 1))
+    emit_progress("grid_found", rows=num_rows, cols=len(data_v) - 1)
 
     if len(data_v) > 1:
         data_v_lines = data_v[1:]  # 층 열 제외, 1호부터 시작
     else:
         data_v_lines = data_v
 
-    num_cols = len(data_v_lines) - 1 if len(data_v_lines) > 1 else 16
-
-    # actual_rows: detected_max_floor가 있으면 그 값 사용 (여분 행 자동 무시)
-    if detected_max_floor and detected_max_floor <= num_rows:
-        actual_rows = detected_max_floor
-        print(f"층 번호 기반 행 수 결정: {actual_rows}행 (감지행={num_rows}, 최대층={detected_max_floor})", file=sys.stderr)
-    else:
-        actual_rows = min(num_rows, 35)
-        print(f"기본 행 수 결정: {actual_rows}행", file=sys.stderr)
-
-    actual_cols = min(num_cols, 16)
+    actual_cols = max(len(data_v_lines) - 1, 0)
 
     print(f"수직선: {len(data_v)}개 (전체), {len(data_v_lines)}개 (데이터 열)", file=sys.stderr)
     if len(data_v) > 0:
@@ -643,57 +1575,123 @@ def process_image(image_path):
     if len(data_v_lines) > 10:
         print(f"data_v_lines[10] 위치: {data_v_lines[10]}px (10호 오른쪽 경계)", file=sys.stderr)
     print(f"데이터 열: {actual_cols}개 (1호~{actual_cols}호)", file=sys.stderr)
-    print(f"오프셋 적용: {actual_rows}행 x {actual_cols}열", file=sys.stderr)
 
-    # 3. 각 셀 처리
-    results = []
-
-    for row in range(actual_rows):
-        floor_num = actual_rows - row  # 25층~1층
+    # ======================================================
+    # 파이프라인: 그리드가 정해지면 층 열 OCR / 색상 팔레트 / 헤더 OCR / 행별 셀 처리를 동시에 시작
+    #   - 행 작업은 서명을 먼저 계산하고, 층 판별 결과를 기다린 뒤 재사용/OCR
+    #   - 헤더 작업은 층 판별(헤더 행 건너뜀) 결과로 정해지는 테이블 상단을 기다린 뒤 OCR
+    #   - 셀 색상은 팔레트 작업 결과를 층 결과를 모을 때 채움
+    # ======================================================
+    def run_palette():
+        # 이미지별 색상 팔레트로 모든 셀 색상을 한 번에 분류
+        t0 = time.perf_counter()
+        cell_colors = color_palette.classify_cells(img, data_h, data_v_lines)
+        timings["palette_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        return cell_colors
+
+    def resolve_rows():
+        # 층 번호 열을 한 번에 인식해 그리드 행 → 층 매핑 (헤더/중복/여분 행 제외)
+        t0 = time.perf_counter()
+        labels = read_floor_labels(planes, data_h, data_v, deadline)
+        row_floors = map_floor_rows(labels, num_rows)
+        actual_rows = len(row_floors)
+        if row_floors:
+            print(f"층 매핑: {actual_rows}행 ({row_floors[0][1]}층~{row_floors[-1][1]}층, "
+                  f"그리드 {row_floors[0][0]}~{row_floors[-1][0]}행)", file=sys.stderr)
+        print(f"오프셋 적용: {actual_rows}행 x {actual_cols}열", file=sys.stderr)
+
+        row_index = {grid_row: row for row, (grid_row, _) in enumerate(row_floors)}
+        prev_cells = incremental.previous_cells(previous_state, [f"{floor}층" for _, floor in row_floors],
+                                                actual_cols)
+        timings["floor_ocr_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        return row_floors, row_index, prev_cells
+
+    def run_header():
+        # 이미지 상단 헤더 정보 추출 (헤더 영역이 그대로면 이전 결과 재사용)
+        row_floors = rows_future.result()[0]
+        t0 = time.perf_counter()
+        table_top_y = data_h[row_floors[0][0]] if row_floors else data_h[0]
+        header = read_header(img, table_top_y, previous_state, deadline, header_span)
+        timings["header_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        return header
+
+    def run_row(grid_row):
+        # 3. 한 행의 셀 처리 (증분 모드: 서명이 같은 셀은 이전 결과 재사용)
+        y1, y2 = data_h[grid_row], data_h[grid_row + 1]
+        samples = sample_row(img, planes, y1, y2, data_v_lines, actual_cols, classify=False)
+
+        row_floors, row_index, prev_cells = rows_future.result()
+        row = row_index.get(grid_row)
+        if row is None:
+            return None
+
+        floor_num = row_floors[row][1]
         floor_data = {
             "floor": f"{floor_num}층",
             "units": {}
         }
+        row_signatures = [None] * actual_cols
+        reused = 0
 
-        for col in range(actual_cols):
+        for col, x1, x2, signature, color in samples:
             unit_num = col + 1  # 1호~10호
+            row_signatures[col] = signature
 
-            # 행 경계
-            if row < len(data_h) - 1:
-                y1, y2 = data_h[row], data_h[row + 1]
-            else:
-                continue
-
-            # 열 경계
-            if col < len(data_v_lines) - 1:
-                x1, x2 = data_v_lines[col], data_v_lines[col + 1]
-            else:
+            # 이전 상태에서 같은 층/호 셀 (행/열이 늘거나 줄어도 라벨로 대응)
+            prev = prev_cells.get((floor_data["floor"], f"{unit_num}호")) if prev_cells is not None else None
+            if prev is not None and not incremental.signature_changed(prev[0], signature):
+                floor_data["units"][f"{unit_num}호"] = dict(prev[1])
+                reused += 1
                 continue
 
-            # 색상 샘플링 (셀 전체 영역 사용, 테두리 제외)
-            margin = 3  # 테두리 여백
-            sy1 = max(0, y1 + margin)
-            sy2 = min(h, y2 - margin)
-            sx1 = max(0, x1 + margin)
-            sx2 = min(w, x2 - margin)
-
-            roi = img[sy1:sy2, sx1:sx2]
-            if roi.size > 0:
-                # 셀 전체 영역의 평균 색상 계산
-                avg = cv2.mean(roi)[:3]
-                color = classify_color(avg[2], avg[1], avg[0])
-            else:
-                color = "WHITE"
+            # 텍스트 추출 (신뢰도, 인식 단계 포함, 시간 예산 부족 시 1단계만)
+            unit, complete = read_unit(img, planes, x1, y1, x2, y2, color, deadline)
+            if not complete:
+                row_signatures[col] = None
+            floor_data["units"][f"{unit_num}호"] = unit
 
-            # 텍스트 추출
-            text = extract_text(img, x1, y1, x2, y2)
+        return floor_data, row_signatures, reused
 
-            floor_data["units"][f"{unit_num}호"] = {
-                "text": text,
-                "color": color
-            }
+    t_cells = time.perf_counter()
+    results = []
+    signatures = []
+    reused = 0
+
+    # executor를 넘기면 그 풀에 제출하고 닫지 않음 (작업은 제출 순서대로 시작하므로 여러 테이블이 함께 써도
+    # 각 테이블의 기다림 대상이 그 테이블 행 작업보다 먼저 시작됨)
+    with ThreadPoolExecutor(max_workers=PIPELINE_WORKERS) if executor is None else nullcontext(executor) as executor:
+        # 작업자 1개여도 교착되지 않도록 기다림 대상(층 판별)을 먼저 제출
+        rows_future = executor.submit(resolve_rows)
+        palette_future = executor.submit(run_palette)
+        header_future = executor.submit(run_header)
+        row_futures = [executor.submit(run_row, grid_row) for grid_row in range(num_rows)]
+
+        row_floors, row_index, prev_cells = rows_future.result()
+        actual_rows = len(row_floors)
+        for grid_row, future in enumerate(row_futures):
+            if grid_row not in row_index:
+                future.cancel()
 
-        results.append(floor_data)
+        try:
+            header_info, header_signature = header_future.result()
+            yield {"type": "header", "header": header_info}
+
+            for grid_row, _ in row_floors:
+                floor_data, row_signatures, row_reused = row_futures[grid_row].result()
+                row_colors = palette_future.result()[grid_row]
+                for col, unit in enumerate(floor_data["units"].values()):
+                    unit["color"] = row_colors[col]
+                results.append(floor_data)
+                signatures.append(row_signatures)
+                reused += row_reused
+                emit_progress("row_done", row=len(results), total=actual_rows, floor=floor_data["floor"])
+                yield {"type": "floor", **floor_data}
+        except GeneratorExit:
+            # 소비자가 중간에 멈추면 남은 행 작업을 기다리지 않음
+            for future in row_futures:
+                future.cancel()
+            raise
+        t_rows = time.perf_counter()
 
     # 통계
     counts = {"GREEN": 0, "YELLOW": 0, "PINK": 0, "WHITE": 0}
@@ -703,28 +1701,146 @@ def process_image(image_path):
 
     print(f"색상 분포: {counts}", file=sys.stderr)
     print(f"완료: {len(results)}층 x {actual_cols}호", file=sys.stderr)
+    if prev_cells is not None:
+        print(f"증분 처리: {reused}/{actual_rows * actual_cols}셀 재사용", file=sys.stderr)
+    if GLYPH_CACHE is not None:
+        GLYPH_CACHE.report()
+        GLYPH_CACHE.save()
 
-    # 이미지 상단 헤더 정보 추출
-    table_top_y = data_h[0] if len(data_h) > 0 else 0
-    header_info = extract_header_info(img, table_top_y)
+    emit_progress("ocr_done", floors=len(results), units=actual_cols)
+    timings["cells_ms"] = round((t_rows - t_cells) * 1000, 1)
 
-    return {
+    result = {
         "header": header_info,
         "data": results
     }
+    degraded = deadline.report()
+    if degraded is not None:
+        result["degraded"] = degraded
+        print(f"시간 예산 초과로 일부 생략: {degraded}", file=sys.stderr)
+
+    if state is not None:
+        state.update({
+            "rows": actual_rows,
+            "cols": actual_cols,
+            "cells": signatures,
+            "header_signature": header_signature,
+            "result": result,
+        })
+
+    if previous_state is not None:
+        result = {**result, "diff": incremental.diff_results(previous_state['result']['data'], results)}
+        print(f"변경된 셀: {len(result['diff'])}개", file=sys.stderr)
+
+    return result
+
+
+def write_record(record):
+    """NDJSON 레코드 한 줄 출력 (바로 flush해 받는 쪽이 층 단위로 읽을 수 있게)"""
+    sys.stdout.write(json.dumps(record, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
+
+
+def parse_cli_args(argv):
+    """명령줄 인자 파싱"""
+    import argparse
+    parser = argparse.ArgumentParser(description="현황표 이미지 → JSON (v3)")
+    parser.add_argument("source", help="이미지 경로, '-'이면 표준 입력, 'shm:<이름>[:<크기>]'이면 공유 메모리")
+    parser.add_argument("--progress", action="store_true",
+                        help="진행 이벤트를 stderr에 출력 (OCR_PROGRESS=1과 동일)")
+    parser.add_argument("--previous-state", metavar="PATH",
+                        help="이전 실행 상태 파일 (바뀐 셀만 다시 인식하고 diff 출력)")
+    parser.add_argument("--state-out", metavar="PATH",
+                        help="다음 증분 실행용 상태 파일 저장 경로")
+    parser.add_argument("--history-db", metavar="PATH", default=os.environ.get('OCR_HISTORY_DB') or None,
+                        help="결과를 저장할 SQLite 이력 DB (OCR_HISTORY_DB와 동일)")
+    parser.add_argument("--deadline-ms", type=float, metavar="MS",
+                        help="처리 시간 예산 (부족하면 남은 OCR을 생략하고 degraded 결과 반환)")
+    parser.add_argument("--format", choices=["nested", "compact", "compact-bin"], default="nested",
+                        help="출력 형식: nested(층/호 JSON), compact(행렬 JSON), compact-bin(바이너리)")
+    parser.add_argument("--multi-table", action="store_true",
+                        help="이미지의 모든 테이블 처리 → {\"tables\": [...]}")
+    parser.add_argument("--strips", action="store_true",
+                        help="대형 스캔을 가로 띠 단위로 처리 (작업 메모리를 이미지 높이와 무관하게 유지)")
+    parser.add_argument("--strip-height", type=int, default=STRIP_HEIGHT, metavar="PX",
+                        help=f"--strips 띠 높이 (기본 {STRIP_HEIGHT})")
+    parser.add_argument("--ndjson", action="store_true",
+                        help="층이 끝나는 대로 한 줄씩 출력 (header → floor ... → summary 레코드)")
+    args = parser.parse_args(argv)
+    if args.ndjson and (args.format != "nested" or args.multi_table):
+        parser.error("--ndjson은 nested 형식의 단일 테이블 처리만 지원")
+    if args.strips and (args.previous_state or args.state_out or args.multi_table):
+        parser.error("--strips는 증분 처리 / --multi-table과 함께 쓸 수 없음")
+    if args.strip_height < 1:
+        parser.error("--strip-height는 1 이상")
+    if args.multi_table and (args.previous_state or args.state_out):
+        parser.error("--multi-table은 증분 처리(--previous-state / --state-out)와 함께 쓸 수 없음")
+    if args.multi_table and args.format == "compact-bin":
+        parser.error("--multi-table은 compact-bin 형식을 지원하지 않음")
+    return args
 
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
-        print(json.dumps({"error": "이미지 경로 필요"}))
+        print(json.dumps({"error": "이미지 경로 필요 ('-'이면 표준 입력)"}))
         sys.exit(1)
 
+    args = parse_cli_args(sys.argv[1:])
+    if args.progress:
+        PROGRESS_ENABLED = True
+
     try:
-        result = process_image(sys.argv[1])
+        previous_state = incremental.load_state(args.previous_state) if args.previous_state else None
+        state = {} if args.state_out else None
+        timings = {}
+        if args.ndjson:
+            if args.strips:
+                stream = iter_process_image_strips(args.source, timings, args.deadline_ms, args.strip_height)
+            else:
+                stream = iter_process_image(args.source, previous_state, state, timings, args.deadline_ms)
+            result = run_stream(stream, write_record)
+        elif args.multi_table:
+            result = process_image_tables(args.source, timings, args.deadline_ms)
+        elif args.strips:
+            result = process_image_strips(args.source, timings, args.deadline_ms, args.strip_height)
+        else:
+            result = process_image(args.source, previous_state, state, timings, args.deadline_ms)
         if result is None:
             print(json.dumps({"error": "테이블 감지 실패"}))
             sys.exit(1)
-        print(json.dumps(result, ensure_ascii=False))
+        print(f"소요 시간: {timings}", file=sys.stderr)
+        if args.history_db:
+            try:
+                import history_store
+                conn = history_store.connect(args.history_db)
+                for table in result["tables"] if args.multi_table else [result]:
+                    run_id = history_store.save_run(conn, table, describe_source(args.source), timings)
+                    print(f"이력 저장: {args.history_db} (run {run_id})", file=sys.stderr)
+                conn.close()
+            except Exception as e:
+                print(f"이력 저장 실패: {e}", file=sys.stderr)
+        if state:
+            incremental.save_state(args.state_out, state)
+        if args.ndjson:
+            pass    # 레코드는 처리 중에 이미 출력
+        elif args.format == "nested":
+            print(json.dumps(result, ensure_ascii=False))
+        elif args.multi_table:
+            compact = {"tables": [compact_result.to_compact(table) for table in result["tables"]]}
+            print(json.dumps(compact, ensure_ascii=False, separators=(',', ':')))
+        else:
+            compact = compact_result.to_compact(result)
+            if "diff" in result:
+                compact["diff"] = result["diff"]
+            if args.format == "compact":
+                print(json.dumps(compact, ensure_ascii=False, separators=(',', ':')))
+            else:
+                sys.stdout.flush()
+                sys.stdout.buffer.write(compact_result.pack(compact))
+    except PreflightError as e:
+        print(f"사전 검사 실패 [{e.code}]: {e.message} {e.metrics}", file=sys.stderr)
+        print(json.dumps(e.to_dict(), ensure_ascii=False))
+        sys.exit(2)
     except Exception as e:
         import traceback
         traceback.print_exc(file=sys.stderr)
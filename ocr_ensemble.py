@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+엔진 버전 동시 실행 → 일관성 점수가 가장 높은 결과 선택
+
+이미지를 한 번만 디코딩해 무압축 PPM 버퍼로 바꾸고, 선택한 엔진
+(v1: ocr_engine.py, v2: ocr_engine_v2.py, v3: ocr_engine_v3.py)을 각각 별도 프로세스로
+동시에 실행한다 (fork 환경에서는 버퍼를 복사 없이 공유, 엔진 쪽 디코딩은 픽셀 복사 수준).
+결과가 도착하는 대로 점수를 매기고, QUALITY_BAR를 넘는 결과가 나오면
+나머지 엔진 프로세스는 종료한다. 모두 기준 미달이면 끝까지 기다려 최고점을 고른다.
+
+점수 (0~1, score_result):
+    - 격자 규칙성: 층 번호가 1씩 줄어드는 비율 + 층별 호 수가 최빈값과 같은 비율
+    - 색상 영역 매핑 비율: 이미지에서 직접 찾은 색상 영역 격자와 결과의 색상 셀이 같은 위치·색으로
+      대응되는 비율 (행/열 이동량은 가장 잘 맞는 값으로 맞춤)
+    - OCR 신뢰도: 셀 confidence 평균 (v3만 제공, 없으면 NEUTRAL_SCORE)
+
+사용법:
+    python ocr_ensemble.py image.png [--engines v3,v2,v1] [--deadline-ms MS] [--quality-bar 0.9]
+                                     [--format nested|compact] [--ndjson]
+"""
+
+import json
+import os
+import re
+import sys
+import time
+import traceback
+from collections import Counter
+
+import cv2
+
+from image_source import read_image_buffer, describe_source
+import orientation
+import preflight
+from preflight import PreflightError
+
+sys.stdout.reconfigure(encoding='utf-8')
+sys.stderr.reconfigure(encoding='utf-8')
+
+ENGINES = ('v1', 'v2', 'v3')
+DEFAULT_ENGINES = os.environ.get('OCR_ENGINES') or 'v3,v2,v1'
+QUALITY_BAR = float(os.environ.get('OCR_ENSEMBLE_BAR', '0.9'))   # 이 점수 이상이면 나머지 엔진 종료
+
+SCORE_WEIGHTS = {'regularity': 0.3, 'mapped': 0.5, 'confidence': 0.2}
+NEUTRAL_SCORE = 0.5         # 판단 근거가 없는 항목 값 (셀 신뢰도가 없는 v1 / v2, 색상 영역이 없는 이미지)
+COLOR_MIN_SATURATION = 40   # 색상 셀로 볼 최소 채도 (HSV S)
+COLOR_MIN_VALUE = 150       # 어두운 상단 바/글자 제외 (HSV V)
+COLOR_MIN_AREA = 200        # 색상 영역 최소 면적 (px)
+HEADER_FIELDS = ('building', 'name')    # ocr_engine_v3.extract_header_info와 같은 헤더 항목
+
+
+def run_engine(name, source, deadline_ms=None):
+    """엔진 하나 실행 → {header, data} (감지 실패 시 None, 헤더를 읽지 않는 v1 / v2는 header None)"""
+    if name == 'v1':
+        import ocr_engine
+        data = ocr_engine.process_image(source)
+        return {"header": None, "data": data} if data else None
+    if name == 'v2':
+        import ocr_engine_v2
+        data = ocr_engine_v2.process_image(source)
+        return {"header": None, "data": data} if data else None
+    import ocr_engine_v3
+    return ocr_engine_v3.process_image(source, deadline_ms=deadline_ms)
+
+
+def _engine_worker(name, source, deadline_ms, conn):
+    """엔진 프로세스 본체: 결과 또는 오류 메시지를 파이프로 전달"""
+    try:
+        conn.send((run_engine(name, source, deadline_ms), None))
+    except Exception as e:
+        traceback.print_exc(file=sys.stderr)
+        conn.send((None, str(e)))
+    finally:
+        conn.close()
+
+
+def grid_index(values, size):
+    """
+    좌표 목록 → 격자 칸 번호 (size: 영역 크기 중앙값)
+    size/2 이내는 같은 칸으로 묶고, 가장 많이 모인 칸을 기준으로 칸 간격만큼 번호를 매김
+    (범례처럼 칸 사이에 놓인 영역이 뒤쪽 번호를 밀어내지 않도록)
+    """
+    clusters = []
+    for value in sorted(values):
+        if clusters and value - clusters[-1][0] <= size / 2:
+            clusters[-1].append(value)
+        else:
+            clusters.append([value])
+    centers = [sum(cluster) / len(cluster) for cluster in clusters]
+    gaps = [b - a for a, b in zip(centers, centers[1:])]
+    # 영역 크기와 비슷한 간격들의 중앙값 (빈 칸을 건너뛴 간격, 범례 등 어긋난 간격 제외)
+    steps = sorted(gap for gap in gaps if size * 0.8 <= gap <= size * 1.5)
+    pitch = steps[len(steps) // 2] if steps else size
+
+    anchor = centers[max(range(len(clusters)), key=lambda i: len(clusters[i]))]
+    index = {}
+    for center, cluster in zip(centers, clusters):
+        for value in cluster:
+            index[value] = round((center - anchor) / pitch)
+    return [index[value] for value in values]
+
+
+def region_grid(img):
+    """
+    이미지의 색상(파스텔) 영역 → {(행, 열): 색상} (엔진과 무관한 채점 기준)
+    영역 중심을 행/열로 묶어 상대 격자 번호를 매기므로 표 위치·헤더와 무관
+    """
+    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    mask = cv2.inRange(hsv, (0, COLOR_MIN_SATURATION, COLOR_MIN_VALUE), (180, 255, 255))
+    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5)))
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    regions = []
+    for contour in contours:
+        if cv2.contourArea(contour) < COLOR_MIN_AREA:
+            continue
+        x, y, w, h = cv2.boundingRect(contour)
+        hue = cv2.mean(hsv[y:y + h, x:x + w], mask=mask[y:y + h, x:x + w])[0]
+        color = 'YELLOW' if 15 <= hue < 35 else 'GREEN' if 35 <= hue < 90 else 'PINK'
+        regions.append((x + w / 2, y + h / 2, w, h, color))
+    if not regions:
+        return {}
+
+    widths = sorted(region[2] for region in regions)
+    heights = sorted(region[3] for region in regions)
+    rows = grid_index([region[1] for region in regions], heights[len(heights) // 2])
+    cols = grid_index([region[0] for region in regions], widths[len(widths) // 2])
+    return {(row, col): region[4] for row, col, region in zip(rows, cols, regions)}
+
+
+def floor_number(label):
+    match = re.search(r'\d+', str(label))
+    return int(match.group()) if match else None
+
+
+def mapped_ratio(data, regions):
+    """
+    색상 영역 매핑 비율: 행/열 이동량을 가장 잘 맞춘 상태에서 같은 색 셀에 대응되는 영역 수
+    / max(영역 수, 결과의 색상 셀 수) (빠뜨린 영역과 없는 색상 셀 모두 감점)
+    """
+    cells = {}
+    for row, floor in enumerate(data):
+        for col, (label, unit) in enumerate(floor["units"].items()):
+            color = unit.get("color", "WHITE")
+            if color != "WHITE":
+                cells[(row, (floor_number(label) or col + 1) - 1)] = color
+    if not cells and not regions:
+        return NEUTRAL_SCORE
+
+    shifts = Counter()
+    for (row, col), color in regions.items():
+        for (cell_row, cell_col), cell_color in cells.items():
+            if color == cell_color:
+                shifts[(cell_row - row, cell_col - col)] += 1
+    best = max(shifts.values(), default=0)
+    return best / max(len(regions), len(cells))
+
+
+def score_result(result, regions):
+    """결과 일관성 점수 → (score, 항목별 점수)"""
+    data = (result or {}).get("data") or []
+    if not data:
+        return 0.0, {}
+
+    numbers = [floor_number(floor["floor"]) for floor in data]
+    steps = [a is not None and b is not None and a - b == 1 for a, b in zip(numbers, numbers[1:])]
+    floor_regular = sum(steps) / len(steps) if steps else float(numbers[0] is not None)
+    counts = [len(floor["units"]) for floor in data]
+    mode = Counter(counts).most_common(1)[0][0]
+    unit_regular = sum(count == mode for count in counts) / len(counts)
+
+    parts = {
+        "regularity": (floor_regular + unit_regular) / 2,
+        "mapped": mapped_ratio(data, regions),
+    }
+    confidences = [unit["confidence"] for floor in data for unit in floor["units"].values()
+                   if "confidence" in unit]
+    parts["confidence"] = sum(confidences) / len(confidences) if confidences else NEUTRAL_SCORE
+
+    score = sum(SCORE_WEIGHTS[key] * value for key, value in parts.items())
+    return round(score, 3), {key: round(value, 3) for key, value in parts.items()}
+
+
+def normalize_image(img, img_array, timings):
+    """
+    사전 검사 + 기울기/방향 보정 (부모에서 한 번 바로잡아 모든 엔진과 채점 기준이 같은 이미지를 보도록)
+    - 방향은 v3 그리드로 판단 (v3와 같은 배율로 축소한 사본에서 감지)
+    """
+    import ocr_engine_v3
+    metrics = preflight.check_image(img, max_skew=orientation.MAX_DESKEW_DEG)
+    timings["preflight_ms"] = metrics["preflight_ms"]
+    if abs(metrics["skew_deg"]) > preflight.MAX_SKEW_DEG:
+        img = orientation.deskew(img, metrics["skew_deg"])
+        print(f"기울기 보정: {metrics['skew_deg']}°", file=sys.stderr)
+    factor = ocr_engine_v3.choose_reduce_factor(img_array)
+    small = img if factor == 1 else cv2.resize(img, None, fx=1 / factor, fy=1 / factor,
+                                               interpolation=cv2.INTER_AREA)
+    rotation = orientation.table_rotation(small, *ocr_engine_v3.detect_table_grid(small))
+    return img if rotation is None else cv2.rotate(img, rotation)
+
+
+def merge_header(best, results):
+    """
+    선택된 결과의 헤더를 v3 형식 {building, name}으로 맞춤 (어느 엔진이 이겨도 같은 스키마)
+    - 헤더를 읽지 않는 v1 / v2가 이기면 끝난 다른 엔진(v3)이 읽은 값으로 채우고, 없으면 빈 문자열
+    """
+    header = dict.fromkeys(HEADER_FIELDS, "")
+    for name in [best] + [name for name in results if name != best]:
+        for field, value in (results[name].get("header") or {}).items():
+            if value and not header.get(field):
+                header[field] = value
+    return header
+
+
+def run_ensemble(source, engines=None, deadline_ms=None, quality_bar=QUALITY_BAR, timings=None):
+    """
+    엔진 동시 실행 → 최고점 결과 {header, data, (degraded, diff), "ensemble": {...}}
+    - engines: 실행할 엔진 이름 목록 (기본 OCR_ENGINES, 'v3,v2,v1')
+    - deadline_ms: v3에 시간 예산으로 전달, 지나면 도착한 결과 중에서 선택 (없으면 첫 결과까지 대기)
+    - 모든 엔진이 실패하면 None
+    """
+    import multiprocessing
+    from multiprocessing.connection import wait
+
+    if timings is None:
+        timings = {}
+    engines = list(engines or DEFAULT_ENGINES.split(','))
+    t_start = time.perf_counter()
+
+    img_array = read_image_buffer(source)
+    preflight.check_size(img_array)
+    img = cv2.imdecode(img_array, cv2.IMREAD_COLOR)
+    if img is None:
+        raise Exception(f"이미지 로드 실패: {describe_source(source)}")
+    # 쓸 수 없는 이미지면 엔진 프로세스를 띄우기 전에 거절, 기울어지거나 돌아간 표는 바로 세워 전달
+    img = normalize_image(img, img_array, timings)
+    shared_image = cv2.imencode('.ppm', img)[1].reshape(-1)
+    timings["decode_ms"] = round((time.perf_counter() - t_start) * 1000, 1)
+    print(f"앙상블: {', '.join(engines)} 동시 실행 ({img.shape[1]} x {img.shape[0]})", file=sys.stderr)
+
+    pending = {}
+    results, scores = {}, {}
+    try:
+        for name in engines:
+            reader, writer = multiprocessing.Pipe(duplex=False)
+            proc = multiprocessing.Process(target=_engine_worker, args=(name, shared_image, deadline_ms, writer),
+                                           daemon=True)
+            proc.start()
+            writer.close()
+            pending[reader] = (name, proc)
+
+        # 엔진이 도는 동안 채점 기준값 계산
+        regions = region_grid(img)
+        del img
+        print(f"색상 영역: {len(regions)}개", file=sys.stderr)
+
+        deadline = t_start + deadline_ms / 1000 if deadline_ms else None
+        while pending:
+            timeout = max(0.0, deadline - time.perf_counter()) if deadline and results else None
+            ready = wait(list(pending), timeout)
+            if not ready:
+                print("시간 예산 초과: 도착한 결과 중에서 선택", file=sys.stderr)
+                break
+            for reader in ready:
+                name, proc = pending.pop(reader)
+                try:
+                    result, error = reader.recv()
+                except EOFError:
+                    result, error = None, f"프로세스 비정상 종료 (code {proc.exitcode})"
+                reader.close()
+                proc.join()
+                timings[f"{name}_ms"] = round((time.perf_counter() - t_start) * 1000, 1)
+                if result is None:
+                    scores[name] = 0.0
+                    print(f"[{name}] 실패: {error or '테이블 감지 실패'}", file=sys.stderr)
+                    continue
+                scores[name], parts = score_result(result, regions)
+                results[name] = result
+                print(f"[{name}] 점수 {scores[name]} {parts}", file=sys.stderr)
+            if any(score >= quality_bar for score in scores.values()):
+                break
+    finally:
+        for reader, (name, proc) in pending.items():
+            proc.terminate()
+            proc.join()
+            reader.close()
+
+    cancelled = [name for name, _ in pending.values()]
+    if cancelled:
+        print(f"취소된 엔진: {', '.join(cancelled)}", file=sys.stderr)
+    timings["total_ms"] = round((time.perf_counter() - t_start) * 1000, 1)
+    if not results:
+        return None
+
+    best = max(results, key=lambda name: scores[name])
+    print(f"선택: {best} (점수 {scores[best]})", file=sys.stderr)
+    return {**results[best], "header": merge_header(best, results),
+            "ensemble": {"engine": best, "scores": scores, "cancelled": cancelled}}
+
+
+def parse_cli_args(argv):
+    """명령줄 인자 파싱"""
+    import argparse
+    parser = argparse.ArgumentParser(description="현황표 이미지 → JSON (엔진 앙상블)")
+    parser.add_argument("source", help="이미지 경로, '-'이면 표준 입력, 'shm:<이름>[:<크기>]'이면 공유 메모리")
+    parser.add_argument("--engines", default=DEFAULT_ENGINES,
+                        help=f"동시에 실행할 엔진 (쉼표 구분, OCR_ENGINES와 동일, 기본 {DEFAULT_ENGINES})")
+    parser.add_argument("--quality-bar", type=float, default=QUALITY_BAR,
+                        help=f"이 점수 이상인 결과가 나오면 나머지 엔진 종료 (OCR_ENSEMBLE_BAR, 기본 {QUALITY_BAR})")
+    parser.add_argument("--history-db", metavar="PATH", default=os.environ.get('OCR_HISTORY_DB') or None,
+                        help="선택된 결과를 저장할 SQLite 이력 DB (OCR_HISTORY_DB와 동일)")
+    parser.add_argument("--deadline-ms", type=float, metavar="MS",
+                        help="처리 시간 예산 (v3에 전달, 지나면 도착한 결과 중에서 선택)")
+    parser.add_argument("--format", choices=["nested", "compact"], default="nested",
+                        help="출력 형식: nested(층/호 JSON), compact(행렬 JSON)")
+    parser.add_argument("--ndjson", action="store_true",
+                        help="선택된 결과를 header → floor ... → summary 레코드로 출력")
+    args = parser.parse_args(argv)
+    args.engines = [name.strip() for name in args.engines.split(',') if name.strip()]
+    unknown = [name for name in args.engines if name not in ENGINES]
+    if unknown or not args.engines:
+        parser.error(f"알 수 없는 엔진: {', '.join(unknown) or '(없음)'} (사용 가능: {', '.join(ENGINES)})")
+    if args.ndjson and args.format != "nested":
+        parser.error("--ndjson은 nested 형식만 지원")
+    return args
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(json.dumps({"error": "이미지 경로 필요 ('-'이면 표준 입력)"}))
+        sys.exit(1)
+
+    args = parse_cli_args(sys.argv[1:])
+
+    try:
+        timings = {}
+        result = run_ensemble(args.source, args.engines, args.deadline_ms, args.quality_bar, timings)
+        if result is None:
+            print(json.dumps({"error": "테이블 감지 실패"}))
+            sys.exit(1)
+        print(f"소요 시간: {timings}", file=sys.stderr)
+        if args.history_db:
+            try:
+                import history_store
+                conn = history_store.connect(args.history_db)
+                run_id = history_store.save_run(conn, result, describe_source(args.source), timings)
+                conn.close()
+                print(f"이력 저장: {args.history_db} (run {run_id})", file=sys.stderr)
+            except Exception as e:
+                print(f"이력 저장 실패: {e}", file=sys.stderr)
+        if args.ndjson:
+            from ocr_engine_v3 import summary_record, write_record
+            write_record({"type": "header", "header": result["header"]})
+            for floor in result["data"]:
+                write_record({"type": "floor", **floor})
+            write_record({**summary_record(result, timings), "ensemble": result["ensemble"]})
+        elif args.format == "nested":
+            print(json.dumps(result, ensure_ascii=False))
+        else:
+            import compact_result
+            compact = compact_result.to_compact(result)
+            compact["ensemble"] = result["ensemble"]
+            print(json.dumps(compact, ensure_ascii=False, separators=(',', ':')))
+    except PreflightError as e:
+        print(f"사전 검사 실패 [{e.code}]: {e.message} {e.metrics}", file=sys.stderr)
+        print(json.dumps(e.to_dict(), ensure_ascii=False))
+        sys.exit(2)
+    except Exception as e:
+        traceback.print_exc(file=sys.stderr)
+        print(json.dumps({"error": str(e)}))
+        sys.exit(1)
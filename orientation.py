@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+표 방향 / 기울기 보정 (find_grid_lines는 축에 정렬된 라인만 찾으므로 그리드 감지 전후에 한 번 바로잡음)
+
+- 기울기: 사전 검사(preflight.measure_lines)가 썸네일에서 잰 수평선 각도로 warpAffine 한 번
+- 90° / 180° 회전: 감지된 그리드 바깥 테두리 띠 중 라벨 띠(층 번호 열, 호 번호 행: 글자만 있고 색이 없는 셀)가
+  위/왼쪽이 아니면 cv2.rotate 한 번 후 그리드 재감지
+"""
+
+import sys
+
+import cv2
+import numpy as np
+
+MAX_DESKEW_DEG = 10.0       # 이보다 많이 기울어진 표는 보정하지 않고 거절 (preflight 탐색 범위 ±15° 안쪽)
+LABEL_MIN_SCORE = 0.6       # 라벨 띠로 볼 최소 점수 (띠의 셀 중 글자만 있고 색이 없는 셀 비율)
+LABEL_MARGIN = 0.3          # 반대쪽 띠보다 이만큼 높아야 방향으로 인정
+CELL_INSET = 0.2            # 격자선을 피하려고 셀 가장자리에서 잘라낼 비율
+INK_MAX_VALUE = 110         # 글자로 볼 어두운 화소 (HSV V)
+INK_MIN_RATIO = 0.01        # 셀 안쪽에서 글자 화소 최소 비율
+INK_MAX_SPAN = 0.9          # 글자 화소가 셀 폭/높이를 거의 다 덮으면 선(테두리)으로 보고 제외
+COLOR_MIN_SATURATION = 40   # 색상 셀로 볼 배경 채도 (ocr_ensemble과 같은 기준)
+
+# (라벨 행 위치, 라벨 열 위치) → 바로 세우는 회전 (시계 방향으로 돌아간 이미지는 층 열이 위, 호 행이 오른쪽)
+ROTATIONS = {
+    ("top", "left"): None,
+    ("top", "right"): cv2.ROTATE_90_COUNTERCLOCKWISE,
+    ("bottom", "left"): cv2.ROTATE_90_CLOCKWISE,
+    ("bottom", "right"): cv2.ROTATE_180,
+}
+ROTATION_NAMES = {
+    cv2.ROTATE_90_COUNTERCLOCKWISE: "반시계 90°",
+    cv2.ROTATE_90_CLOCKWISE: "시계 90°",
+    cv2.ROTATE_180: "180°",
+}
+
+
+def deskew(img, skew_deg):
+    """
+    기울기 보정 (warpAffine 한 번, 모서리가 잘리지 않도록 캔버스 확장)
+    - skew_deg: preflight.measure_lines 기울기 (수평선이 오른쪽으로 내려가면 +)
+    """
+    h, w = img.shape[:2]
+    matrix = cv2.getRotationMatrix2D((w / 2, h / 2), skew_deg, 1.0)
+    cos, sin = abs(matrix[0, 0]), abs(matrix[0, 1])
+    out_w, out_h = int(round(h * sin + w * cos)), int(round(h * cos + w * sin))
+    matrix[0, 2] += (out_w - w) / 2
+    matrix[1, 2] += (out_h - h) / 2
+    # 바깥은 가장자리 화소 반복 (상수 색으로 채우면 새 경계선이 격자선으로 잡힘)
+    return cv2.warpAffine(img, matrix, (out_w, out_h), flags=cv2.INTER_LINEAR, borderMode=cv2.BORDER_REPLICATE)
+
+
+def _is_label_cell(hsv):
+    """셀 안쪽 HSV → 글자가 있고 배경에 색이 없으면 True"""
+    value = hsv[..., 2]
+    ink = value < INK_MAX_VALUE
+    if np.count_nonzero(ink) < INK_MIN_RATIO * ink.size:
+        return False
+    if ink.any(axis=0).mean() > INK_MAX_SPAN or ink.any(axis=1).mean() > INK_MAX_SPAN:
+        return False
+    return np.median(hsv[..., 1][~ink]) < COLOR_MIN_SATURATION
+
+
+def _band_score(hsv, spans, bounds, horizontal):
+    """
+    띠 하나의 라벨 점수
+    - spans: 띠를 나누는 셀 경계 (가로 띠면 열 경계), bounds: 띠의 (시작, 끝) 좌표
+    """
+    lo, hi = bounds
+    if hi - lo < 4:
+        return 0.0
+    inset = int((hi - lo) * CELL_INSET)
+    hits = 0
+    for a, b in zip(spans[:-1], spans[1:]):
+        pad = int((b - a) * CELL_INSET)
+        if horizontal:
+            cell = hsv[lo + inset:hi - inset, a + pad:b - pad]
+        else:
+            cell = hsv[a + pad:b - pad, lo + inset:hi - inset]
+        hits += cell.size > 0 and _is_label_cell(cell)
+    return hits / max(1, len(spans) - 1)
+
+
+def label_scores(img, data_h, data_v):
+    """
+    그리드 네 변의 라벨 점수 {"top", "bottom", "left", "right"}
+    - 각 변은 그리드 안쪽 첫 행/열과 바로 바깥의 같은 두께 띠 중 높은 점수
+      (라벨 띠는 데이터 셀과 크기가 달라 그리드에서 빠지기도 함)
+    """
+    h, w = img.shape[:2]
+    x1, x2 = max(0, data_v[0]), min(w, data_v[-1])
+    y1, y2 = max(0, data_h[0]), min(h, data_h[-1])
+    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    row_top, row_bottom = data_h[1] - data_h[0], data_h[-1] - data_h[-2]
+    col_left, col_right = data_v[1] - data_v[0], data_v[-1] - data_v[-2]
+    bands = {
+        "top": (data_v, True, [(y1, data_h[1]), (max(0, y1 - row_top), y1)]),
+        "bottom": (data_v, True, [(data_h[-2], y2), (y2, min(h, y2 + row_bottom))]),
+        "left": (data_h, False, [(x1, data_v[1]), (max(0, x1 - col_left), x1)]),
+        "right": (data_h, False, [(data_v[-2], x2), (x2, min(w, x2 + col_right))]),
+    }
+    return {side: round(float(max(_band_score(hsv, spans, bounds, horizontal) for bounds in candidates)), 2)
+            for side, (spans, horizontal, candidates) in bands.items()}
+
+
+def _pick(scores, first, second):
+    """두 변 중 라벨 띠 (점수가 낮거나 차이가 작으면 None)"""
+    a, b = scores[first], scores[second]
+    if max(a, b) < LABEL_MIN_SCORE or abs(a - b) < LABEL_MARGIN:
+        return None
+    return first if a > b else second
+
+
+def table_rotation(img, data_h, data_v):
+    """
+    그리드의 라벨 띠 위치 → 표를 바로 세울 cv2.rotate 코드 (이미 바르거나 판단할 수 없으면 None)
+    - 층 번호 열과 호 번호 행이 모두 뚜렷할 때만 회전 (한쪽만 보이면 90° / 180°를 구분할 수 없음)
+    """
+    if data_h is None or len(data_h) < 3 or len(data_v) < 3:
+        return None
+    scores = label_scores(img, data_h, data_v)
+    sides = (_pick(scores, "top", "bottom"), _pick(scores, "left", "right"))
+    rotation = ROTATIONS.get(sides)
+    if rotation is not None:
+        print(f"표 방향: 라벨 띠 {sides} {scores} → {ROTATION_NAMES[rotation]} 회전", file=sys.stderr)
+    return rotation
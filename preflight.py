@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+사전 품질 검사 (그리드 감지 전에 쓸 수 없는 이미지를 몇 ms 안에 걸러냄)
+
+해상도는 디코딩 전에 헤더로, 흐림은 처리 해상도 그대로의 가운데 영역으로,
+나머지는 긴 변 PREFLIGHT_SIDE 이하 썸네일로 확인한다.
+    - 해상도: 짧은 변 MIN_SIDE 미만                        → IMAGE_TOO_SMALL
+    - 대비: 썸네일 그레이 표준편차 MIN_CONTRAST 미만 (빈 화면) → NO_TABLE
+    - 흐림: 엣지 선명도 MIN_EDGE_SHARPNESS 미만               → IMAGE_BLURRY
+    - 격자선: 수평/수직 긴 직선(Hough)이 MIN_LINES 미만        → NO_TABLE
+      (한 축만 부족하면 썸네일 배율을 절반씩 줄여 다시 셈: 높은 타워형 표는 행 간격이 몇 px로 줄어 선이 합쳐짐)
+    - 기울기: 가장 강한 수평선 각도가 max_skew 초과           → IMAGE_SKEWED
+      (일반 처리는 orientation.deskew로 보정하므로 orientation.MAX_DESKEW_DEG, 띠 처리는 MAX_SKEW_DEG)
+실패 시 PreflightError(code, message, metrics), 통과 시 측정값 dict 반환
+"""
+
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from image_source import read_image_size
+
+PREFLIGHT_SIDE = 800        # 썸네일 긴 변 (locate_table_roi와 같은 축소 크기)
+MIN_SIDE = 300              # 원본 짧은 변 최소 px
+MIN_CONTRAST = 8.0          # 썸네일 그레이 표준편차 최소값 (빈 화면 / 단색 이미지 제외)
+MIN_EDGE_SHARPNESS = 0.65   # 엣지 선명도 최소값 (1.0: 1px 계단, σ=1.25 블러 ≈ 0.68, σ=1.5 ≈ 0.62에서 그리드 감지 실패)
+EDGE_MIN_RANGE = 60         # 선명도 측정에 쓸 엣지의 최소 밝기 차
+EDGE_WINDOW = 9             # 엣지 주변 밝기 범위 / 최대 기울기를 찾을 창 크기
+MIN_LINES = 3               # 수평/수직 격자선 최소 개수
+LINE_MIN_SPAN = 0.25        # 격자선으로 볼 최소 길이 (썸네일 너비/높이 대비, Hough 투표 수 기준)
+LINE_SEARCH_DEG = 15.0      # 기울기 탐색 범위 (±도)
+LINE_COARSE_DEG = 1.0       # 1차 Hough 각도 간격 (도)
+LINE_FINE_DEG = 0.1         # 기울기 정밀화 각도 간격 (도)
+MAX_SKEW_DEG = 0.3          # 보정 없이 허용하는 기울기 (find_grid_lines는 0.5°만 기울어도 라인을 놓침)
+
+
+class PreflightError(Exception):
+    """사전 검사 실패 (code: 클라이언트가 분기할 오류 코드, metrics: 측정값)"""
+
+    def __init__(self, code, message, metrics=None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.metrics = metrics or {}
+
+    def to_dict(self):
+        return {"error": self.message, "code": self.code, "metrics": self.metrics}
+
+
+def check_size(img_array):
+    """디코딩 전 헤더로 해상도 검사 (크기를 알 수 없는 형식은 통과, check_image에서 다시 확인)"""
+    size = read_image_size(img_array)
+    if size is not None:
+        _check_side(*size)
+
+
+def _check_side(width, height):
+    if min(width, height) < MIN_SIDE:
+        raise PreflightError("IMAGE_TOO_SMALL",
+                             f"이미지 해상도가 너무 낮습니다 ({width} x {height}). "
+                             f"짧은 변이 {MIN_SIDE}px 이상인 원본 이미지를 올려 주세요.",
+                             {"width": width, "height": height})
+
+
+def thumbnail(img, side=PREFLIGHT_SIDE):
+    """긴 변 side 이하 그레이 썸네일 (정수 배율 INTER_AREA: 블록 평균이라 분수 배율보다 훨씬 빠름)"""
+    if img.ndim == 3:
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    factor = -(-max(img.shape[:2]) // side)
+    if factor > 1:
+        img = cv2.resize(img, None, fx=1 / factor, fy=1 / factor, interpolation=cv2.INTER_AREA)
+    return img
+
+
+def edge_sharpness(gray):
+    """
+    엣지 선명도 (0~1): 뚜렷한 엣지에서 인접 화소 차(최대 기울기) / 주변 밝기 범위의 중앙값
+    - 1px 계단 엣지면 1, 흐릴수록 엣지가 넓어져 작아짐. 엣지 개수·밝기와 무관 (Laplacian 분산은 표의 밀도에 따라
+      같은 흐림에서도 수십 배 차이)
+    - 측정할 엣지가 없으면 None
+    """
+    kernel = np.ones((EDGE_WINDOW, EDGE_WINDOW), np.uint8)
+    local_range = cv2.morphologyEx(gray, cv2.MORPH_GRADIENT, kernel).astype(np.float32)
+    gx = cv2.Sobel(gray, cv2.CV_32F, 1, 0, ksize=1)
+    gy = cv2.Sobel(gray, cv2.CV_32F, 0, 1, ksize=1)
+    magnitude = cv2.magnitude(gx, gy)
+    peaks = (local_range > EDGE_MIN_RANGE) & (magnitude == cv2.dilate(magnitude, kernel))
+    if not peaks.any():
+        return None
+    return float(np.median(magnitude[peaks] / local_range[peaks]))
+
+
+def center_crop(img, side=PREFLIGHT_SIDE):
+    """가운데 side x side 영역 (그레이, 처리 해상도 그대로: 축소하면 흐림이 가려짐)"""
+    h, w = img.shape[:2]
+    y, x = max(0, (h - side) // 2), max(0, (w - side) // 2)
+    crop = img[y:y + side, x:x + side]
+    return cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+
+
+def _hough(edges, votes, lo_deg, hi_deg, step_deg):
+    """표준 Hough (각도 범위 제한) → (rho 배열, theta(도) 배열)"""
+    lines = cv2.HoughLines(edges, 1, np.radians(step_deg), votes,
+                           min_theta=np.radians(max(0.0, lo_deg)), max_theta=np.radians(min(180.0, hi_deg)))
+    if lines is None:
+        return np.empty(0), np.empty(0)
+    return lines[:, 0, 0], np.degrees(lines[:, 0, 1])
+
+
+def _count_lines(rho, theta, min_gap=3):
+    """
+    가장 강한 선과 같은 각도 bin의 rho → 서로 다른 선 수
+    (촘촘한 격자에서는 기울어진 가설도 여러 선을 가로질러 투표를 모으므로 다른 각도는 제외,
+    같은 선의 양쪽 엣지는 min_gap 이내로 묶음)
+    """
+    if rho.size == 0:
+        return 0
+    rho = np.sort(rho[np.abs(theta - theta[0]) < LINE_COARSE_DEG / 2])
+    return 1 + int(np.count_nonzero(np.diff(rho) > min_gap))
+
+
+def measure_lines(gray):
+    """
+    썸네일 → (수평선 수, 수직선 수, 기울기(도))
+    - LINE_COARSE_DEG 간격 Hough로 선 수와 대략적인 각도를 구하고, 가장 강한 수평선 각도
+      ±LINE_COARSE_DEG를 LINE_FINE_DEG 간격으로 다시 투표해 기울기 결정 (각도 bin 수가 적어 빠름)
+    - 기울기: 수평선이 오른쪽으로 내려가면 +, 올라가면 - (cv2.getRotationMatrix2D(중심, 기울기, 1)로 보정)
+    """
+    edges = cv2.Canny(gray, 50, 150)
+    h, w = gray.shape
+    h_votes, v_votes = max(10, int(w * LINE_MIN_SPAN)), max(10, int(h * LINE_MIN_SPAN))
+
+    h_rho, h_theta = _hough(edges, h_votes, 90 - LINE_SEARCH_DEG, 90 + LINE_SEARCH_DEG, LINE_COARSE_DEG)
+    # 수직선은 0° / 180° 양쪽에 걸리므로 두 범위로 나눠 투표 (180° 근처는 180°를 빼고 rho 부호를 뒤집어 합침)
+    left = _hough(edges, v_votes, 0, LINE_SEARCH_DEG, LINE_COARSE_DEG)
+    right = _hough(edges, v_votes, 180 - LINE_SEARCH_DEG, 180, LINE_COARSE_DEG)
+    v_lines = max(_count_lines(left[0], left[1]), _count_lines(-right[0], right[1] - 180))
+
+    skew = 0.0
+    if h_theta.size:
+        peak = h_theta[0]   # 투표 수 순으로 정렬되어 있음
+        _, fine = _hough(edges, h_votes, peak - LINE_COARSE_DEG, peak + LINE_COARSE_DEG, LINE_FINE_DEG)
+        skew = (fine[0] if fine.size else peak) - 90
+    return _count_lines(h_rho, h_theta), v_lines, round(float(skew), 2)
+
+
+def measure_grid(img, gray):
+    """
+    격자선 측정 (measure_lines), 한 축만 MIN_LINES 미만이면 썸네일 긴 변을 두 배씩 늘려 다시 측정
+    - 150층 표는 긴 변 800px 썸네일에서 행 간격이 4~5px라 수평선이 2개로 합쳐짐 (수직선은 충분)
+    - 두 축 모두 부족하면(빈 화면 / 글자만 있는 이미지) 바로 반환, 원본 해상도에 닿으면 중단
+    """
+    side = PREFLIGHT_SIDE
+    lines = measure_lines(gray)
+    while min(lines[:2]) < MIN_LINES <= max(lines[:2]) and gray.shape[:2] != img.shape[:2]:
+        side *= 2
+        gray = thumbnail(img, side)
+        lines = measure_lines(gray)
+    return lines
+
+
+def check_image(img, size=None, crop=None, max_skew=MAX_SKEW_DEG):
+    """
+    디코딩된 이미지 사전 검사 → 측정값 dict
+    {"contrast", "sharpness", "h_lines", "v_lines", "skew_deg", "preflight_ms"} (실패 시 PreflightError)
+    - img 대신 축소 개요 이미지를 넘길 때(띠 처리)는 size: 원본 (w, h), crop: 원본 배율의 가운데 영역
+    - max_skew: 거절할 기울기 (보정할 수 있는 호출자는 더 크게 지정)
+    """
+    t_start = time.perf_counter()
+    if size is None:
+        size = img.shape[1], img.shape[0]
+    _check_side(*size)
+
+    gray = thumbnail(img)
+    metrics = {"contrast": round(float(gray.std()), 1)}
+    if metrics["contrast"] < MIN_CONTRAST:
+        raise PreflightError("NO_TABLE", "이미지에 내용이 없습니다 (빈 화면 또는 단색). 현황표 화면을 올려 주세요.", metrics)
+    sharpness = edge_sharpness(center_crop(img if crop is None else crop))
+    metrics["sharpness"] = None if sharpness is None else round(sharpness, 3)
+    if sharpness is not None and sharpness < MIN_EDGE_SHARPNESS:
+        raise PreflightError("IMAGE_BLURRY",
+                             "이미지가 흐려 격자와 글자를 읽을 수 없습니다. "
+                             "초점을 맞춰 다시 촬영하거나 원본 스크린샷을 올려 주세요.", metrics)
+
+    metrics["h_lines"], metrics["v_lines"], metrics["skew_deg"] = measure_grid(img, gray)
+    metrics["preflight_ms"] = round((time.perf_counter() - t_start) * 1000, 1)
+    if metrics["h_lines"] < MIN_LINES or metrics["v_lines"] < MIN_LINES:
+        raise PreflightError("NO_TABLE",
+                             f"표 격자선을 찾을 수 없습니다 (수평 {metrics['h_lines']}개, 수직 {metrics['v_lines']}개). "
+                             "표 전체가 보이는 이미지를 올려 주세요.", metrics)
+    if abs(metrics["skew_deg"]) > max_skew:
+        raise PreflightError("IMAGE_SKEWED",
+                             f"표가 {abs(metrics['skew_deg']):.1f}° 기울어져 있습니다. "
+                             "표가 수평이 되도록 다시 촬영하거나 스크린샷을 올려 주세요.", metrics)
+
+    print(f"사전 검사 통과: {metrics}", file=sys.stderr)
+    return metrics
@@ -0,0 +1,197 @@
+// Python 엔진 서브프로세스 공용 스케줄러
+// - 전체 / 종류별 동시 실행 수 제한 (CPU 수 기반 기본값)
+// - 대기열 길이 제한 + 대기 시간 초과 시 거절
+// - 대기열 길이, 대기 시간, 실행 시간 지표 수집
+const os = require('os');
+
+const CPU_COUNT = typeof os.availableParallelism === 'function'
+    ? os.availableParallelism()
+    : os.cpus().length;
+
+function envInt(name, fallback) {
+    const value = parseInt(process.env[name] || '', 10);
+    return Number.isFinite(value) && value > 0 ? value : fallback;
+}
+
+// 종류별 기본 동시 실행 수 (OCR은 CPU를 많이 쓰고, 엑셀 변환은 가벼움)
+const DEFAULT_LIMITS = {
+    ocr: envInt('PY_LIMIT_OCR', Math.max(1, CPU_COUNT - 1)),
+    'basic-excel': envInt('PY_LIMIT_BASIC_EXCEL', 2),
+    'convert-excel': envInt('PY_LIMIT_CONVERT_EXCEL', 2),
+    'floor-unit': envInt('PY_LIMIT_FLOOR_UNIT', 2)
+};
+
+const WAIT_SAMPLE_SIZE = 200;  // 대기 시간 백분위 계산용 최근 표본 수
+
+class SchedulerError extends Error {
+    constructor(code, message) {
+        super(message);
+        this.code = code;
+        this.status = 503;  // 서비스 과부하
+    }
+}
+
+function createTypeStats() {
+    return {
+        running: 0,
+        queued: 0,
+        started: 0,
+        completed: 0,
+        failed: 0,
+        rejected: 0,
+        timedOut: 0,
+        waitSamples: [],
+        maxWaitMs: 0,
+        totalRunMs: 0
+    };
+}
+
+function percentile(sorted, p) {
+    if (sorted.length === 0) return 0;
+    const idx = Math.min(sorted.length - 1, Math.floor(sorted.length * p));
+    return sorted[idx];
+}
+
+class PythonScheduler {
+    constructor({
+        maxConcurrency = envInt('PY_MAX_CONCURRENCY', CPU_COUNT),
+        maxQueue = envInt('PY_MAX_QUEUE', 100),
+        queueTimeoutMs = envInt('PY_QUEUE_TIMEOUT_MS', 30000),
+        limits = DEFAULT_LIMITS
+    } = {}) {
+        this.maxConcurrency = maxConcurrency;
+        this.maxQueue = maxQueue;
+        this.queueTimeoutMs = queueTimeoutMs;
+        this.limits = { ...limits };
+        this.running = 0;
+        this.queue = [];  // { type, task, resolve, reject, enqueuedAt, timer }
+        this.stats = {};
+    }
+
+    typeStats(type) {
+        if (!this.stats[type]) this.stats[type] = createTypeStats();
+        return this.stats[type];
+    }
+
+    canStart(type) {
+        const limit = this.limits[type] || this.maxConcurrency;
+        return this.running < this.maxConcurrency && this.typeStats(type).running < limit;
+    }
+
+    // task: 슬롯 확보 후 호출되는 함수 (Promise 반환)
+    // queueTimeoutMs: 0이면 대기 시간 제한 없음 (비동기 작업 큐용)
+    run(type, task, { queueTimeoutMs = this.queueTimeoutMs } = {}) {
+        const stats = this.typeStats(type);
+
+        return new Promise((resolve, reject) => {
+            const entry = { type, task, resolve, reject, enqueuedAt: Date.now(), timer: null };
+
+            // 같은 종류의 대기 작업이 없고 슬롯이 있으면 바로 시작
+            if (stats.queued === 0 && this.canStart(type)) {
+                this.start(entry);
+                return;
+            }
+
+            if (this.queue.length >= this.maxQueue) {
+                stats.rejected++;
+                reject(new SchedulerError('QUEUE_FULL', '서버가 혼잡합니다. 잠시 후 다시 시도하세요.'));
+                return;
+            }
+
+            if (queueTimeoutMs > 0) {
+                entry.timer = setTimeout(() => {
+                    const idx = this.queue.indexOf(entry);
+                    if (idx === -1) return;
+                    this.queue.splice(idx, 1);
+                    stats.queued--;
+                    stats.timedOut++;
+                    reject(new SchedulerError('QUEUE_TIMEOUT',
+                        `대기 시간 초과 (${queueTimeoutMs}ms). 잠시 후 다시 시도하세요.`));
+                }, queueTimeoutMs);
+            }
+
+            stats.queued++;
+            this.queue.push(entry);
+        });
+    }
+
+    start(entry) {
+        const stats = this.typeStats(entry.type);
+        const waitMs = Date.now() - entry.enqueuedAt;
+        stats.waitSamples.push(waitMs);
+        if (stats.waitSamples.length > WAIT_SAMPLE_SIZE) stats.waitSamples.shift();
+        stats.maxWaitMs = Math.max(stats.maxWaitMs, waitMs);
+        stats.started++;
+        stats.running++;
+        this.running++;
+
+        const startedAt = Date.now();
+        Promise.resolve()
+            .then(() => entry.task())
+            .then((value) => {
+                stats.completed++;
+                entry.resolve(value);
+            }, (error) => {
+                stats.failed++;
+                entry.reject(error);
+            })
+            .finally(() => {
+                stats.totalRunMs += Date.now() - startedAt;
+                stats.running--;
+                this.running--;
+                this.drain();
+            });
+    }
+
+    // 종류별 제한에 걸리지 않는 가장 오래된 대기 작업부터 시작
+    drain() {
+        for (let i = 0; i < this.queue.length && this.running < this.maxConcurrency;) {
+            const entry = this.queue[i];
+            if (this.canStart(entry.type)) {
+                this.queue.splice(i, 1);
+                if (entry.timer) clearTimeout(entry.timer);
+                this.typeStats(entry.type).queued--;
+                this.start(entry);
+            } else {
+                i++;
+            }
+        }
+    }
+
+    metrics() {
+        const types = {};
+        for (const [type, stats] of Object.entries(this.stats)) {
+            const sorted = [...stats.waitSamples].sort((a, b) => a - b);
+            const avgWait = sorted.length ? sorted.reduce((a, b) => a + b, 0) / sorted.length : 0;
+            const finished = stats.completed + stats.failed;
+            types[type] = {
+                limit: this.limits[type] || this.maxConcurrency,
+                running: stats.running,
+                queued: stats.queued,
+                started: stats.started,
+                completed: stats.completed,
+                failed: stats.failed,
+                rejected: stats.rejected,
+                timedOut: stats.timedOut,
+                waitMs: {
+                    avg: Math.round(avgWait),
+                    p50: percentile(sorted, 0.5),
+                    p95: percentile(sorted, 0.95),
+                    max: stats.maxWaitMs
+                },
+                avgRunMs: finished ? Math.round(stats.totalRunMs / finished) : 0
+            };
+        }
+        return {
+            cpus: CPU_COUNT,
+            maxConcurrency: this.maxConcurrency,
+            maxQueue: this.maxQueue,
+            queueTimeoutMs: this.queueTimeoutMs,
+            running: this.running,
+            queueDepth: this.queue.length,
+            types
+        };
+    }
+}
+
+module.exports = { PythonScheduler, SchedulerError, CPU_COUNT };
@@ -4,7 +4,9 @@ const multer = require('multer');
 const cors = require('cors');
 const fs = require('fs');
 const path = require('path');
+const crypto = require('crypto');
 const { spawn } = require('child_process');
+const { PythonScheduler } = require('./python_scheduler');
 
 const app = express();
 const port = process.env.PORT || 3500;
@@ -22,19 +24,107 @@ if (!fs.existsSync('uploads')) {
 }
 const upload = multer({ dest: 'uploads/' });
 
+// 모든 Python 엔진 실행은 공용 스케줄러를 거침 (동시 실행 수 제한 + 대기열)
+const pythonScheduler = new PythonScheduler();
+// 동시 OCR 프로세스 수 (OCR 프로세스에 PY_LIMIT_OCR로 넘겨 프로세스 안 스레드 수를 CPU 수 / 이 값으로 맞춤)
+const OCR_CONCURRENCY = Math.min(pythonScheduler.limits.ocr, pythonScheduler.maxConcurrency);
+// OCR 이미지는 디스크에 쓰지 않고 메모리 버퍼로 받아 Python 표준 입력으로 전달
+const imageUpload = multer({
+    storage: multer.memoryStorage(),
+    limits: { fileSize: parseInt(process.env.MAX_IMAGE_BYTES || '', 10) || 50 * 1024 * 1024 }
+});
+
+// Python 진행 이벤트 접두어 (ocr_engine_v3.emit_progress)
+const PROGRESS_PREFIX = '@@progress ';
+
 // Python 스크립트 실행 함수 (v3 - 자동 그리드 감지 + 텍스트)
-function runPythonOCR(imagePath) {
+// imageBuffer: 업로드된 이미지 바이트 (표준 입력 '-'으로 전달)
+// onProgress: 진행 이벤트 콜백 (지정 시 --progress로 실행)
+// onStart: 스케줄러 슬롯을 얻어 실제 실행이 시작될 때 호출
+// queueTimeoutMs: 스케줄러 대기 시간 제한 (0이면 무제한)
+// format: 'compact'이면 행렬 형태 압축 JSON (compact_result.py)
+// deadlineMs: 요청 전체 시간 예산 (대기열에서 보낸 시간을 뺀 나머지를 --deadline-ms로 전달)
+// multiTable: 이미지의 모든 테이블 처리 → { tables: [...] } (--multi-table)
+// onRecord: 층이 끝나는 대로 NDJSON 레코드(header → floor ... → summary)를 받는 콜백 (--ndjson)
+//           결과는 레코드를 모아 기존 { header, data } 형태로 반환
+function runPythonOCR(imageBuffer, { onProgress, onStart, queueTimeoutMs, format, deadlineMs, multiTable, onRecord } = {}) {
+    const submittedAt = Date.now();
+    return pythonScheduler.run('ocr', () => {
+        if (onStart) onStart();
+        const remainingMs = deadlineMs > 0 ? Math.max(1, deadlineMs - (Date.now() - submittedAt)) : 0;
+        return spawnPythonOCR(imageBuffer, { onProgress, format, deadlineMs: remainingMs, multiTable, onRecord });
+    }, { queueTimeoutMs });
+}
+
+// 동기 OCR 요청의 시간 예산 (프론트엔드 타임아웃보다 짧게, 0이면 제한 없음)
+const OCR_DEADLINE_MS = parseInt(process.env.OCR_DEADLINE_MS || '', 10) || 0;
+
+// 동시에 실행할 엔진 버전 (예: 'v3,v2,v1' → ocr_ensemble.py가 일관성 점수가 가장 높은 결과 선택, 비우면 v3만)
+const OCR_ENGINES = (process.env.OCR_ENGINES || '').trim();
+const USE_ENSEMBLE = OCR_ENGINES !== '' && OCR_ENGINES !== 'v3';
+
+// 압축 결과 포맷 이름 (compact_result.FORMAT_NAME)
+const COMPACT_FORMAT = 'compact-v1';
+
+function hasResultData(jsonData) {
+    return Boolean(jsonData && (jsonData.data || jsonData.format === COMPACT_FORMAT));
+}
+
+// 스트리밍 레코드 → { header, data } (+ degraded, diff, ensemble)
+function assembleRecords(records) {
+    const result = { header: null, data: [] };
+    for (const { type, ...record } of records) {
+        if (type === 'header') result.header = record.header;
+        else if (type === 'floor') result.data.push(record);
+        else if (type === 'summary') {
+            if (record.degraded) result.degraded = record.degraded;
+            if (record.diff) result.diff = record.diff;
+            if (record.ensemble) result.ensemble = record.ensemble;
+        }
+    }
+    return result;
+}
+
+// 사전 품질 검사 실패 (exit 2, stdout 마지막 줄 {"error", "code", "metrics"}) → 422 오류 (code로 클라이언트 분기)
+const PREFLIGHT_EXIT_CODE = 2;
+
+function preflightError(output) {
+    try {
+        const parsed = JSON.parse(output.trim().split('\n').pop());
+        if (!parsed.code) return null;
+        const error = new Error(parsed.error);
+        error.status = 422;
+        error.code = parsed.code;
+        error.metrics = parsed.metrics;
+        return error;
+    } catch (e) {
+        return null;
+    }
+}
+
+function spawnPythonOCR(imageBuffer, { onProgress, format, deadlineMs, multiTable, onRecord } = {}) {
     return new Promise((resolve, reject) => {
-        const pythonScript = path.join(__dirname, 'ocr_engine_v3.py');
+        // 앙상블은 단일 테이블만 지원 (여러 테이블은 v3로 처리), 진행 이벤트 없음
+        const ensemble = USE_ENSEMBLE && !multiTable;
+        const pythonScript = path.join(__dirname, ensemble ? 'ocr_ensemble.py' : 'ocr_engine_v3.py');
 
         // Python 실행 (Windows에서는 python, Unix에서는 python3)
         const pythonCmd = process.platform === 'win32' ? 'python' : 'python3';
 
-        const pythonProcess = spawn(pythonCmd, [pythonScript, imagePath], {
+        const args = [pythonScript, '-'];
+        if (ensemble) args.push('--engines', OCR_ENGINES);
+        if (onProgress && !ensemble) args.push('--progress');
+        if (format === 'compact') args.push('--format', 'compact');
+        if (deadlineMs > 0) args.push('--deadline-ms', String(deadlineMs));
+        if (multiTable) args.push('--multi-table');
+        if (onRecord) args.push('--ndjson');
+
+        const pythonProcess = spawn(pythonCmd, args, {
             encoding: 'utf-8',
             env: {
                 ...process.env,
                 PYTHONIOENCODING: 'utf-8',
+                PY_LIMIT_OCR: String(OCR_CONCURRENCY),
                 GEMINI_API_KEY: process.env.GEMINI_API_KEY || '',
                 ANTHROPIC_API_KEY: process.env.ANTHROPIC_API_KEY || '',
                 AI_PROVIDER: process.env.AI_PROVIDER || ''
@@ -43,18 +133,65 @@ function runPythonOCR(imagePath) {
 
         let stdout = '';
         let stderr = '';
-
-        pythonProcess.stdout.on('data', (data) => {
-            stdout += data.toString('utf-8');
+        let stderrLine = '';
+        let errorLine = '';
+        const records = [];
+
+        pythonProcess.stdout.setEncoding('utf-8');
+        pythonProcess.stdout.on('data', (text) => {
+            if (!onRecord) {
+                stdout += text;
+                return;
+            }
+            // 줄 단위로 나눠 레코드를 도착하는 대로 전달 (type이 없는 줄은 오류 출력으로 보관)
+            const lines = (stdout + text).split('\n');
+            stdout = lines.pop();
+            for (const line of lines) {
+                if (!line.trim()) continue;
+                let record;
+                try {
+                    record = JSON.parse(line);
+                } catch (e) {
+                    console.log('[Python] 레코드 파싱 실패:', line);
+                    continue;
+                }
+                if (record.type) {
+                    records.push(record);
+                    onRecord(record);
+                } else {
+                    errorLine = line;
+                }
+            }
         });
 
         pythonProcess.stderr.on('data', (data) => {
-            stderr += data.toString('utf-8');
-            console.log('[Python]', data.toString('utf-8'));
+            const text = data.toString('utf-8');
+            if (!onProgress) {
+                stderr += text;
+                console.log('[Python]', text);
+                return;
+            }
+            // 줄 단위로 나눠 진행 이벤트만 분리
+            const lines = (stderrLine + text).split('\n');
+            stderrLine = lines.pop();
+            for (const line of lines) {
+                if (line.startsWith(PROGRESS_PREFIX)) {
+                    try {
+                        onProgress(JSON.parse(line.slice(PROGRESS_PREFIX.length)));
+                    } catch (e) {
+                        console.log('[Python] 진행 이벤트 파싱 실패:', line);
+                    }
+                } else {
+                    stderr += line + '\n';
+                    console.log('[Python]', line);
+                }
+            }
         });
 
         pythonProcess.on('close', (code) => {
-            if (code === 0) {
+            if (code === 0 && onRecord) {
+                resolve(assembleRecords(records));
+            } else if (code === 0) {
                 try {
                     const result = JSON.parse(stdout);
                     resolve(result);
@@ -62,42 +199,223 @@ function runPythonOCR(imagePath) {
                     reject(new Error(`JSON 파싱 오류: ${e.message}\n출력: ${stdout}`));
                 }
             } else {
-                reject(new Error(`Python 오류 (code ${code}): ${stderr}`));
+                const preflight = code === PREFLIGHT_EXIT_CODE && preflightError(onRecord ? errorLine : stdout);
+                reject(preflight || new Error(`Python 오류 (code ${code}): ${stderr}`));
             }
         });
 
         pythonProcess.on('error', (err) => {
             reject(new Error(`Python 실행 실패: ${err.message}`));
         });
+
+        // 프로세스가 먼저 종료되면 EPIPE가 발생하므로 무시 (close 이벤트에서 처리)
+        pythonProcess.stdin.on('error', () => {});
+        pythonProcess.stdin.end(imageBuffer);
     });
 }
 
-app.post('/api/ocr', upload.single('image'), async (req, res) => {
+app.post('/api/ocr', imageUpload.single('image'), async (req, res) => {
     if (!req.file) return res.status(400).json({ error: '이미지가 없습니다.' });
 
     const startTime = Date.now();
     console.log(`[${new Date().toLocaleTimeString()}] 🚀 OCR 분석 시작 (OpenCV + EasyOCR)...`);
 
+    // ?stream=ndjson: 층이 끝나는 대로 한 줄씩 응답 (header → floor ... → summary)
+    const streaming = req.query.stream === 'ndjson';
+    if (streaming && (req.query.format === 'compact' || req.query.tables === 'all')) {
+        return res.status(400).json({ error: 'stream=ndjson은 format=compact, tables=all과 함께 쓸 수 없습니다.' });
+    }
+
     try {
         // Python OCR 엔진 실행
-        const jsonData = await runPythonOCR(req.file.path);
+        // ?format=compact: 층/호 중첩 JSON 대신 행렬 형태 압축 JSON
+        // ?tables=all: 이미지의 모든 테이블 → { tables: [...] }
+        const jsonData = await runPythonOCR(req.file.buffer, {
+            format: req.query.format,
+            deadlineMs: OCR_DEADLINE_MS,
+            multiTable: req.query.tables === 'all',
+            onRecord: streaming ? (record) => {
+                if (!res.headersSent) res.type('application/x-ndjson');
+                res.write(JSON.stringify(record) + '\n');
+            } : undefined
+        });
 
         const elapsed = Date.now() - startTime;
-        // 새 포맷: { header: {...}, data: [...] } 또는 기존 배열 호환
-        const floorCount = jsonData.data ? jsonData.data.length : jsonData.length;
-        console.log(`[${elapsed}ms] ✅ 분석 완료 (${floorCount}층)`);
-
-        res.json(jsonData);
+        // 새 포맷: { header: {...}, data: [...] }, 압축 포맷 또는 기존 배열 호환
+        const tables = jsonData.tables || [jsonData];
+        const floorCount = tables.map(t => t.data ? t.data.length
+            : t.floors ? t.floors.length : t.length).join(' + ');
+        const skipped = tables.flatMap(t => t.degraded ? t.degraded.skipped : []);
+        console.log(`[${elapsed}ms] ✅ 분석 완료 (${jsonData.tables ? `테이블 ${tables.length}개, ` : ''}${floorCount}층)` +
+            (jsonData.ensemble ? ` [엔진 ${jsonData.ensemble.engine}, 점수 ${jsonData.ensemble.scores[jsonData.ensemble.engine]}]` : '') +
+            (skipped.length ? ` ⚠️ 시간 예산 초과로 일부 OCR 생략: ${[...new Set(skipped)].join(', ')}` : ''));
+
+        if (streaming) res.end();
+        else res.json(jsonData);
 
     } catch (error) {
         console.error('❌ 오류:', error.message);
-        res.status(500).json({ error: error.message });
-    } finally {
-        // 임시 파일 정리
-        if (req.file && fs.existsSync(req.file.path)) {
-            fs.unlinkSync(req.file.path);
+        if (res.headersSent) {
+            // 스트리밍 도중 실패: 이미 보낸 층은 그대로 두고 오류 레코드로 끝냄
+            res.end(JSON.stringify({ type: 'error', error: error.message, code: error.code }) + '\n');
+        } else {
+            res.status(error.status || 500).json({ error: error.message, code: error.code, metrics: error.metrics });
+        }
+    }
+});
+
+// ============================================================
+// OCR 작업 큐 (제출 → 폴링 / 스트리밍)
+// - 실행은 공용 스케줄러의 OCR 슬롯을 기다림 (대기 시간 제한 없음)
+// - 대기 중인 작업이 가득 차면 429로 거절 (backpressure)
+// - 진행 이벤트는 SSE(/events)로 실시간 전달
+// ============================================================
+const JOB_QUEUE_LIMIT = parseInt(process.env.OCR_JOB_QUEUE_LIMIT || '', 10) || 50;
+const JOB_TTL_MS = parseInt(process.env.OCR_JOB_TTL_MS || '', 10) || 10 * 60 * 1000;
+
+const jobs = new Map();
+
+function queuedJobs() {
+    return [...jobs.values()].filter((job) => job.status === 'queued');
+}
+
+function jobSummary(job) {
+    return {
+        id: job.id,
+        status: job.status,
+        createdAt: job.createdAt,
+        startedAt: job.startedAt,
+        finishedAt: job.finishedAt,
+        queuePosition: job.status === 'queued'
+            ? queuedJobs().filter((other) => other.createdAt <= job.createdAt).length
+            : 0,
+        progress: job.events.length ? job.events[job.events.length - 1] : null,
+        error: job.error,
+        errorCode: job.errorCode
+    };
+}
+
+function publishJobEvent(job, type, payload) {
+    for (const res of job.listeners) {
+        res.write(`event: ${type}\ndata: ${JSON.stringify(payload)}\n\n`);
+    }
+}
+
+function finishJob(job) {
+    job.finishedAt = Date.now();
+    const type = job.status === 'done' ? 'done' : 'error';
+    publishJobEvent(job, type, job.status === 'done' ? job.result : { error: job.error, code: job.errorCode });
+    for (const res of job.listeners) res.end();
+    job.listeners.clear();
+    // 일정 시간 후 결과 삭제
+    setTimeout(() => jobs.delete(job.id), JOB_TTL_MS).unref();
+}
+
+function startJob(job) {
+    const imageBuffer = job.imageBuffer;
+
+    runPythonOCR(imageBuffer, {
+        queueTimeoutMs: 0,
+        format: job.format,
+        multiTable: job.multiTable,
+        // 층 단위 레코드를 SSE로 바로 전달 (header / floor / summary 이벤트)
+        onRecord: job.format !== 'compact' && !job.multiTable
+            ? (record) => publishJobEvent(job, record.type, record) : undefined,
+        onStart: () => {
+            job.imageBuffer = null;
+            job.status = 'running';
+            job.startedAt = Date.now();
+            publishJobEvent(job, 'status', jobSummary(job));
+        },
+        onProgress: (event) => {
+            job.events.push(event);
+            publishJobEvent(job, 'progress', event);
+        }
+    }).then((result) => {
+        job.status = 'done';
+        job.result = result;
+        console.log(`[job ${job.id}] ✅ 완료 (${Date.now() - job.startedAt}ms)`);
+    }).catch((error) => {
+        job.status = 'error';
+        job.error = error.message;
+        job.errorCode = error.code || null;
+        console.error(`[job ${job.id}] ❌ 오류:`, error.message);
+    }).finally(() => {
+        job.imageBuffer = null;
+        finishJob(job);
+    });
+}
+
+// 작업 제출
+app.post('/api/ocr/jobs', imageUpload.single('image'), (req, res) => {
+    if (!req.file) return res.status(400).json({ error: '이미지가 없습니다.' });
+
+    if (queuedJobs().length >= JOB_QUEUE_LIMIT) {
+        res.set('Retry-After', '5');
+        return res.status(429).json({ error: '대기 중인 작업이 너무 많습니다. 잠시 후 다시 시도하세요.' });
+    }
+
+    const job = {
+        id: crypto.randomUUID(),
+        status: 'queued',
+        createdAt: Date.now(),
+        startedAt: null,
+        finishedAt: null,
+        imageBuffer: req.file.buffer,
+        format: req.query.format,
+        multiTable: req.query.tables === 'all',
+        events: [],
+        result: null,
+        error: null,
+        errorCode: null,
+        listeners: new Set()
+    };
+    jobs.set(job.id, job);
+    startJob(job);
+    console.log(`[job ${job.id}] 📥 제출 (상태: ${job.status}, 대기 작업 ${queuedJobs().length}개)`);
+
+    res.status(202).json({
+        ...jobSummary(job),
+        links: {
+            status: `/api/ocr/jobs/${job.id}`,
+            events: `/api/ocr/jobs/${job.id}/events`
         }
+    });
+});
+
+// 작업 상태 조회 (완료 시 결과 포함)
+app.get('/api/ocr/jobs/:id', (req, res) => {
+    const job = jobs.get(req.params.id);
+    if (!job) return res.status(404).json({ error: '작업을 찾을 수 없습니다.' });
+    res.json({ ...jobSummary(job), result: job.result });
+});
+
+// 작업 진행 스트림 (Server-Sent Events)
+app.get('/api/ocr/jobs/:id/events', (req, res) => {
+    const job = jobs.get(req.params.id);
+    if (!job) return res.status(404).json({ error: '작업을 찾을 수 없습니다.' });
+
+    res.set({
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        Connection: 'keep-alive'
+    });
+    res.flushHeaders();
+
+    // 지금까지의 상태와 이벤트 먼저 전송
+    res.write(`event: status\ndata: ${JSON.stringify(jobSummary(job))}\n\n`);
+    for (const event of job.events) {
+        res.write(`event: progress\ndata: ${JSON.stringify(event)}\n\n`);
     }
+
+    if (job.status === 'done' || job.status === 'error') {
+        const type = job.status === 'done' ? 'done' : 'error';
+        res.write(`event: ${type}\ndata: ${JSON.stringify(job.status === 'done' ? job.result : { error: job.error, code: job.errorCode })}\n\n`);
+        return res.end();
+    }
+
+    job.listeners.add(res);
+    req.on('close', () => job.listeners.delete(res));
 });
 
 // JSON 데이터 → 기본 엑셀 생성 API
@@ -106,7 +424,7 @@ app.post('/api/download-basic-excel', async (req, res) => {
     console.log(`[${new Date().toLocaleTimeString()}] 📥 기본 엑셀 생성 시작...`);
 
     const jsonData = req.body;
-    if (!jsonData || !jsonData.data) {
+    if (!hasResultData(jsonData)) {
         return res.status(400).json({ error: '데이터가 없습니다.' });
     }
 
@@ -117,7 +435,7 @@ app.post('/api/download-basic-excel', async (req, res) => {
         const pythonScript = path.join(__dirname, 'basic_excel_generator.py');
         const pythonCmd = process.platform === 'win32' ? 'python' : 'python3';
 
-        await new Promise((resolve, reject) => {
+        await pythonScheduler.run('basic-excel', () => new Promise((resolve, reject) => {
             const pythonProcess = spawn(pythonCmd, [
                 pythonScript,
                 JSON.stringify(jsonData),
@@ -148,7 +466,7 @@ app.post('/api/download-basic-excel', async (req, res) => {
             pythonProcess.on('error', (err) => {
                 reject(new Error(`Python 실행 실패: ${err.message}`));
             });
-        });
+        }));
 
         const elapsed = Date.now() - startTime;
         console.log(`[${elapsed}ms] ✅ 기본 엑셀 생성 완료`);
@@ -165,7 +483,7 @@ app.post('/api/download-basic-excel', async (req, res) => {
 
     } catch (error) {
         console.error('❌ 생성 오류:', error.message);
-        res.status(500).json({ error: error.message });
+        res.status(error.status || 500).json({ error: error.message });
 
         // 오류 발생 시 임시 파일 정리
         if (fs.existsSync(outputPath)) fs.unlinkSync(outputPath);
@@ -219,7 +537,7 @@ app.post('/api/convert-excel', upload.single('excel'), async (req, res) => {
         console.log(`📥 입력: ${inputPath}`);
         console.log(`📤 출력: ${outputPath}`);
 
-        await new Promise((resolve, reject) => {
+        await pythonScheduler.run('convert-excel', () => new Promise((resolve, reject) => {
             const pythonProcess = spawn(pythonCmd, [pythonScript, inputPath, outputPath], {
                 encoding: 'utf-8',
                 env: {
@@ -264,7 +582,7 @@ app.post('/api/convert-excel', upload.single('excel'), async (req, res) => {
                 console.error('❌ Python 프로세스 오류:', err);
                 reject(new Error(`Python 실행 실패: ${err.message}`));
             });
-        });
+        }));
 
         const elapsed = Date.now() - startTime;
         console.log(`[${elapsed}ms] ✅ 엑셀 변환 완료`);
@@ -298,7 +616,7 @@ app.post('/api/convert-excel', upload.single('excel'), async (req, res) => {
     } catch (error) {
         console.error('❌ 변환 오류:', error.message);
         console.error('상세 에러:', error.stack);
-        res.status(500).json({
+        res.status(error.status || 500).json({
             error: error.message,
             details: '서버 로그를 확인하세요.'
         });
@@ -323,7 +641,7 @@ app.post('/api/convert-data-to-floor-unit', async (req, res) => {
     console.log(`[${new Date().toLocaleTimeString()}] 📊 층호수 형태 변환 시작...`);
 
     const jsonData = req.body;
-    if (!jsonData || !jsonData.data) {
+    if (!hasResultData(jsonData)) {
         return res.status(400).json({ error: '데이터가 없습니다.' });
     }
 
@@ -334,7 +652,7 @@ app.post('/api/convert-data-to-floor-unit', async (req, res) => {
         const pythonScript = path.join(__dirname, 'json_to_floor_unit.py');
         const pythonCmd = process.platform === 'win32' ? 'python' : 'python3';
 
-        await new Promise((resolve, reject) => {
+        await pythonScheduler.run('floor-unit', () => new Promise((resolve, reject) => {
             const pythonProcess = spawn(pythonCmd, [
                 pythonScript,
                 JSON.stringify(jsonData),
@@ -365,7 +683,7 @@ app.post('/api/convert-data-to-floor-unit', async (req, res) => {
             pythonProcess.on('error', (err) => {
                 reject(new Error(`Python 실행 실패: ${err.message}`));
             });
-        });
+        }));
 
         const elapsed = Date.now() - startTime;
         console.log(`[${elapsed}ms] ✅ 층호수 형태 변환 완료`);
@@ -382,13 +700,25 @@ app.post('/api/convert-data-to-floor-unit', async (req, res) => {
 
     } catch (error) {
         console.error('❌ 변환 오류:', error.message);
-        res.status(500).json({ error: error.message });
+        res.status(error.status || 500).json({ error: error.message });
 
         // 오류 발생 시 임시 파일 정리
         if (fs.existsSync(outputPath)) fs.unlinkSync(outputPath);
     }
 });
 
+// Python 스케줄러 지표 (대기열 길이, 대기/실행 시간)
+app.get('/api/metrics', (req, res) => {
+    res.json({
+        scheduler: pythonScheduler.metrics(),
+        jobs: {
+            total: jobs.size,
+            queued: queuedJobs().length,
+            queueLimit: JOB_QUEUE_LIMIT
+        }
+    });
+});
+
 // 프로덕션: SPA 폴백 (알 수 없는 GET 요청 → index.html)
 if (fs.existsSync(path.join(__dirname, 'dist'))) {
     app.use((req, res, next) => {
@@ -406,4 +736,6 @@ app.listen(port, '0.0.0.0', () => {
     console.log(`📦 Excel Converter: openpyxl 기반 변환`);
     console.log(`📦 Floor-Unit Converter: JSON → 층호수 형태 엑셀`);
     console.log(`📊 자동 크기 감지, 색상 + 텍스트 인식`);
+    const m = pythonScheduler.metrics();
+    console.log(`⚙️  Python 동시 실행: 전체 ${m.maxConcurrency} (CPU ${m.cpus}), 대기열 ${m.maxQueue}, 대기 제한 ${m.queueTimeoutMs}ms`);
 });
@@ -81,21 +81,38 @@ async function startConversion() {
   formData.append('image', selectedFile);
 
   try {
-    const response = await fetch('/api/ocr', {
+    // 층이 끝나는 대로 한 줄씩 도착 (header → floor ... → summary)
+    const response = await fetch('/api/ocr?stream=ndjson', {
       method: 'POST',
       body: formData
     });
 
     if (!response.ok) throw new Error('서버 오류');
 
-    const rawData = await response.json();
-    // 새 포맷: { header, data } 또는 기존 배열 호환
-    const floorData = rawData.data || rawData;
-    const headerInfo = rawData.header || null;
+    const floorData = [];
+    let renderScheduled = false;
+    await readRecords(response, (record) => {
+      if (record.type === 'header') {
+        renderHeader(record.header);
+        progressBar.style.width = '50%';
+      } else if (record.type === 'floor') {
+        const { type, ...floor } = record;
+        floorData.push(floor);
+        // 층마다 다시 그리지 않고 프레임당 한 번만
+        if (!renderScheduled) {
+          renderScheduled = true;
+          requestAnimationFrame(() => {
+            renderScheduled = false;
+            renderTable(floorData);
+          });
+        }
+      } else if (record.type === 'error') {
+        throw new Error(record.error);
+      }
+    });
     processedData = floorData;
 
     progressBar.style.width = '70%';
-    renderHeader(headerInfo);
     renderTable(floorData);
 
     progressBar.style.width = '100%';
@@ -113,6 +130,24 @@ async function startConversion() {
   }
 }
 
+// NDJSON 응답을 줄 단위로 읽어 레코드마다 onRecord 호출
+async function readRecords(response, onRecord) {
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffered = '';
+  for (;;) {
+    const { done, value } = await reader.read();
+    buffered += decoder.decode(value, { stream: !done });
+    const lines = buffered.split('\n');
+    buffered = lines.pop();
+    for (const line of lines) {
+      if (line.trim()) onRecord(JSON.parse(line));
+    }
+    if (done) break;
+  }
+  if (buffered.trim()) onRecord(JSON.parse(buffered));
+}
+
 function renderHeader(headerInfo) {
   const headerEl = document.getElementById('header-info');
   const buildingEl = document.getElementById('header-building');
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+대형 스캔 띠(strip) 단위 처리 (이미지 높이와 무관하게 작업 메모리 고정)
+
+이미지를 가로 띠로 나눠 읽고, 띠마다 gray / binary / 모폴로지 평면을 만든 뒤 버린다.
+    - 무압축 형식(PPM/PGM, 24/32비트 BMP) 파일은 mmap으로 필요한 띠만 읽음
+    - PNG/JPEG 등 압축 형식은 한 번 전체 디코딩해 임시 파일로 옮긴 뒤 해제하고 mmap으로 다시 읽음
+      (OpenCV 디코더는 행 단위로 멈출 수 없어 디코딩 순간의 최대 메모리는 이미지 1장 크기)
+    - 띠를 복사한 뒤 매핑의 상주 페이지를 내려놓아 파일 크기만큼 RSS가 늘지 않게 함
+    - 수직선은 띠 경계를 넘는 세로 연속 길이를 열마다 이어받아 계산 (띠 겹침 불필요)
+"""
+
+import mmap
+import os
+import sys
+import tempfile
+
+import cv2
+import numpy as np
+
+from image_planes import BINARY_THRESHOLD
+from image_source import STDIN_SOURCE, SHM_PREFIX, read_image_buffer
+
+STRIP_HEIGHT = 1024     # 기본 띠 높이 (px)
+
+
+class StripImage:
+    """
+    띠 단위로 읽는 이미지
+    - pixels: (h, w, c) 또는 (h, w) 배열 (mmap 뷰 가능)
+    - order: 채널 순서 'bgr' / 'rgb' / 'gray'
+    - mapping: pixels가 가리키는 mmap (띠를 읽을 때마다 상주 페이지 해제, close 시 닫음)
+    - spool_path: 압축 형식을 풀어 둔 임시 파일 (close 시 삭제)
+    """
+
+    def __init__(self, pixels, order='bgr', mapping=None, spool_path=None):
+        self.pixels = pixels
+        self.order = order
+        self.mapping = mapping
+        self.spool_path = spool_path
+        self.shape = pixels.shape[:2] + (3,)
+
+    def band(self, y1, y2, x1=0, x2=None):
+        """이미지 좌표 [y1, y2) x [x1, x2) 영역의 BGR 배열 (새로 할당한 연속 배열)"""
+        region = self.pixels[y1:y2, x1:x2]
+        if self.order == 'gray':
+            out = cv2.cvtColor(np.ascontiguousarray(region), cv2.COLOR_GRAY2BGR)
+        elif self.order == 'rgb':
+            out = cv2.cvtColor(np.ascontiguousarray(region), cv2.COLOR_RGB2BGR)
+        else:
+            out = np.array(region[:, :, :3], order='C')
+        # 읽은 페이지는 페이지 캐시에 남으므로 다시 읽어도 디스크 I/O 없음
+        if self.mapping is not None and hasattr(mmap, 'MADV_DONTNEED'):
+            self.mapping.madvise(mmap.MADV_DONTNEED)
+        return out
+
+    def overview(self, max_side, strip_height=STRIP_HEIGHT):
+        """
+        긴 변이 max_side 이하인 축소 이미지 → (img, scale)
+        - 정수 배율 factor의 블록 평균(INTER_AREA)으로 줄이고, 띠 높이를 factor 배수로 맞춰
+          띠 경계가 항상 축소 화소 경계에 오게 함 (띠마다 반올림한 높이로 줄이면 띠 높이에 따라
+          축소 화소 위치가 최대 1화소씩 어긋나 테이블 영역 추정이 달라짐)
+        - scale = 1 / factor (축소 좌표 / scale = 원본 좌표)
+        """
+        h, w = self.shape[:2]
+        factor = max(1, -(-max(h, w) // max_side))
+        step = max(factor, strip_height // factor * factor)
+        out_w = max(1, w // factor)
+        parts = []
+        for y1 in range(0, h, step):
+            y2 = min(y1 + step, h)
+            out_h = (y2 - y1) // factor
+            if out_h > 0:
+                band = self.band(y1, y1 + out_h * factor, 0, out_w * factor)
+                parts.append(cv2.resize(band, (out_w, out_h), interpolation=cv2.INTER_AREA))
+        return np.vstack(parts), 1.0 / factor
+
+    def close(self):
+        """mmap 닫기 + 임시 파일 삭제"""
+        self.pixels = None
+        if self.mapping is not None:
+            try:
+                self.mapping.close()
+            except BufferError:     # 밖에서 픽셀 뷰를 아직 잡고 있으면 GC에 맡김
+                pass
+            self.mapping = None
+        if self.spool_path:
+            try:
+                os.remove(self.spool_path)
+            except OSError:
+                pass
+            self.spool_path = None
+
+
+def _raw_pixels(buf):
+    """
+    무압축 형식이면 디코딩 없이 픽셀 배열 뷰 (pixels, order), 아니면 None
+    - PPM(P6) / PGM(P5), 최댓값 255 이하
+    - BMP, 무압축(BI_RGB) 24/32비트 (아래→위 저장이면 뒤집은 뷰)
+    """
+    head = bytes(buf[:64])
+
+    if head[:2] in (b'P5', b'P6'):
+        fields = []
+        i = 2
+        while len(fields) < 3:
+            while i < len(head) and head[i:i + 1].isspace():
+                i += 1
+            if i < len(head) and head[i:i + 1] == b'#':
+                end = bytes(buf[i:i + 256]).find(b'\n')
+                if end < 0:
+                    return None
+                i += end + 1
+                head = bytes(buf[:i + 64])
+                continue
+            start = i
+            while i < len(head) and head[i:i + 1].isdigit():
+                i += 1
+            if start == i:
+                return None
+            fields.append(int(head[start:i]))
+        width, height, maxval = fields
+        if maxval > 255:
+            return None
+        channels = 3 if head[:2] == b'P6' else 1
+        offset = i + 1  # 헤더 끝 공백 1바이트
+        pixels = buf[offset:offset + width * height * channels]
+        if pixels.size < width * height * channels:
+            return None
+        if channels == 1:
+            return pixels.reshape(height, width), 'gray'
+        return pixels.reshape(height, width, 3), 'rgb'
+
+    if head[:2] == b'BM' and len(head) >= 34:
+        offset = int.from_bytes(head[10:14], 'little')
+        width = int.from_bytes(head[18:22], 'little', signed=True)
+        height = int.from_bytes(head[22:26], 'little', signed=True)
+        bpp = int.from_bytes(head[28:30], 'little')
+        compression = int.from_bytes(head[30:34], 'little')
+        if compression != 0 or bpp not in (24, 32) or width <= 0 or height == 0:
+            return None
+        channels = bpp // 8
+        stride = (width * bpp + 31) // 32 * 4
+        rows = abs(height)
+        data = buf[offset:offset + stride * rows]
+        if data.size < stride * rows:
+            return None
+        pixels = data.reshape(rows, stride)[:, :width * channels].reshape(rows, width, channels)
+        return (pixels[::-1] if height > 0 else pixels), 'bgr'
+
+    return None
+
+
+def _map_file(path):
+    """파일 전체를 읽기 전용 mmap으로 → (mapping, uint8 배열 뷰)"""
+    with open(path, 'rb') as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return mapping, np.frombuffer(mapping, np.uint8)
+
+
+def open_strip_image(source, decode):
+    """
+    소스를 StripImage로 열기
+    - decode: 압축 형식용 디코더 (uint8 버퍼 → BGR 배열 또는 None)
+    - 파일 경로는 mmap으로 열어 무압축 형식이면 그대로 띠 단위로 읽음
+    """
+    is_path = (isinstance(source, str) and source != STDIN_SOURCE
+               and not source.startswith(SHM_PREFIX))
+    if is_path and os.path.getsize(source) > 0:
+        mapping, buf = _map_file(source)
+    else:
+        mapping, buf = None, read_image_buffer(source)
+
+    raw = _raw_pixels(buf)
+    if raw is not None:
+        pixels, order = raw
+        print(f"띠 처리: 무압축 이미지 직접 참조 {pixels.shape[1]} x {pixels.shape[0]}", file=sys.stderr)
+        return StripImage(pixels, order, mapping)
+
+    img = decode(buf)
+    del buf
+    if mapping is not None:
+        mapping.close()
+    if img is None:
+        raise Exception("이미지 로드 실패")
+
+    # 디코딩 결과를 임시 파일로 옮기고 메모리에서 해제 (이후 띠 단위로 다시 읽음)
+    fd, spool_path = tempfile.mkstemp(prefix='ocr_strip_', suffix='.raw')
+    with os.fdopen(fd, 'wb') as f:
+        img.tofile(f)
+    shape = img.shape
+    del img
+    print(f"띠 처리: 디코딩 결과를 임시 파일로 이동 {shape[1]} x {shape[0]}", file=sys.stderr)
+    mapping, buf = _map_file(spool_path)
+    return StripImage(buf.reshape(shape), 'bgr', mapping, spool_path)
+
+
+def add_vertical_runs(mask, carry, min_run, sums):
+    """
+    띠 mask (bh x w, bool)의 열별 세로 연속 구간 중 길이 min_run 이상을 sums에 더함
+    - carry: 윗 띠 맨 아래 행에서 이어지는 연속 길이 (열별)
+    - 반환: 이 띠 맨 아래 행에서 아래로 이어질 연속 길이 (다음 띠의 carry)
+    """
+    bh, w = mask.shape
+    # 윗 띠에서 이어지던 구간이 이 띠 첫 행에서 끊긴 경우
+    ended = (carry >= min_run) & ~mask[0]
+    sums += np.where(ended, carry, 0)
+
+    padded = np.zeros((w, bh + 2), np.int8)
+    padded[:, 1:-1] = mask.T
+    edges = np.diff(padded, axis=1)
+    start_cols, start_rows = np.nonzero(edges == 1)     # 열 순서, 같은 열 안에서는 행 순서
+    _, end_rows = np.nonzero(edges == -1)
+    lengths = (end_rows - start_rows).astype(np.int64)
+    lengths += np.where(start_rows == 0, carry[start_cols], 0)
+
+    open_end = end_rows == bh
+    closed = ~open_end & (lengths >= min_run)
+    np.add.at(sums, start_cols[closed], lengths[closed])
+
+    new_carry = np.zeros(w, np.int64)
+    new_carry[start_cols[open_end]] = lengths[open_end]
+    return new_carry
+
+
+def find_grid_lines_strips(image, region, strip_height=STRIP_HEIGHT):
+    """
+    find_grid_lines와 같은 기준의 라인 좌표를 띠 단위로 계산 → (h_lines, v_lines) (이미지 좌표)
+    - region: (x1, y1, x2, y2) 탐색 영역, 커널 크기는 영역 크기 기준
+    - 수평선: 띠마다 (w // 10, 1) 열림 연산 후 행별 화소 수
+    - 수직선: (1, h // 15) 열림 연산 = 길이 h // 15 이상인 세로 연속 구간이므로 띠 경계를 넘겨 이어 셈
+      (영역 위/아래 끝에 닿은 짧은 구간은 모폴로지 경계 처리와 달리 버림)
+    """
+    x1, y1, x2, y2 = region
+    w, h = x2 - x1, y2 - y1
+    h_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (max(w // 10, 1), 1))
+    min_run = max(h // 15, 1)
+
+    h_counts = np.zeros(h, np.int64)
+    v_counts = np.zeros(w, np.int64)
+    carry = np.zeros(w, np.int64)
+    for by1 in range(y1, y2, strip_height):
+        by2 = min(by1 + strip_height, y2)
+        gray = cv2.cvtColor(image.band(by1, by2, x1, x2), cv2.COLOR_BGR2GRAY)
+        binary = cv2.threshold(gray, BINARY_THRESHOLD, 255, cv2.THRESH_BINARY_INV)[1]
+        h_open = cv2.morphologyEx(binary, cv2.MORPH_OPEN, h_kernel)
+        h_counts[by1 - y1:by2 - y1] = np.count_nonzero(h_open, axis=1)
+        carry = add_vertical_runs(binary > 0, carry, min_run, v_counts)
+    v_counts += np.where(carry >= min_run, carry, 0)
+
+    # find_grid_lines와 같은 임계값 (화소값 255 합 기준)
+    h_coords = (np.flatnonzero(h_counts * 255 > w * 50) + y1).tolist()
+    v_coords = (np.flatnonzero(v_counts * 255 > h * 30) + x1).tolist()
+    return merge_lines(h_coords), merge_lines(v_coords)
+
+
+def merge_lines(coords, gap=5):
+    """근접 라인 병합 (gap 이하로 붙은 좌표는 첫 좌표만)"""
+    result = []
+    for c in sorted(set(coords)):
+        if not result or c - result[-1] > gap:
+            result.append(c)
+    return result
+
+
+def row_bands(data_h, strip_height=STRIP_HEIGHT):
+    """그리드 행을 높이 strip_height 이하의 띠로 묶기 → [(첫 행, 끝 행(제외)), ...] (띠마다 최소 1행)"""
+    bands = []
+    start = 0
+    num_rows = len(data_h) - 1
+    for row in range(1, num_rows + 1):
+        if row == num_rows or data_h[row + 1] - data_h[start] > strip_height:
+            bands.append((start, row))
+            start = row
+    return bands
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tesseract C API 직접 호출 (ctypes)
+
+pytesseract는 호출마다 tesseract 프로세스를 띄우고 임시 PNG를 쓰고
+traineddata를 다시 읽는다. 이 모듈은 스레드마다 초기화된 엔진 하나를
+유지하고, 이미지 버퍼를 그대로 넘겨 프로세스/파일 비용을 없앤다.
+
+    TESSERACT_LIB   : libtesseract 경로 (기본: 자동 탐색)
+    TESSDATA_PREFIX : traineddata 경로 (기본: Tesseract 기본값)
+"""
+
+import ctypes
+import ctypes.util
+import os
+import threading
+
+import numpy as np
+
+# 페이지 분할 모드 (tesseract/publictypes.h)
+PSM_SINGLE_BLOCK = 6
+PSM_SINGLE_LINE = 7
+PSM_SINGLE_CHAR = 10
+
+# 결과 단위 (PageIteratorLevel)
+RIL_WORD = 3
+
+_LIB_CANDIDATES = [
+    'libtesseract.so.5', 'libtesseract.so.4', 'libtesseract.so',
+    'libtesseract.5.dylib', 'libtesseract.dylib',
+    'libtesseract-5.dll', 'tesseract50.dll',
+]
+
+_lib = None
+_lib_lock = threading.Lock()
+_local = threading.local()
+
+
+class TesseractError(Exception):
+    """libtesseract 로드/초기화 실패"""
+
+
+def _bind(lib):
+    """사용하는 함수의 인자/반환 타입 지정"""
+    c_void_p, c_char_p, c_int = ctypes.c_void_p, ctypes.c_char_p, ctypes.c_int
+    int_p = ctypes.POINTER(c_int)
+
+    signatures = {
+        'TessVersion': ([], c_char_p),
+        'TessBaseAPICreate': ([], c_void_p),
+        'TessBaseAPIDelete': ([c_void_p], None),
+        'TessBaseAPIEnd': ([c_void_p], None),
+        'TessBaseAPIInit3': ([c_void_p, c_char_p, c_char_p], c_int),
+        'TessBaseAPISetVariable': ([c_void_p, c_char_p, c_char_p], c_int),
+        'TessBaseAPISetPageSegMode': ([c_void_p, c_int], None),
+        'TessBaseAPISetImage': ([c_void_p, c_void_p, c_int, c_int, c_int, c_int], None),
+        'TessBaseAPIRecognize': ([c_void_p, c_void_p], c_int),
+        'TessBaseAPIGetUTF8Text': ([c_void_p], c_void_p),
+        'TessBaseAPIGetIterator': ([c_void_p], c_void_p),
+        'TessBaseAPIClear': ([c_void_p], None),
+        'TessDeleteText': ([c_void_p], None),
+        'TessResultIteratorDelete': ([c_void_p], None),
+        'TessResultIteratorNext': ([c_void_p, c_int], c_int),
+        'TessResultIteratorGetUTF8Text': ([c_void_p, c_int], c_void_p),
+        'TessResultIteratorConfidence': ([c_void_p, c_int], ctypes.c_float),
+        'TessResultIteratorGetPageIterator': ([c_void_p], c_void_p),
+        'TessPageIteratorBoundingBox': ([c_void_p, c_int, int_p, int_p, int_p, int_p], c_int),
+    }
+    for name, (argtypes, restype) in signatures.items():
+        func = getattr(lib, name)
+        func.argtypes = argtypes
+        func.restype = restype
+    return lib
+
+
+def load_library():
+    """libtesseract 로드 (한 번만), 실패 시 TesseractError"""
+    global _lib
+    if _lib is not None:
+        return _lib
+
+    with _lib_lock:
+        if _lib is not None:
+            return _lib
+
+        candidates = []
+        if os.environ.get('TESSERACT_LIB'):
+            candidates.append(os.environ['TESSERACT_LIB'])
+        found = ctypes.util.find_library('tesseract')
+        if found:
+            candidates.append(found)
+        candidates.extend(_LIB_CANDIDATES)
+
+        errors = []
+        for name in candidates:
+            try:
+                # CDLL 호출 중에는 GIL이 풀리므로 스레드별 엔진이 병렬로 동작
+                _lib = _bind(ctypes.CDLL(name))
+                return _lib
+            except (OSError, AttributeError) as e:
+                errors.append(f"{name}: {e}")
+
+        raise TesseractError("libtesseract 로드 실패 (" + "; ".join(errors[:3]) + ")")
+
+
+def version():
+    """libtesseract 버전 문자열"""
+    return load_library().TessVersion().decode('utf-8')
+
+
+def _take_text(lib, ptr):
+    """C 문자열을 파이썬 문자열로 복사 후 해제"""
+    if not ptr:
+        return ""
+    try:
+        return ctypes.string_at(ptr).decode('utf-8', errors='replace')
+    finally:
+        lib.TessDeleteText(ptr)
+
+
+def get_engine(lang):
+    """현재 스레드의 초기화된 엔진 핸들 (언어별 1개, 최초 호출 시에만 traineddata 로드)"""
+    engines = getattr(_local, 'engines', None)
+    if engines is None:
+        engines = _local.engines = {}
+
+    handle = engines.get(lang)
+    if handle is not None:
+        return handle
+
+    lib = load_library()
+    handle = lib.TessBaseAPICreate()
+    datapath = os.environ.get('TESSDATA_PREFIX')
+    rc = lib.TessBaseAPIInit3(handle, datapath.encode('utf-8') if datapath else None,
+                              lang.encode('utf-8'))
+    if rc != 0:
+        lib.TessBaseAPIDelete(handle)
+        raise TesseractError(f"Tesseract 초기화 실패 (lang={lang})")
+
+    # 해상도 추정 경고 등 디버그 출력 억제
+    lib.TessBaseAPISetVariable(handle, b'debug_file', os.devnull.encode('utf-8'))
+    engines[lang] = handle
+    return handle
+
+
+def release_engines():
+    """현재 스레드의 엔진 해제"""
+    engines = getattr(_local, 'engines', None)
+    if not engines:
+        return
+    lib = load_library()
+    for handle in engines.values():
+        lib.TessBaseAPIEnd(handle)
+        lib.TessBaseAPIDelete(handle)
+    engines.clear()
+
+
+def _set_image(lib, handle, img, psm, whitelist):
+    """이미지 버퍼 전달 (gray 또는 RGB uint8, 복사는 비연속 배열일 때만)"""
+    img = np.ascontiguousarray(img, dtype=np.uint8)
+    h, w = img.shape[:2]
+    bpp = 1 if img.ndim == 2 else img.shape[2]
+
+    lib.TessBaseAPISetPageSegMode(handle, psm)
+    lib.TessBaseAPISetVariable(handle, b'tessedit_char_whitelist',
+                               (whitelist or '').encode('utf-8'))
+    lib.TessBaseAPISetImage(handle, img.ctypes.data, w, h, bpp, img.strides[0])
+    return img  # 인식이 끝날 때까지 버퍼 유지
+
+
+def image_to_string(img, lang='eng', psm=PSM_SINGLE_LINE, whitelist=None):
+    """이미지 전체 텍스트 인식 (pytesseract.image_to_string 대응)"""
+    lib = load_library()
+    handle = get_engine(lang)
+    keep = _set_image(lib, handle, img, psm, whitelist)
+    try:
+        return _take_text(lib, lib.TessBaseAPIGetUTF8Text(handle))
+    finally:
+        lib.TessBaseAPIClear(handle)
+        del keep
+
+
+def image_to_words(img, lang='eng', psm=PSM_SINGLE_LINE, whitelist=None):
+    """
+    단어 단위 인식 (pytesseract.image_to_data 대응)
+    반환: [(text, left, top, width, height, conf), ...]
+    """
+    lib = load_library()
+    handle = get_engine(lang)
+    keep = _set_image(lib, handle, img, psm, whitelist)
+    words = []
+    try:
+        if lib.TessBaseAPIRecognize(handle, None) != 0:
+            return words
+
+        it = lib.TessBaseAPIGetIterator(handle)
+        if not it:
+            return words
+        try:
+            page_it = lib.TessResultIteratorGetPageIterator(it)
+            left, top, right, bottom = (ctypes.c_int() for _ in range(4))
+            while True:
+                text = _take_text(lib, lib.TessResultIteratorGetUTF8Text(it, RIL_WORD))
+                if text:
+                    conf = lib.TessResultIteratorConfidence(it, RIL_WORD)
+                    lib.TessPageIteratorBoundingBox(page_it, RIL_WORD, ctypes.byref(left), ctypes.byref(top),
+                                                    ctypes.byref(right), ctypes.byref(bottom))
+                    words.append((text, left.value, top.value,
+                                  right.value - left.value, bottom.value - top.value, conf))
+                if not lib.TessResultIteratorNext(it, RIL_WORD):
+                    break
+        finally:
+            lib.TessResultIteratorDelete(it)
+        return words
+    finally:
+        lib.TessBaseAPIClear(handle)
+        del keep